@@ -6,7 +6,11 @@ from tkinter import ttk, messagebox, Scale
 
 from PIL import Image, ImageTk
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import cv2
+from duplikat_gruppen import gruppen_paare, naechste_distanzen
 
 
 def get_video_info(video_pfad):
@@ -63,39 +67,153 @@ def get_video_info(video_pfad):
         return None
 
 
-def extrahiere_keyframes(video_pfad):
-    """Extrahiert alle Keyframes als PIL Images."""
+def keyframe_positionen(video_pfad, abstand=30):
+    """Liefert die Frame-Indizes der anzuzeigenden Keyframes, ohne das Video zu dekodieren."""
     try:
         cap = cv2.VideoCapture(video_pfad)
         if not cap.isOpened():
             return []
-        keyframes = []
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            # Hier müsstest du deine Logik zur Keyframe-Erkennung einfügen.
-            # Für dieses Beispiel nehmen wir einfach jeden N-ten Frame.
-            if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) % 30 == 0:  # Beispiel: Jeder 30. Frame
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                keyframes.append(Image.fromarray(frame_rgb))
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         cap.release()
-        return keyframes
+        return list(range(0, frame_count, abstand))
     except Exception as e:
-        print(f"Fehler beim Extrahieren von Keyframes für {video_pfad}: {e}")
+        print(f"Fehler beim Ermitteln der Keyframes für {video_pfad}: {e}")
         return []
 
 
+class FrameLader:
+    """
+    Lädt einzelne Frames per Seek statt das ganze Video zu dekodieren.
+    Die verkleinerten Bilder liegen in einem begrenzten LRU-Cache; ein Hintergrund-Thread kann Frames vorladen.
+    Sind keyframe_metadaten aus der Analyse bekannt, werden genau die dort verglichenen Keyframes angezeigt.
+    """
+
+    def __init__(self, max_bilder=64, max_groesse=(960, 540), max_offene_videos=4, keyframe_metadaten=None):
+        self.max_bilder = max_bilder
+        self.max_groesse = max_groesse
+        self.max_offene_videos = max_offene_videos
+        self._bilder = OrderedDict()
+        self._captures = OrderedDict()
+        self._positionen = {}
+        self.keyframe_metadaten = keyframe_metadaten or {}
+        # cv2.VideoCapture ist nicht threadsicher; UI- und Vorlade-Thread teilen sich die offenen Videos
+        self._lock = threading.Lock()
+        self._vorlader = ThreadPoolExecutor(max_workers=1)
+
+    def positionen(self, video_pfad):
+        with self._lock:
+            if video_pfad not in self._positionen:
+                metadaten = self.keyframe_metadaten.get(video_pfad)
+                if metadaten and metadaten.get('frame_indizes'):
+                    self._positionen[video_pfad] = list(metadaten['frame_indizes'])
+                else:
+                    self._positionen[video_pfad] = keyframe_positionen(video_pfad)
+            return self._positionen[video_pfad]
+
+    def zeitstempel(self, video_pfad, index):
+        """Liefert den Zeitstempel (Sekunden) des index-ten Keyframes oder None, falls unbekannt."""
+        zeitstempel = (self.keyframe_metadaten.get(video_pfad) or {}).get('zeitstempel')
+        if zeitstempel and 0 <= index < len(zeitstempel):
+            return zeitstempel[index]
+        return None
+
+    def _capture(self, video_pfad):
+        cap = self._captures.pop(video_pfad, None)
+        if cap is None:
+            cap = cv2.VideoCapture(video_pfad)
+            while len(self._captures) >= self.max_offene_videos:
+                _, alter_cap = self._captures.popitem(last=False)
+                alter_cap.release()
+        self._captures[video_pfad] = cap
+        return cap
+
+    def hole(self, video_pfad, frame_index):
+        """Liefert den Frame als verkleinertes PIL Image (aus dem Cache oder per Seek geladen) oder None."""
+        schluessel = (video_pfad, frame_index)
+        with self._lock:
+            if schluessel in self._bilder:
+                self._bilder.move_to_end(schluessel)
+                return self._bilder[schluessel]
+            try:
+                cap = self._capture(video_pfad)
+                if not cap.isOpened():
+                    return None
+                # Nur springen, wenn der Frame nicht ohnehin als nächster gelesen wird
+                if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != frame_index:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+                ret, frame = cap.read()
+                if not ret:
+                    return None
+                bild = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                bild.thumbnail(self.max_groesse)
+            except Exception as e:
+                print(f"Fehler beim Laden von Frame {frame_index} aus {video_pfad}: {e}")
+                return None
+            self._bilder[schluessel] = bild
+            while len(self._bilder) > self.max_bilder:
+                self._bilder.popitem(last=False)
+            return bild
+
+    def vorladen(self, video_pfad, anzahl=1):
+        """Lädt die ersten Keyframes eines Videos im Hintergrund in den Cache."""
+        def lade():
+            for frame_index in self.positionen(video_pfad)[:anzahl]:
+                self.hole(video_pfad, frame_index)
+        try:
+            self._vorlader.submit(lade)
+        except RuntimeError:
+            pass  # Lader wurde bereits geschlossen
+
+    def schliesse(self):
+        self._vorlader.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            for cap in self._captures.values():
+                cap.release()
+            self._captures.clear()
+            self._bilder.clear()
+
+
+class KeyframeFolge:
+    """Sequenz der Keyframes eines Videos, deren Bilder erst beim Zugriff über den FrameLader geladen werden."""
+
+    def __init__(self, frame_lader, video_pfad):
+        self.frame_lader = frame_lader
+        self.video_pfad = video_pfad
+        self.positionen = frame_lader.positionen(video_pfad)
+
+    def __len__(self):
+        return len(self.positionen)
+
+    def __getitem__(self, index):
+        return self.frame_lader.hole(self.video_pfad, self.positionen[index])
+
+
+def formatiere_zeitstempel(sekunden):
+    """Formatiert einen Zeitstempel als m:ss.s bzw. h:mm:ss.s."""
+    minuten, sekunden = divmod(sekunden, 60)
+    stunden, minuten = divmod(int(minuten), 60)
+    if stunden:
+        return f"{stunden}:{minuten:02d}:{sekunden:04.1f}"
+    return f"{minuten}:{sekunden:04.1f}"
+
+
 class AuswahlDialog(tk.Toplevel):
-    def __init__(self, parent, vergleichs_ergebnisse, schwelle, alle_thumbnails, alle_video_pfade):
+    """
+    Zeigt ähnliche Videopaare nacheinander zum Vergleich der Keyframes. Mit laufend=True ist der Dialog nicht modal
+    und wartet auf weitere Paare aus einem noch laufenden Scan (fuege_paar_hinzu), bis scan_beendet aufgerufen wird.
+    """
+
+    def __init__(self, parent, vergleichs_ergebnisse, schwelle, alle_video_pfade, keyframe_metadaten=None, laufend=False):
         super().__init__(parent)
         self.title(f"Ähnliche Videopaare überprüfen - v{__version__}")
         self.geometry("600x500")  # Etwas mehr Höhe für den Ähnlichkeitswert und Trackbars
-        self.grab_set()
+        self.laufend = laufend
+        if not laufend:
+            # Während eines laufenden Scans müssen Pause und Abbrechen im Hauptfenster bedienbar bleiben
+            self.grab_set()
         self.focus_set()
 
         self.vergleichs_ergebnisse = [(pair, aehnlichkeit) for pair, aehnlichkeit in vergleichs_ergebnisse.items() if aehnlichkeit and aehnlichkeit[0] <= schwelle]
-        self.alle_thumbnails = alle_thumbnails
         self.alle_video_pfade = alle_video_pfade
         self.aktueller_index = 0
         self.max_index = len(self.vergleichs_ergebnisse) - 1
@@ -119,6 +237,7 @@ class AuswahlDialog(tk.Toplevel):
         self.info_label_left = None
         self.info_label_right = None
         self.paar_anzeige_label = None
+        self.frame_lader = FrameLader(keyframe_metadaten=keyframe_metadaten)
 
         self.create_widgets()
         self.zeige_aktuelles_paar()
@@ -216,7 +335,45 @@ class AuswahlDialog(tk.Toplevel):
         self.paar_anzeige_label = ttk.Label(navigation_frame, text="")
         self.paar_anzeige_label.grid(row=0, column=1, padx=5, sticky="ew")
 
+        beste_button = ttk.Button(navigation_frame, text="Beste Übereinstimmung", command=self.zeige_beste_uebereinstimmung)
+        beste_button.grid(row=0, column=2, padx=5, sticky="e")
+
+    def fuege_paar_hinzu(self, paar, aehnlichkeit, keyframe_metadaten=None):
+        """Hängt ein während des Scans gefundenes Paar an; wartet der Dialog gerade, wird es sofort angezeigt."""
+        if keyframe_metadaten:
+            self.frame_lader.keyframe_metadaten.update(keyframe_metadaten)
+        self.vergleichs_ergebnisse.append((paar, aehnlichkeit))
+        self.max_index = len(self.vergleichs_ergebnisse) - 1
+        if self.aktueller_index == self.max_index:
+            self.zeige_aktuelles_paar()
+        else:
+            self.paar_anzeige_label.config(text=f"Paar {self.aktueller_index + 1} / {len(self.vergleichs_ergebnisse)} (Scan läuft)")
+
+    def scan_beendet(self):
+        """Beendet das Warten auf weitere Paare; ohne ein einziges Paar schließt sich der Dialog mit einem Hinweis."""
+        self.laufend = False
+        if self.aktueller_index > self.max_index or not self.vergleichs_ergebnisse:
+            self.zeige_aktuelles_paar()
+        else:
+            self.paar_anzeige_label.config(text=f"Paar {self.aktueller_index + 1} / {len(self.vergleichs_ergebnisse)}")
+
+    def zeige_wartezustand(self):
+        self.similarity_label.config(text="Warte auf weitere ähnliche Paare...")
+        self.paar_anzeige_label.config(text=f"{len(self.vergleichs_ergebnisse)} Paare bisher (Scan läuft)")
+        for frame, label in ((self.left_frame, self.keyframe_image_label_left), (self.right_frame, self.keyframe_image_label_right)):
+            frame.config(text="")
+            label.config(image="")
+            label.image = None
+        self.info_label_left.config(text="")
+        self.info_label_right.config(text="")
+        self.aktuelle_keyframes_links_pil = None
+        self.aktuelle_keyframes_rechts_pil = None
+
     def zeige_aktuelles_paar(self):
+        if self.laufend and not (0 <= self.aktueller_index < len(self.vergleichs_ergebnisse)):
+            self.aktueller_index = len(self.vergleichs_ergebnisse)
+            self.zeige_wartezustand()
+            return
         if not self.vergleichs_ergebnisse:
             messagebox.showinfo("Info", "Keine ähnlichen Videopaare gefunden.")
             self.destroy()
@@ -226,7 +383,7 @@ class AuswahlDialog(tk.Toplevel):
             (pfad1, pfad2), aehnlichkeit = self.vergleichs_ergebnisse[self.aktueller_index]
             similarity_value = f"{aehnlichkeit[0]:.4f}"
             self.similarity_label.config(text=f"Ähnlichkeit: {similarity_value}")
-            self.paar_anzeige_label.config(text=f"Paar {self.aktueller_index + 1} / {len(self.vergleichs_ergebnisse)}")
+            self.paar_anzeige_label.config(text=f"Paar {self.aktueller_index + 1} / {len(self.vergleichs_ergebnisse)}" + (" (Scan läuft)" if self.laufend else ""))
 
             if os.path.exists(pfad1) and os.path.exists(pfad2):
                 self.left_frame.config(text=os.path.basename(pfad1))
@@ -249,8 +406,8 @@ class AuswahlDialog(tk.Toplevel):
                 else:
                     self.info_label_right.config(text="Informationen konnten nicht abgerufen werden.")
 
-                self.aktuelle_keyframes_links_pil = extrahiere_keyframes(pfad1)
-                self.aktuelle_keyframes_rechts_pil = extrahiere_keyframes(pfad2)
+                self.aktuelle_keyframes_links_pil = KeyframeFolge(self.frame_lader, pfad1)
+                self.aktuelle_keyframes_rechts_pil = KeyframeFolge(self.frame_lader, pfad2)
                 self.num_keyframes_links = len(self.aktuelle_keyframes_links_pil)
                 self.num_keyframes_rechts = len(self.aktuelle_keyframes_rechts_pil)
 
@@ -267,21 +424,69 @@ class AuswahlDialog(tk.Toplevel):
                 else:
                     self.original_image_right = None
 
-                self.zeige_keyframe_links(0)
-                self.zeige_keyframe_rechts(0)
-
                 # Synchronisiere die Trackbars, wenn sie sich ändern
                 self.keyframe_scale_left.config(command=self.synchronisiere_keyframes_links)
                 self.keyframe_scale_right.config(command=self.synchronisiere_keyframes_rechts)
 
+                # Direkt das ähnlichste Keyframe-Paar aus der Analyse zeigen, sofern bekannt
+                if not self.zeige_beste_uebereinstimmung():
+                    self.zeige_keyframe_links(0)
+                    self.zeige_keyframe_rechts(0)
+
+                self.lade_naechstes_paar_vor()
+
             else:
                 # Eines oder beide Videos existieren nicht mehr, überspringen
                 self.naechstes_paar()
         else:
             self.destroy()
 
+    def zeige_beste_uebereinstimmung(self):
+        """Springt auf beiden Seiten zum ähnlichsten Keyframe-Paar des aktuellen Videopaares."""
+        if not (0 <= self.aktueller_index < len(self.vergleichs_ergebnisse)):
+            return False
+        _, aehnlichkeit = self.vergleichs_ergebnisse[self.aktueller_index]
+        if len(aehnlichkeit) < 2 or aehnlichkeit[1] is None:
+            return False
+        index_links, index_rechts = aehnlichkeit[1]
+        if not (0 <= index_links < self.num_keyframes_links and 0 <= index_rechts < self.num_keyframes_rechts):
+            return False
+
+        # Die Kopplung der Trackbars kurz lösen, damit beide Seiten unterschiedliche Positionen zeigen können
+        self.keyframe_scale_left.config(command="")
+        self.keyframe_scale_right.config(command="")
+        self.keyframe_scale_left.set(index_links)
+        self.keyframe_scale_right.set(index_rechts)
+        self.original_image_left = self.aktuelle_keyframes_links_pil[index_links]
+        self.original_image_right = self.aktuelle_keyframes_rechts_pil[index_rechts]
+        self.zeige_keyframe(self.aktuelle_keyframes_links_pil, index_links, self.keyframe_image_label_left, "original_image_left")
+        self.zeige_keyframe(self.aktuelle_keyframes_rechts_pil, index_rechts, self.keyframe_image_label_right, "original_image_right")
+        self.aktualisiere_zeitstempel(index_links, index_rechts)
+        self.after_idle(self.keyframe_scale_left.config, {"command": self.synchronisiere_keyframes_links})
+        self.after_idle(self.keyframe_scale_right.config, {"command": self.synchronisiere_keyframes_rechts})
+        return True
+
+    def aktualisiere_zeitstempel(self, index_links, index_rechts):
+        """Zeigt die Zeitstempel der aktuellen Keyframes als Beschriftung der Trackbars an."""
+        if 0 <= self.aktueller_index < len(self.vergleichs_ergebnisse):
+            (pfad1, pfad2), _ = self.vergleichs_ergebnisse[self.aktueller_index]
+            for scale, pfad, index in ((self.keyframe_scale_left, pfad1, index_links), (self.keyframe_scale_right, pfad2, index_rechts)):
+                zeitstempel = self.frame_lader.zeitstempel(pfad, index)
+                scale.config(label=formatiere_zeitstempel(zeitstempel) if zeitstempel is not None else "")
+
+    def lade_naechstes_paar_vor(self):
+        """Lädt die ersten Keyframes des nächsten Paares im Hintergrund, damit das Blättern sofort reagiert."""
+        if self.aktueller_index + 1 < len(self.vergleichs_ergebnisse):
+            (pfad1, pfad2), _ = self.vergleichs_ergebnisse[self.aktueller_index + 1]
+            self.frame_lader.vorladen(pfad1)
+            self.frame_lader.vorladen(pfad2)
+
+    def destroy(self):
+        self.frame_lader.schliesse()
+        super().destroy()
+
     def zeige_keyframe(self, keyframes, index, label, original_image_attr):
-        if keyframes and 0 <= index < len(keyframes):
+        if keyframes and 0 <= index < len(keyframes) and getattr(self, original_image_attr) is not None:
             original_image = getattr(self, original_image_attr)
             target_width = label.winfo_width()
             target_height = label.winfo_height()
@@ -345,9 +550,11 @@ class AuswahlDialog(tk.Toplevel):
 
     def synchronisiere_keyframes_links(self, value):
         self.zeige_keyframe_links(value)
+        self.aktualisiere_zeitstempel(self.keyframe_scale_left.get(), self.keyframe_scale_right.get())
 
     def synchronisiere_keyframes_rechts(self, value):
         self.zeige_keyframe_rechts(value)
+        self.aktualisiere_zeitstempel(self.keyframe_scale_left.get(), self.keyframe_scale_right.get())
 
     def zeige_vorheriges_paar(self):
         self.aktueller_index -= 1
@@ -357,14 +564,14 @@ class AuswahlDialog(tk.Toplevel):
 
     def zeige_naechstes_paar(self):
         self.aktueller_index += 1
-        if self.aktueller_index > self.max_index:
+        if self.aktueller_index > self.max_index and not self.laufend:
             self.destroy()
             return
         self.zeige_aktuelles_paar()
 
     def naechstes_paar(self):
         self.aktueller_index += 1
-        if self.aktueller_index > self.max_index:
+        if self.aktueller_index > self.max_index and not self.laufend:
             self.destroy()
             return
         self.zeige_aktuelles_paar()
@@ -400,3 +607,181 @@ class AuswahlDialog(tk.Toplevel):
         """Ruft die update_status-Methode des Hauptfensters auf."""
         if self.master and hasattr(self.master, 'update_status'):
             self.master.update_status(meldung)
+
+
+class GruppenDialog(tk.Toplevel):
+    """
+    Prüft ganze Duplikatgruppen statt einzelner Paare: Alle Mitglieder einer Gruppe stehen in einer Liste,
+    markiert wird, welche Videos behalten werden, und die übrigen werden nach Bestätigung gemeinsam gelöscht.
+    Für einen genauen Vergleich lassen sich die Paare einer Gruppe im AuswahlDialog öffnen.
+    """
+
+    def __init__(self, parent, gruppen, vergleichs_ergebnisse, alle_video_pfade, keyframe_metadaten=None):
+        super().__init__(parent)
+        self.title(f"Duplikatgruppen überprüfen - v{__version__}")
+        self.geometry("800x500")
+        self.grab_set()
+        self.focus_set()
+
+        self.gruppen = gruppen
+        self.vergleichs_ergebnisse = vergleichs_ergebnisse
+        self.alle_video_pfade = alle_video_pfade
+        self.keyframe_metadaten = keyframe_metadaten
+        self.aktueller_index = 0
+        self.behalten = set()
+        self.vorschau_bild = None
+        self.gruppen_label = None
+        self.mitglieder_liste = None
+        self.vorschau_label = None
+        self.frame_lader = FrameLader(keyframe_metadaten=keyframe_metadaten)
+
+        self.create_widgets()
+        self.zeige_aktuelle_gruppe()
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self)
+        main_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        main_frame.grid_rowconfigure(1, weight=1)
+        main_frame.grid_columnconfigure(0, weight=3)
+        main_frame.grid_columnconfigure(1, weight=2)
+
+        self.gruppen_label = ttk.Label(main_frame, text="")
+        self.gruppen_label.grid(row=0, column=0, columnspan=2, pady=5, sticky="ew")
+
+        spalten = ("behalten", "datei", "aufloesung", "dauer", "groesse", "distanz")
+        self.mitglieder_liste = ttk.Treeview(main_frame, columns=spalten, show="headings", selectmode="browse")
+        for spalte, titel, breite in (("behalten", "Behalten", 70), ("datei", "Datei", 220), ("aufloesung", "Auflösung", 80),
+                                      ("dauer", "Dauer", 60), ("groesse", "Größe", 80), ("distanz", "Distanz", 60)):
+            self.mitglieder_liste.heading(spalte, text=titel)
+            self.mitglieder_liste.column(spalte, width=breite, stretch=spalte == "datei")
+        self.mitglieder_liste.grid(row=1, column=0, sticky="nsew")
+        self.mitglieder_liste.bind("<<TreeviewSelect>>", self.zeige_vorschau)
+        self.mitglieder_liste.bind("<Double-1>", self.wechsle_behalten)
+        self.mitglieder_liste.bind("<space>", self.wechsle_behalten)
+
+        self.vorschau_label = ttk.Label(main_frame, anchor="center")
+        self.vorschau_label.grid(row=1, column=1, sticky="nsew", padx=(10, 0))
+
+        ttk.Label(main_frame, text="Doppelklick oder Leertaste: Video behalten bzw. nicht behalten").grid(row=2, column=0, columnspan=2, pady=5, sticky="w")
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=3, column=0, columnspan=2, pady=5, sticky="ew")
+        for spalte in range(4):
+            button_frame.grid_columnconfigure(spalte, weight=1)
+        ttk.Button(button_frame, text="Vorherige Gruppe", command=self.zeige_vorherige_gruppe).grid(row=0, column=0, padx=5, sticky="ew")
+        ttk.Button(button_frame, text="Paare einzeln prüfen", command=self.pruefe_paare).grid(row=0, column=1, padx=5, sticky="ew")
+        ttk.Button(button_frame, text="Alle behalten", command=self.naechste_gruppe).grid(row=0, column=2, padx=5, sticky="ew")
+        ttk.Button(button_frame, text="Nicht markierte löschen", command=self.loesche_nicht_markierte).grid(row=0, column=3, padx=5, sticky="ew")
+
+    def zeige_aktuelle_gruppe(self):
+        if not self.gruppen:
+            messagebox.showinfo("Info", "Keine Duplikatgruppen gefunden.")
+            self.destroy()
+            return
+        if not (0 <= self.aktueller_index < len(self.gruppen)):
+            self.destroy()
+            return
+
+        gruppe = [pfad for pfad in self.gruppen[self.aktueller_index] if os.path.exists(pfad)]
+        if len(gruppe) < 2:
+            # Bis auf höchstens ein Video bereits gelöscht, überspringen
+            self.naechste_gruppe()
+            return
+
+        infos = {pfad: get_video_info(pfad) for pfad in gruppe}
+        distanzen = naechste_distanzen(gruppe, self.vergleichs_ergebnisse)
+        # Vorauswahl: das Video mit der höchsten Auflösung, bei Gleichstand das größere
+        bestes = max(gruppe, key=lambda pfad: ((infos[pfad]['frame_width'] * infos[pfad]['frame_height']) if infos[pfad] else 0, os.path.getsize(pfad)))
+        self.behalten = {bestes}
+
+        self.gruppen_label.config(text=f"Gruppe {self.aktueller_index + 1} / {len(self.gruppen)}: {len(gruppe)} Videos")
+        self.mitglieder_liste.delete(*self.mitglieder_liste.get_children())
+        for pfad in gruppe:
+            info = infos[pfad]
+            self.mitglieder_liste.insert("", tk.END, iid=pfad, values=(
+                "",
+                os.path.basename(pfad),
+                f"{info['frame_width']}x{info['frame_height']}" if info else "?",
+                info['duration_readable'] if info else "?",
+                info['filesize_readable'] if info else "?",
+                f"{distanzen[pfad]:.4f}" if distanzen[pfad] is not None else "",
+            ))
+            self.frame_lader.vorladen(pfad)
+        self.aktualisiere_markierungen()
+        self.mitglieder_liste.selection_set(bestes)
+        self.mitglieder_liste.focus(bestes)
+
+    def aktualisiere_markierungen(self):
+        for pfad in self.mitglieder_liste.get_children():
+            self.mitglieder_liste.set(pfad, "behalten", "✓" if pfad in self.behalten else "")
+
+    def wechsle_behalten(self, _event=None):
+        auswahl = self.mitglieder_liste.selection()
+        if not auswahl:
+            return
+        self.behalten ^= {auswahl[0]}
+        self.aktualisiere_markierungen()
+
+    def zeige_vorschau(self, _event=None):
+        auswahl = self.mitglieder_liste.selection()
+        positionen = self.frame_lader.positionen(auswahl[0]) if auswahl else []
+        bild = self.frame_lader.hole(auswahl[0], positionen[0]) if positionen else None
+        if bild is None:
+            self.vorschau_label.config(image="")
+            self.vorschau_bild = None
+            return
+        breite, hoehe = self.vorschau_label.winfo_width(), self.vorschau_label.winfo_height()
+        bild = bild.copy()
+        bild.thumbnail((breite, hoehe) if breite > 1 and hoehe > 1 else (320, 240))  # Größe vor dem ersten Layout noch unbekannt
+        self.vorschau_bild = ImageTk.PhotoImage(bild)
+        self.vorschau_label.config(image=self.vorschau_bild)
+
+    def pruefe_paare(self):
+        """Öffnet die verglichenen Paare der aktuellen Gruppe im AuswahlDialog."""
+        if not (0 <= self.aktueller_index < len(self.gruppen)):
+            return
+        paare = gruppen_paare(self.gruppen[self.aktueller_index], self.vergleichs_ergebnisse)
+        dialog = AuswahlDialog(self, paare, float("inf"), self.alle_video_pfade, self.keyframe_metadaten)
+        self.wait_window(dialog)
+        self.grab_set()
+        self.zeige_aktuelle_gruppe()
+
+    def loesche_nicht_markierte(self):
+        zu_loeschen = [pfad for pfad in self.mitglieder_liste.get_children() if pfad not in self.behalten]
+        if not zu_loeschen:
+            self.naechste_gruppe()
+            return
+        if not self.behalten and not messagebox.askyesno("Löschen bestätigen", "Es ist kein Video zum Behalten markiert. Wirklich die ganze Gruppe löschen?"):
+            return
+        namen = "\n".join(os.path.basename(pfad) for pfad in zu_loeschen)
+        if not messagebox.askyesno("Löschen bestätigen", f"Möchtest du diese {len(zu_loeschen)} Videos wirklich löschen?\n\n{namen}"):
+            return
+        for pfad in zu_loeschen:
+            try:
+                os.remove(pfad)
+                self.update_status_im_hauptfenster(f"Gelöscht: {os.path.basename(pfad)}")
+            except Exception as e:
+                messagebox.showerror("Fehler", f"Fehler beim Löschen von '{os.path.basename(pfad)}': {e}")
+        self.naechste_gruppe()
+
+    def zeige_vorherige_gruppe(self):
+        self.aktueller_index = max(0, self.aktueller_index - 1)
+        self.zeige_aktuelle_gruppe()
+
+    def naechste_gruppe(self):
+        self.aktueller_index += 1
+        if self.aktueller_index >= len(self.gruppen):
+            self.destroy()
+            return
+        self.zeige_aktuelle_gruppe()
+
+    def destroy(self):
+        self.frame_lader.schliesse()
+        super().destroy()
+
+    def update_status_im_hauptfenster(self, meldung):
+        """Ruft die update_status-Methode des Hauptfensters auf."""
+        if self.master and hasattr(self.master, 'update_status'):
+            self.master.update_status(meldung)
@@ -0,0 +1,330 @@
+# benchmark.py
+"""
+Benchmarks für die Keyframe-Extraktion und den Videovergleich.
+
+Aufruf:
+    python benchmark.py video1.mp4 video2.mp4 ...        Abtastmodi auf eigenen Videos vergleichen
+    python benchmark.py --suite -o ergebnis.json          Reproduzierbare Suite auf synthetischen Videos
+
+Abtastmodi: Für jeden Modus werden Laufzeit, analysierte Frames pro Sekunde und Anzahl der Keyframes gemessen.
+Als Genauigkeit dienen die Distanz der Signatur zur exakten Signatur desselben Videos (0 = identisch)
+und die mittlere Abweichung der Paar-Distanzen gegenüber dem exakten Modus.
+
+Suite: Erzeugt mit synthetische_videos einen deterministischen Korpus (verschiedene Auflösungen, Längen,
+Schnittdichten und Near-Duplicate-Varianten) und misst Extraktions-Frames pro Sekunde, Keyframes pro Minute,
+Paar-Durchsatz bei wachsender Video- und Keyframe-Anzahl, den Gesamtlauf von vergleiche_videos sowie den
+Spitzenspeicher (tracemalloc). Die Ergebnisse werden als JSON geschrieben, damit Läufe vergleichbar sind.
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from itertools import combinations
+
+import cv2
+import numpy as np
+
+from distanz_engine import histogramm_matrix, quantisiere_histogramm, signatur_matrix, vergleiche_matrizen
+from synthetische_videos import erzeuge_korpus
+from video_vergleich import (SIGNATUR_TYPEN, extrahiere_keyframe_histogramme, normalisiere_extraktions_optionen, reduziere_keyframes,
+                             vergleiche_videos)
+
+ABTAST_MODI = {
+    "exakt": {},
+    "jeder 2.": {'modus': 'jeder_n', 'schritt': 2},
+    "jeder 5.": {'modus': 'jeder_n', 'schritt': 5},
+    "jeder 5., 160x90": {'modus': 'jeder_n', 'schritt': 5, 'analyse_groesse': [160, 90]},
+    "jeder 10., 160x90": {'modus': 'jeder_n', 'schritt': 10, 'analyse_groesse': [160, 90]},
+    "1/s, 160x90": {'modus': 'intervall', 'intervall_sekunden': 1.0, 'analyse_groesse': [160, 90]},
+}
+
+
+def frame_anzahl(video_pfad):
+    cap = cv2.VideoCapture(video_pfad)
+    anzahl = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return anzahl
+
+
+def miss_abtastmodi(video_pfade, modi=None):
+    """Führt alle Abtastmodi auf den Videos aus und liefert eine Liste mit einem Ergebnis-Dict pro Modus."""
+    modi = modi or ABTAST_MODI
+    gesamt_frames = sum(frame_anzahl(pfad) for pfad in video_pfade)
+    referenz_matrizen = None
+    referenz_paare = None
+    referenz_dauer = None
+    ergebnisse = []
+
+    for name, optionen in modi.items():
+        start = time.perf_counter()
+        optionen = normalisiere_extraktions_optionen(optionen)
+        matrizen = {pfad: signatur_matrix(extrahiere_keyframe_histogramme(pfad, **optionen), optionen['signatur_typ']) for pfad in video_pfade}
+        dauer = time.perf_counter() - start
+        paare = {(a, b): vergleiche_matrizen(matrizen[a], matrizen[b]) for a, b in combinations(video_pfade, 2)}
+
+        if referenz_matrizen is None:
+            referenz_matrizen, referenz_paare, referenz_dauer = matrizen, paare, dauer
+        signatur_abweichung = [vergleiche_matrizen(referenz_matrizen[pfad], matrizen[pfad]) for pfad in video_pfade]
+        paar_abweichung = [abs(paare[paar] - referenz_paare[paar]) for paar in paare if paare[paar] is not None and referenz_paare[paar] is not None]
+
+        ergebnisse.append({
+            'modus': name,
+            'sekunden': dauer,
+            'frames_pro_sekunde': gesamt_frames / dauer if dauer > 0 else 0.0,
+            'beschleunigung': referenz_dauer / dauer if dauer > 0 else 0.0,
+            'keyframes': sum(len(matrix) for matrix in matrizen.values()),
+            'signatur_abweichung': float(np.mean([d for d in signatur_abweichung if d is not None] or [0.0])),
+            'paar_abweichung': float(np.mean(paar_abweichung or [0.0])),
+        })
+    return ergebnisse
+
+
+# Umfang der Suite: Korpus-Konfigurationen sowie Video- und Keyframe-Anzahlen für den Paar-Durchsatz
+SUITE_UMFAENGE = {
+    'klein': {
+        'korpus': [
+            {'breite': 320, 'hoehe': 240, 'dauer': 10, 'schnitte_pro_minute': 6},
+            {'breite': 640, 'hoehe': 360, 'dauer': 20, 'schnitte_pro_minute': 12},
+            {'breite': 320, 'hoehe': 240, 'dauer': 30, 'schnitte_pro_minute': 30},
+        ],
+        'video_anzahlen': [4, 8, 16],
+        'keyframe_anzahlen': [10, 50, 200],
+        'max_keyframes': [16, 8, 4],
+    },
+    'gross': {
+        'korpus': [
+            {'breite': 320, 'hoehe': 240, 'dauer': 10, 'schnitte_pro_minute': 6},
+            {'breite': 640, 'hoehe': 360, 'dauer': 20, 'schnitte_pro_minute': 12},
+            {'breite': 320, 'hoehe': 240, 'dauer': 30, 'schnitte_pro_minute': 30},
+            {'breite': 1280, 'hoehe': 720, 'dauer': 60, 'schnitte_pro_minute': 12},
+            {'breite': 640, 'hoehe': 360, 'dauer': 120, 'schnitte_pro_minute': 20},
+        ],
+        'video_anzahlen': [8, 32, 64],
+        'keyframe_anzahlen': [10, 100, 500],
+        'max_keyframes': [32, 16, 8, 4],
+    },
+}
+
+
+def _miss(funktion, *args, **kwargs):
+    """Führt funktion aus und liefert (Ergebnis, Sekunden, Spitzenspeicher in Bytes laut tracemalloc)."""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        ergebnis = funktion(*args, **kwargs)
+        dauer = time.perf_counter() - start
+        _, spitze = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return ergebnis, dauer, spitze
+
+
+def miss_extraktion(korpus, optionen=None, pipeline=False):
+    """Misst Frames pro Sekunde, Keyframes pro Minute und Spitzenspeicher der Extraktion je Video."""
+    optionen = normalisiere_extraktions_optionen(optionen)
+    ergebnisse = []
+    for eintrag in korpus:
+        frames = frame_anzahl(eintrag['pfad'])
+        fps = cv2.VideoCapture(eintrag['pfad']).get(cv2.CAP_PROP_FPS) or 25.0
+        histogramme, dauer, spitze = _miss(extrahiere_keyframe_histogramme, eintrag['pfad'], **optionen, pipeline=pipeline)
+        minuten = frames / fps / 60.0
+        ergebnisse.append({
+            'video': os.path.basename(eintrag['pfad']),
+            'variante': eintrag['variante'],
+            'pipeline': pipeline,
+            'aufloesung': [eintrag['breite'], eintrag['hoehe']],
+            'frames': frames,
+            'sekunden': dauer,
+            'frames_pro_sekunde': frames / dauer if dauer > 0 else 0.0,
+            'keyframes': len(histogramme),
+            'keyframes_pro_minute': len(histogramme) / minuten if minuten > 0 else 0.0,
+            'spitzenspeicher_bytes': spitze,
+        })
+    return ergebnisse
+
+
+def zufalls_histogramme(rng, anzahl, bins=512):
+    """Erzeugt anzahl zufällige, aber deterministische Histogramme wie von calcHist (float32)."""
+    return list(rng.gamma(0.3, 1.0, (anzahl, bins)).astype(np.float32) * 1000)
+
+
+def zufalls_hashes(rng, anzahl):
+    """Erzeugt anzahl zufällige, aber deterministische 64-Bit-Hashes."""
+    return list(rng.integers(0, 2**64, anzahl, dtype=np.uint64))
+
+
+def miss_paar_durchsatz(video_anzahlen, keyframe_anzahlen, seed=0, signatur_typ='histogramm'):
+    """Misst verglichene Paare und Keyframe-Vergleiche pro Sekunde bei wachsender Video- und Keyframe-Anzahl."""
+    ergebnisse = []
+    for keyframes in keyframe_anzahlen:
+        for videos in video_anzahlen:
+            rng = np.random.default_rng(seed)
+            if signatur_typ == 'dhash':
+                matrizen = [signatur_matrix(zufalls_hashes(rng, keyframes), 'dhash') for _ in range(videos)]
+            else:
+                matrizen = [histogramm_matrix(zufalls_histogramme(rng, keyframes)) for _ in range(videos)]
+            paare = list(combinations(range(videos), 2))
+            _, dauer, spitze = _miss(lambda: [vergleiche_matrizen(matrizen[a], matrizen[b], mit_bestem_paar=True) for a, b in paare])
+            ergebnisse.append({
+                'signatur_typ': signatur_typ,
+                'videos': videos,
+                'keyframes_pro_video': keyframes,
+                'paare': len(paare),
+                'sekunden': dauer,
+                'paare_pro_sekunde': len(paare) / dauer if dauer > 0 else 0.0,
+                'keyframe_vergleiche_pro_sekunde': len(paare) * keyframes * keyframes / dauer if dauer > 0 else 0.0,
+                'spitzenspeicher_bytes': spitze,
+            })
+    return ergebnisse
+
+
+def miss_near_duplicates(korpus, optionen=None):
+    """Mittlere Distanz zwischen Original und jeder Variante sowie zwischen verschiedenen Originalen."""
+    optionen = normalisiere_extraktions_optionen(optionen)
+    matrizen = {eintrag['pfad']: signatur_matrix(extrahiere_keyframe_histogramme(eintrag['pfad'], **optionen), optionen['signatur_typ']) for eintrag in korpus}
+    distanzen = {}
+    for eintrag in korpus:
+        if eintrag['variante'] is not None:
+            distanzen.setdefault(eintrag['variante'], []).append(vergleiche_matrizen(matrizen[eintrag['original']], matrizen[eintrag['pfad']]))
+    originale = [eintrag['pfad'] for eintrag in korpus if eintrag['variante'] is None]
+    distanzen['verschiedene_originale'] = [vergleiche_matrizen(matrizen[a], matrizen[b]) for a, b in combinations(originale, 2)]
+    return {name: float(np.mean([d for d in werte if d is not None])) if any(d is not None for d in werte) else None
+            for name, werte in distanzen.items()}
+
+
+def miss_keyframe_begrenzung(korpus, max_keyframes_werte, quantisierungen=(None, 'float16', 'uint8'), schwelle=0.3):
+    """
+    Misst Speicherbedarf, Vergleichszeit und Genauigkeitsverlust von Keyframe-Begrenzung und Quantisierung.
+    Referenz sind alle Keyframes als float32; gemessen werden die mittlere und maximale Abweichung der
+    Paar-Distanzen sowie die Anzahl Paare, die bei der angegebenen Schwelle anders eingestuft würden.
+    """
+    optionen = normalisiere_extraktions_optionen(None)
+    signaturen = {eintrag['pfad']: extrahiere_keyframe_histogramme(eintrag['pfad'], **optionen, mit_metadaten=True) for eintrag in korpus}
+    paare = list(combinations(signaturen, 2))
+    referenz = None
+    ergebnisse = []
+    for max_keyframes in [None, *max_keyframes_werte]:
+        for quantisierung in quantisierungen:
+            reduziert = {}
+            for pfad, (histogramme, metadaten) in signaturen.items():
+                quantisiert = [quantisiere_histogramm(histogramm, quantisierung) for histogramm in histogramme]
+                reduziert[pfad] = reduziere_keyframes(quantisiert, metadaten, max_keyframes)[0]
+            matrizen = {pfad: histogramm_matrix(histogramme) for pfad, histogramme in reduziert.items()}
+            start = time.perf_counter()
+            distanzen = {paar: vergleiche_matrizen(matrizen[paar[0]], matrizen[paar[1]]) for paar in paare}
+            dauer = time.perf_counter() - start
+            if referenz is None:
+                referenz = distanzen
+            abweichungen = [abs(distanzen[paar] - referenz[paar]) for paar in paare if distanzen[paar] is not None and referenz[paar] is not None]
+            umgestuft = sum(1 for paar in paare if distanzen[paar] is not None and referenz[paar] is not None
+                            and (distanzen[paar] <= schwelle) != (referenz[paar] <= schwelle))
+            ergebnisse.append({
+                'max_keyframes': max_keyframes,
+                'quantisierung': quantisierung or 'float32',
+                'keyframes': sum(len(histogramme) for histogramme in reduziert.values()),
+                'signatur_bytes': sum(np.asarray(histogramme).nbytes for histogramme in reduziert.values()),
+                'vergleich_sekunden': dauer,
+                'mittlere_abweichung': float(np.mean(abweichungen or [0.0])),
+                'maximale_abweichung': float(np.max(abweichungen or [0.0])),
+                'umgestufte_paare': umgestuft,
+                'paare': len(paare),
+            })
+    return ergebnisse
+
+
+def fuehre_suite_aus(umfang='klein', korpus_verzeichnis=None, status_callback=print):
+    """Erzeugt den synthetischen Korpus (falls nötig) und führt alle Messungen der Suite aus."""
+    konfiguration = SUITE_UMFAENGE[umfang]
+    korpus_verzeichnis = korpus_verzeichnis or os.path.join(tempfile.gettempdir(), "easyvideocompare_benchmark")
+    status_callback(f"Erzeuge synthetischen Korpus in {korpus_verzeichnis} ...")
+    korpus = erzeuge_korpus(korpus_verzeichnis, konfiguration['korpus'])
+
+    status_callback("Messe Extraktion ...")
+    extraktion = miss_extraktion(korpus)
+    status_callback("Messe Extraktion mit Dekodier-Pipeline ...")
+    extraktion_pipeline = miss_extraktion([eintrag for eintrag in korpus if eintrag['variante'] is None], pipeline=True)
+    status_callback("Messe Paar-Durchsatz ...")
+    paar_durchsatz = [eintrag for signatur_typ in SIGNATUR_TYPEN
+                      for eintrag in miss_paar_durchsatz(konfiguration['video_anzahlen'], konfiguration['keyframe_anzahlen'], signatur_typ=signatur_typ)]
+    status_callback("Messe Gesamtlauf von vergleiche_videos ...")
+    pfade = [eintrag['pfad'] for eintrag in korpus]
+    _, dauer, spitze = _miss(vergleiche_videos, pfade)
+    status_callback("Messe Near-Duplicate-Distanzen ...")
+    near_duplicates = {signatur_typ: miss_near_duplicates(korpus, {'signatur_typ': signatur_typ}) for signatur_typ in SIGNATUR_TYPEN}
+    status_callback("Messe Keyframe-Begrenzung und Quantisierung ...")
+    keyframe_begrenzung = miss_keyframe_begrenzung(korpus, konfiguration['max_keyframes'])
+
+    return {
+        'zeitpunkt': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'umgebung': {
+            'python': platform.python_version(),
+            'plattform': platform.platform(),
+            'prozessoren': os.cpu_count(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+        },
+        'umfang': umfang,
+        'extraktion': extraktion,
+        'extraktion_pipeline': extraktion_pipeline,
+        'paar_durchsatz': paar_durchsatz,
+        'gesamtlauf': {'videos': len(pfade), 'paare': len(pfade) * (len(pfade) - 1) // 2, 'sekunden': dauer, 'spitzenspeicher_bytes': spitze},
+        'near_duplicates': near_duplicates,
+        'keyframe_begrenzung': keyframe_begrenzung,
+    }
+
+
+def zeige_suite(ergebnis):
+    print(f"\n{'Video':<48} {'Frames/s':>10} {'Keyfr./min':>11} {'Speicher MB':>12}")
+    for e in ergebnis['extraktion']:
+        print(f"{e['video']:<48} {e['frames_pro_sekunde']:>10.1f} {e['keyframes_pro_minute']:>11.1f} {e['spitzenspeicher_bytes'] / 2**20:>12.1f}")
+    for e in ergebnis['extraktion_pipeline']:
+        print(f"{e['video'] + ' (Pipeline)':<48} {e['frames_pro_sekunde']:>10.1f} {e['keyframes_pro_minute']:>11.1f} {e['spitzenspeicher_bytes'] / 2**20:>12.1f}")
+    print(f"\n{'Signatur':<11} {'Videos':>7} {'Keyframes':>10} {'Paare':>7} {'Paare/s':>10} {'KF-Vergl./s':>13} {'Speicher MB':>12}")
+    for e in ergebnis['paar_durchsatz']:
+        print(f"{e['signatur_typ']:<11} {e['videos']:>7} {e['keyframes_pro_video']:>10} {e['paare']:>7} {e['paare_pro_sekunde']:>10.1f} "
+              f"{e['keyframe_vergleiche_pro_sekunde']:>13.3g} {e['spitzenspeicher_bytes'] / 2**20:>12.1f}")
+    gesamt = ergebnis['gesamtlauf']
+    print(f"\nGesamtlauf: {gesamt['videos']} Videos, {gesamt['paare']} Paare in {gesamt['sekunden']:.2f} s, "
+          f"Spitzenspeicher {gesamt['spitzenspeicher_bytes'] / 2**20:.1f} MB")
+    for signatur_typ, distanzen in ergebnis['near_duplicates'].items():
+        print(f"Mittlere Distanz ({signatur_typ}): " + ", ".join(f"{name} {wert:.4f}" for name, wert in distanzen.items() if wert is not None))
+    print(f"\n{'Max. KF':>8} {'Format':<8} {'Keyframes':>10} {'KB':>9} {'Vergl. ms':>10} {'Mittl. Abw.':>12} {'Max. Abw.':>10} {'Umgestuft':>10}")
+    for e in ergebnis['keyframe_begrenzung']:
+        print(f"{e['max_keyframes'] or 'alle':>8} {e['quantisierung']:<8} {e['keyframes']:>10} {e['signatur_bytes'] / 1024:>9.1f} "
+              f"{e['vergleich_sekunden'] * 1000:>10.2f} {e['mittlere_abweichung']:>12.4f} {e['maximale_abweichung']:>10.4f} "
+              f"{e['umgestufte_paare']:>5}/{e['paare']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks für Keyframe-Extraktion und Videovergleich")
+    parser.add_argument("videos", nargs="*", help="Videodateien für den Vergleich der Abtastmodi")
+    parser.add_argument("--suite", action="store_true", help="Reproduzierbare Suite auf synthetischen Videos ausführen")
+    parser.add_argument("--umfang", choices=sorted(SUITE_UMFAENGE), default="klein", help="Umfang der Suite (Standard: klein)")
+    parser.add_argument("--korpus-verzeichnis", help="Verzeichnis für die synthetischen Videos (werden wiederverwendet)")
+    parser.add_argument("-o", "--ausgabe", help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args()
+
+    if args.suite:
+        ergebnis = fuehre_suite_aus(args.umfang, args.korpus_verzeichnis)
+        zeige_suite(ergebnis)
+    else:
+        video_pfade = [pfad for pfad in args.videos if os.path.exists(pfad)]
+        if not video_pfade:
+            parser.error("Keine Videodateien angegeben (oder --suite verwenden)")
+        ergebnis = {'zeitpunkt': time.strftime("%Y-%m-%dT%H:%M:%S"), 'abtastmodi': miss_abtastmodi(video_pfade)}
+        print(f"{'Modus':<20} {'Sek.':>8} {'Frames/s':>10} {'Faktor':>7} {'Keyframes':>10} {'Sig.-Abw.':>10} {'Paar-Abw.':>10}")
+        for e in ergebnis['abtastmodi']:
+            print(f"{e['modus']:<20} {e['sekunden']:>8.2f} {e['frames_pro_sekunde']:>10.1f} {e['beschleunigung']:>7.2f} "
+                  f"{e['keyframes']:>10} {e['signatur_abweichung']:>10.4f} {e['paar_abweichung']:>10.4f}")
+
+    if args.ausgabe:
+        with open(args.ausgabe, "w", encoding="utf-8") as datei:
+            json.dump(ergebnis, datei, indent=2)
+        print(f"Ergebnisse gespeichert in {args.ausgabe}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+# bibliothek_index.py
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from signatur_cache import datei_identitaet, parameter_schluessel
+
+INDEX_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id INTEGER PRIMARY KEY,
+    pfad TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    groesse INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    dtype TEXT NOT NULL,
+    form TEXT NOT NULL,
+    signaturen BLOB NOT NULL,
+    metadaten TEXT NOT NULL,
+    verglichen INTEGER NOT NULL DEFAULT 0,
+    erfasst REAL NOT NULL,
+    UNIQUE (pfad, parameter)
+);
+CREATE TABLE IF NOT EXISTS paare (
+    video1 INTEGER NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+    video2 INTEGER NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+    distanz REAL,
+    keyframe1 INTEGER,
+    keyframe2 INTEGER,
+    PRIMARY KEY (video1, video2)
+);
+CREATE INDEX IF NOT EXISTS paare_video2 ON paare (video2);
+"""
+
+
+def standard_index_datei():
+    """Liefert den Standardpfad des Bibliotheksindex im Benutzerverzeichnis."""
+    return os.path.join(os.path.expanduser("~"), ".easyvideocompare", "bibliothek.sqlite")
+
+
+class BibliothekIndex:
+    """
+    Persistenter Index einer Videobibliothek in SQLite: pro Video Identität (Pfad, Größe, Änderungszeit),
+    Keyframe-Signaturen und Metadaten je Satz Extraktionsparameter, dazu die berechneten Paarergebnisse.
+
+    hole, speichere und flush entsprechen dem SignaturCache, sodass der Index direkt als Cache an
+    extrahiere_alle_signaturen übergeben werden kann. Ändert sich eine Datei, wird ihr Eintrag samt
+    ihrer Paarergebnisse ersetzt. Ein Video gilt erst als verglichen, wenn alle seine Paare eines
+    inkrementellen Scans berechnet sind; nach einem Abbruch wird es beim nächsten Lauf erneut verglichen.
+    """
+
+    def __init__(self, datei=None):
+        self.datei = datei or standard_index_datei()
+        verzeichnis = os.path.dirname(os.path.abspath(self.datei))
+        os.makedirs(verzeichnis, exist_ok=True)
+        self._lock = threading.Lock()
+        # Der Index wird im Scan-Thread erzeugt und genutzt, der Lock schützt trotzdem gegen parallele Aufrufe
+        self._verbindung = sqlite3.connect(self.datei, check_same_thread=False)
+        self._verbindung.execute("PRAGMA foreign_keys = ON")
+        self._verbindung.execute("PRAGMA journal_mode = WAL")
+        version = self._verbindung.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, INDEX_VERSION):
+            raise sqlite3.DatabaseError(f"Bibliotheksindex {self.datei} hat die unbekannte Version {version}")
+        self._verbindung.executescript(SCHEMA)
+        self._verbindung.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self._verbindung.commit()
+
+    def schliesse(self):
+        with self._lock:
+            self._verbindung.commit()
+            self._verbindung.close()
+
+    def _eintrag(self, video_pfad, param_schluessel, spalten="id"):
+        """Liefert die Zeile eines Videos, sofern Größe und Änderungszeit noch zur Datei passen."""
+        identitaet = datei_identitaet(video_pfad)
+        if identitaet is None:
+            return None
+        return self._verbindung.execute(
+            f"SELECT {spalten} FROM videos WHERE pfad = ? AND parameter = ? AND groesse = ? AND mtime_ns = ?",
+            (identitaet[0], param_schluessel, identitaet[1], identitaet[2])
+        ).fetchone()
+
+    def hole(self, video_pfad, optionen):
+        """Liefert (histogramme, metadaten) aus dem Index oder None, falls kein gültiger Eintrag existiert."""
+        with self._lock:
+            zeile = self._eintrag(video_pfad, parameter_schluessel(optionen), "dtype, form, signaturen, metadaten")
+        if zeile is None:
+            return None
+        dtype, form, signaturen, metadaten = zeile
+        histogramme = np.frombuffer(signaturen, dtype=np.dtype(dtype)).reshape(json.loads(form))
+        return list(histogramme), json.loads(metadaten)
+
+    def speichere(self, video_pfad, optionen, histogramme, metadaten):
+        """Legt die Signaturen eines Videos ab; ein veralteter Eintrag derselben Datei wird samt seiner Paare ersetzt."""
+        identitaet = datei_identitaet(video_pfad)
+        if identitaet is None:
+            return
+        histogramme = np.asarray(histogramme)
+        if histogramme.dtype not in (np.uint64, np.uint8, np.float16):
+            histogramme = histogramme.astype(np.float32)
+        param_schluessel = parameter_schluessel(optionen)
+        with self._lock:
+            self._verbindung.execute("DELETE FROM videos WHERE pfad = ? AND parameter = ?", (identitaet[0], param_schluessel))
+            self._verbindung.execute(
+                "INSERT INTO videos (pfad, parameter, groesse, mtime_ns, dtype, form, signaturen, metadaten, erfasst) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (identitaet[0], param_schluessel, identitaet[1], identitaet[2], histogramme.dtype.str, json.dumps(histogramme.shape),
+                 histogramme.tobytes(), json.dumps(metadaten or {}), time.time())
+            )
+
+    def flush(self):
+        with self._lock:
+            self._verbindung.commit()
+
+    def verglichene(self, video_pfade, optionen):
+        """Liefert die Pfade aus video_pfade, die unverändert im Index stehen und bereits vollständig verglichen wurden."""
+        param_schluessel = parameter_schluessel(optionen)
+        with self._lock:
+            return {pfad for pfad in video_pfade if (self._eintrag(pfad, param_schluessel, "verglichen") or (0,))[0]}
+
+    def markiere_verglichen(self, video_pfad, optionen):
+        with self._lock:
+            zeile = self._eintrag(video_pfad, parameter_schluessel(optionen))
+            if zeile is not None:
+                self._verbindung.execute("UPDATE videos SET verglichen = 1 WHERE id = ?", zeile)
+                self._verbindung.commit()
+
+    def speichere_ergebnisse(self, ergebnisse, optionen):
+        """Speichert Paarergebnisse ({(pfad1, pfad2): [distanz, (keyframe1, keyframe2)] oder []}) zu den Videos im Index."""
+        param_schluessel = parameter_schluessel(optionen)
+        with self._lock:
+            ids = {}
+            zeilen = []
+            for (pfad1, pfad2), ergebnis in ergebnisse.items():
+                for pfad in (pfad1, pfad2):
+                    if pfad not in ids:
+                        zeile = self._eintrag(pfad, param_schluessel)
+                        ids[pfad] = zeile[0] if zeile else None
+                if ids[pfad1] is None or ids[pfad2] is None:
+                    continue
+                keyframes = ergebnis[1] if len(ergebnis) > 1 and ergebnis[1] is not None else (None, None)
+                zeilen.append((ids[pfad1], ids[pfad2], float(ergebnis[0]) if ergebnis else None, *keyframes))
+            self._verbindung.executemany("INSERT OR REPLACE INTO paare (video1, video2, distanz, keyframe1, keyframe2) VALUES (?, ?, ?, ?, ?)", zeilen)
+            self._verbindung.commit()
+
+    def ergebnisse(self, video_pfade, optionen, schwelle=None):
+        """Liefert die gespeicherten Paarergebnisse zwischen den (unveränderten) Videos aus video_pfade, optional nur bis schwelle."""
+        param_schluessel = parameter_schluessel(optionen)
+        with self._lock:
+            pfad_von = {}
+            for pfad in video_pfade:
+                zeile = self._eintrag(pfad, param_schluessel)
+                if zeile is not None:
+                    pfad_von[zeile[0]] = pfad
+            ergebnisse = {}
+            for video1, video2, distanz, keyframe1, keyframe2 in self._verbindung.execute(
+                    "SELECT p.video1, p.video2, p.distanz, p.keyframe1, p.keyframe2 FROM paare p JOIN videos v ON v.id = p.video1 WHERE v.parameter = ?"
+                    + (" AND p.distanz <= ?" if schwelle is not None else ""),
+                    (param_schluessel, schwelle) if schwelle is not None else (param_schluessel,)):
+                if video1 in pfad_von and video2 in pfad_von:
+                    ergebnisse[(pfad_von[video1], pfad_von[video2])] = [] if distanz is None else [distanz, (keyframe1, keyframe2)]
+            return ergebnisse
+
+    def entferne_fehlende(self):
+        """Entfernt Videos, deren Datei nicht mehr existiert, samt ihrer Paarergebnisse; liefert die Anzahl."""
+        with self._lock:
+            fehlende = [(video_id,) for video_id, pfad in self._verbindung.execute("SELECT id, pfad FROM videos") if not os.path.exists(pfad)]
+            self._verbindung.executemany("DELETE FROM videos WHERE id = ?", fehlende)
+            self._verbindung.commit()
+        return len(fehlende)
+
+    def anzahl_videos(self, optionen):
+        with self._lock:
+            return self._verbindung.execute("SELECT COUNT(*) FROM videos WHERE parameter = ?", (parameter_schluessel(optionen),)).fetchone()[0]
@@ -0,0 +1,395 @@
+# cli.py
+"""
+Kommandozeilen-Modus für Duplikat-Scans ohne grafische Oberfläche (z.B. auf Servern oder per cron).
+
+Exit-Codes:
+    0  Scan erfolgreich, keine ähnlichen Paare unterhalb der Schwelle
+    1  Scan erfolgreich, ähnliche Paare gefunden
+    2  Fehler (ungültige Argumente, keine Videos gefunden, Ausgabe nicht schreibbar)
+    130  Abbruch durch den Benutzer (Strg+C)
+"""
+from version import __version__
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import sqlite3
+import sys
+
+from bibliothek_index import BibliothekIndex, standard_index_datei
+from duplikat_gruppen import bilde_gruppen, naechste_distanzen
+from ergebnis_menge import ErgebnisMenge, nachfilter_schwelle, vollstaendigkeits_schwelle
+from instrumentierung import Messung
+from ordner_durchlauf import STANDARD_ENDUNGEN, sammle_video_dateien
+from scan_checkpoint import standard_checkpoint_verzeichnis
+from signatur_cache import SignaturCache
+from signatur_speicher import SignaturSpeicher, standard_speicher_verzeichnis
+from video_vergleich import SIGNATUR_TYPEN, STANDARD_SCHWELLEN, vergleiche_inkrementell, vergleiche_videos, vergleiche_videos_fortlaufend
+
+EXIT_KEINE_TREFFER = 0
+EXIT_TREFFER = 1
+EXIT_FEHLER = 2
+EXIT_ABBRUCH = 130
+
+
+def positive_ganzzahl(wert):
+    """argparse-Typ für Ganzzahlen > 0; ungültige Werte beenden das Programm mit Exit-Code 2."""
+    try:
+        zahl = int(wert)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"keine Ganzzahl: {wert}")
+    if zahl <= 0:
+        raise argparse.ArgumentTypeError(f"muss größer als 0 sein: {wert}")
+    return zahl
+
+
+def positive_zahl(wert):
+    """argparse-Typ für endliche Zahlen > 0."""
+    zahl = _endliche_zahl(wert)
+    if zahl <= 0:
+        raise argparse.ArgumentTypeError(f"muss größer als 0 sein: {wert}")
+    return zahl
+
+
+def nicht_negative_zahl(wert):
+    """argparse-Typ für endliche Zahlen >= 0 (Schwellen und Radien)."""
+    zahl = _endliche_zahl(wert)
+    if zahl < 0:
+        raise argparse.ArgumentTypeError(f"darf nicht negativ sein: {wert}")
+    return zahl
+
+
+def _endliche_zahl(wert):
+    try:
+        zahl = float(wert)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"keine Zahl: {wert}")
+    if not math.isfinite(zahl):
+        raise argparse.ArgumentTypeError(f"keine endliche Zahl: {wert}")
+    return zahl
+
+
+def ergebnis_zeilen(ergebnisse, schwelle, alle_paare=False):
+    """Wandelt die Vergleichsergebnisse in eine nach Distanz sortierte Liste von Dicts um."""
+    zeilen = [{'video1': pfad1, 'video2': pfad2, 'distanz': float(aehnlichkeit[0])}
+              for (pfad1, pfad2), aehnlichkeit in ergebnisse.items()
+              if aehnlichkeit and (alle_paare or aehnlichkeit[0] <= schwelle)]
+    zeilen.sort(key=lambda zeile: zeile['distanz'])
+    return zeilen
+
+
+def gruppen_zeilen(ergebnisse, gruppen):
+    """Wandelt die Duplikatgruppen in Dicts mit den Mitgliedern und ihrer kleinsten Distanz innerhalb der Gruppe um."""
+    zeilen = []
+    for nummer, gruppe in enumerate(gruppen, start=1):
+        distanzen = naechste_distanzen(gruppe, ergebnisse)
+        zeilen.append({
+            'gruppe': nummer,
+            'videos': [{'video': pfad, 'distanz': None if distanzen[pfad] is None else float(distanzen[pfad])} for pfad in gruppe],
+        })
+    return zeilen
+
+
+def schreibe_json(zeilen, datei, args, anzahl_videos, gruppen=None):
+    daten = {
+        'version': __version__,
+        'schwelle': args.schwelle,
+        'anzahl_videos': anzahl_videos,
+        'paare': zeilen,
+    }
+    if gruppen is not None:
+        daten['gruppen'] = gruppen
+    json.dump(daten, datei, indent=2, ensure_ascii=False)
+    datei.write("\n")
+
+
+def schreibe_csv(zeilen, datei):
+    writer = csv.DictWriter(datei, fieldnames=['video1', 'video2', 'distanz'])
+    writer.writeheader()
+    writer.writerows(zeilen)
+
+
+def schreibe_gruppen_csv(gruppen, datei):
+    writer = csv.DictWriter(datei, fieldnames=['gruppe', 'video', 'distanz'])
+    writer.writeheader()
+    for gruppe in gruppen:
+        writer.writerows({'gruppe': gruppe['gruppe'], **video} for video in gruppe['videos'])
+
+
+def erzeuge_parser():
+    parser = argparse.ArgumentParser(
+        description="Sucht ähnliche Videos ohne grafische Oberfläche und schreibt die Paare als JSON oder CSV.",
+        epilog="Exit-Codes: 0 = keine ähnlichen Paare, 1 = ähnliche Paare gefunden, 2 = Fehler, 130 = Abbruch."
+    )
+    parser.add_argument("pfade", nargs="*", help="Videodateien und/oder Ordner")
+    parser.add_argument("-r", "--rekursiv", action="store_true", help="Ordner rekursiv durchsuchen")
+    parser.add_argument("--endungen", default=",".join(STANDARD_ENDUNGEN), help="Kommagetrennte Dateiendungen (Standard: %(default)s)")
+    parser.add_argument("-s", "--schwelle", type=nicht_negative_zahl,
+                        help="Ähnlichkeitsschwelle (Standard: " + ", ".join(f"{schwelle} für {typ}" for typ, schwelle in STANDARD_SCHWELLEN.items()) + ")")
+    parser.add_argument("--alle-paare", action="store_true", help="Alle verglichenen Paare ausgeben, nicht nur die unterhalb der Schwelle (impliziert --exakt)")
+    parser.add_argument("--exakt", action="store_true",
+                        help="Alle Paare vollständig berechnen, statt Vergleiche abzubrechen, sobald die Distanz sicher über der Schwelle liegt")
+    parser.add_argument("--gruppen", action="store_true",
+                        help="Ähnliche Videos zu Duplikatgruppen zusammenfassen und Gruppenmitglieder nur mit dem Gruppenvertreter vergleichen "
+                             "(JSON: zusätzlicher Schlüssel 'gruppen', CSV: eine Zeile pro Gruppenmitglied)")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], default="json", help="Ausgabeformat (Standard: %(default)s)")
+    parser.add_argument("-o", "--ausgabe", help="Ausgabedatei (Standard: stdout)")
+    parser.add_argument("-q", "--leise", action="store_true", help="Keine Statusmeldungen auf stderr")
+
+    extraktion = parser.add_argument_group("Extraktion")
+    extraktion.add_argument("--schwellwert", type=nicht_negative_zahl, help="Schwellwert für den Szenenwechsel (Standard: 20)")
+    extraktion.add_argument("--bins", type=positive_ganzzahl, nargs=3, metavar=("B", "G", "R"), help="Histogramm-Bins pro Kanal (Standard: 8 8 8)")
+    extraktion.add_argument("--modus", choices=["alle", "jeder_n", "intervall"], help="Abtastmodus (Standard: alle)")
+    extraktion.add_argument("--schritt", type=positive_ganzzahl, help="Nur jeden N-ten Frame analysieren (Modus jeder_n)")
+    extraktion.add_argument("--intervall", type=positive_zahl, dest="intervall_sekunden", help="Abtastintervall in Sekunden (Modus intervall)")
+    extraktion.add_argument("--signatur", choices=list(SIGNATUR_TYPEN), dest="signatur_typ",
+                            help="Keyframe-Signatur: Farbhistogramm oder 64-Bit-dHash (schneller, kleinere Distanzen und daher eigene Standard-Schwelle; "
+                                 "Standard: histogramm)")
+    extraktion.add_argument("--max-keyframes", type=positive_ganzzahl, metavar="K", help="Jedes Video auf höchstens K möglichst verschiedene Keyframes reduzieren")
+    extraktion.add_argument("--quantisierung", choices=["float16", "uint8"], help="Histogramme kompakt speichern (Standard: float32)")
+    extraktion.add_argument("--analyse-groesse", type=positive_ganzzahl, nargs=2, metavar=("BREITE", "HOEHE"), help="Frames vor der Analyse verkleinern")
+
+    ablauf = parser.add_argument_group("Ablauf")
+    ablauf.add_argument("-j", "--prozesse", type=positive_ganzzahl, default=os.cpu_count() or 1, help="Anzahl paralleler Prozesse (Standard: %(default)s)")
+    ablauf.add_argument("--pipeline", action="store_true", help="Frames in einem eigenen Thread vorauslesen, während analysiert wird")
+    ablauf.add_argument("--opencv-threads", type=positive_ganzzahl, metavar="N",
+                        help="Threads für OpenCV und den Video-Decoder (Standard: 1 pro Prozess bei -j > 1, sonst OpenCV-Standard)")
+    ablauf.add_argument("--abschnitt-sekunden", type=positive_zahl, metavar="S",
+                        help="Videos ab 2*S Sekunden Länge in Abschnitte zu S Sekunden teilen und parallel analysieren (nur mit -j > 1)")
+    ablauf.add_argument("--fortlaufend", action="store_true",
+                        help="Jedes fertige Video sofort vergleichen und Treffer schon während des Scans auf stderr melden "
+                             "(ohne Vorfilter, Checkpoint und Signatur-Speicher)")
+    ablauf.add_argument("--vorfilter-top-k", type=positive_ganzzahl, help="Nur die k nächsten Nachbarn jedes Videos vergleichen")
+    ablauf.add_argument("--vorfilter-radius", type=nicht_negative_zahl, help="Nur Paare innerhalb dieser Deskriptor-Distanz vergleichen")
+    ablauf.add_argument("--cache-verzeichnis", help="Verzeichnis des Signatur-Caches")
+    ablauf.add_argument("--kein-cache", action="store_true", help="Signatur-Cache nicht verwenden")
+    ablauf.add_argument("--signatur-speicher", nargs="?", const=standard_speicher_verzeichnis(), metavar="VERZEICHNIS",
+                        help="Signaturen spaltenweise per memmap speichern und lesen (für sehr große Bibliotheken)")
+    ablauf.add_argument("--checkpoint", nargs="?", const=standard_checkpoint_verzeichnis(), metavar="VERZEICHNIS",
+                        help="Fertige Paare laufend sichern; ein erneuter Aufruf desselben Scans setzt dort fort")
+    ablauf.add_argument("--ohne-identische", action="store_true",
+                        help="Byte-identische Dateien nicht vorab per Hash erkennen, sondern wie alle anderen analysieren")
+    ablauf.add_argument("--index", nargs="?", const=standard_index_datei(), metavar="DATEI",
+                        help="Inkrementeller Scan über einen SQLite-Bibliotheksindex: nur neue oder geänderte Videos analysieren "
+                             "und nur gegen den Bestand und untereinander vergleichen (Vorfilter, Checkpoint und Gruppenvergleich entfallen). "
+                             "Ausgabe und Exit-Code umfassen nur die Paare mit mindestens einem neuen Video")
+    ablauf.add_argument("--index-speicher-schwelle", type=nicht_negative_zahl, default=0.5,
+                        help="Nur Paare bis zu dieser Distanz im Index ablegen (Standard: %(default)s)")
+    ablauf.add_argument("--bericht", metavar="DATEI", help="Stufenzeiten pro Video und Paar messen und als JSON-Bericht schreiben")
+    ablauf.add_argument("--ergebnisse-speichern", metavar="DATEI", help="Alle Paarergebnisse sortiert als JSON sichern (für --ergebnisse-laden)")
+    ablauf.add_argument("--ergebnisse-laden", metavar="DATEI",
+                        help="Gesicherte Ergebnisse mit der aktuellen --schwelle ausgeben, ohne Videos zu analysieren")
+    return parser
+
+
+def scanne(args, video_pfade, status, abbruch_schwelle):
+    """
+    Führt den Vergleich nach den Kommandozeilenoptionen aus; liefert (ergebnisse, keyframe_metadaten, None) oder
+    (None, None, Exit-Code). Keyframe-Metadaten werden nur für --ergebnisse-speichern erfasst, sonst None.
+    """
+    cache = None
+    if not args.kein_cache:
+        try:
+            cache = SignaturCache(args.cache_verzeichnis)
+        except OSError as e:
+            print(f"Warnung: Signatur-Cache nicht verfügbar: {e}", file=sys.stderr)
+
+    extraktions_optionen = {
+        'schwellwert': args.schwellwert,
+        'bins': args.bins,
+        'modus': args.modus,
+        'schritt': args.schritt,
+        'intervall_sekunden': args.intervall_sekunden,
+        'analyse_groesse': args.analyse_groesse,
+        'signatur_typ': args.signatur_typ,
+        'max_keyframes': args.max_keyframes,
+        'quantisierung': args.quantisierung,
+    }
+    messung = Messung() if args.bericht else None
+    signatur_speicher = None
+    if args.signatur_speicher:
+        try:
+            signatur_speicher = SignaturSpeicher(args.signatur_speicher)
+        except OSError as e:
+            print(f"Warnung: Signatur-Speicher nicht verfügbar: {e}", file=sys.stderr)
+    index = None
+    if args.index:
+        try:
+            index = BibliothekIndex(args.index)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Fehler: Bibliotheksindex konnte nicht geöffnet werden: {e}", file=sys.stderr)
+            return None, None, EXIT_FEHLER
+    # Die gespeicherten besten Keyframe-Paare sind Indizes in die Keyframe-Liste; ohne sie zeigt der Dialog falsche Frames
+    mit_metadaten = bool(args.ergebnisse_speichern)
+    try:
+        if index:
+            ergebnisse = vergleiche_inkrementell(
+                video_pfade,
+                index,
+                status_callback=status,
+                extraktions_optionen=extraktions_optionen,
+                mit_metadaten=mit_metadaten,
+                anzahl_prozesse=args.prozesse,
+                messung=messung,
+                pipeline=args.pipeline,
+                opencv_threads=args.opencv_threads,
+                speicher_schwelle=args.index_speicher_schwelle,
+                abschnitt_sekunden=args.abschnitt_sekunden,
+                abbruch_schwelle=abbruch_schwelle
+            )
+        elif args.fortlaufend:
+            ergebnisse = vergleiche_videos_fortlaufend(
+                video_pfade,
+                args.schwelle,
+                treffer_callback=lambda paar, ergebnis, _: status(f"Treffer: {paar[0]} <-> {paar[1]} ({ergebnis[0]:.4f})"),
+                status_callback=status,
+                extraktions_optionen=extraktions_optionen,
+                mit_metadaten=mit_metadaten,
+                cache=cache,
+                anzahl_prozesse=args.prozesse,
+                messung=messung,
+                identische_zusammenfassen=not args.ohne_identische,
+                pipeline=args.pipeline,
+                opencv_threads=args.opencv_threads,
+                abschnitt_sekunden=args.abschnitt_sekunden,
+                exakt=abbruch_schwelle is None,
+                abbruch_schwelle=abbruch_schwelle
+            )
+        else:
+            ergebnisse = vergleiche_videos(
+                video_pfade,
+                status_callback=status,
+                extraktions_optionen=extraktions_optionen,
+                mit_metadaten=mit_metadaten,
+                cache=cache,
+                anzahl_prozesse=args.prozesse,
+                vorfilter_top_k=args.vorfilter_top_k,
+                vorfilter_radius=args.vorfilter_radius,
+                checkpoint_verzeichnis=args.checkpoint,
+                messung=messung,
+                identische_zusammenfassen=not args.ohne_identische,
+                pipeline=args.pipeline,
+                opencv_threads=args.opencv_threads,
+                gruppen_schwelle=args.schwelle if args.gruppen else None,
+                signatur_speicher=signatur_speicher,
+                abschnitt_sekunden=args.abschnitt_sekunden,
+                abbruch_schwelle=abbruch_schwelle
+            )
+    except KeyboardInterrupt:
+        print("Abgebrochen.", file=sys.stderr)
+        return None, None, EXIT_ABBRUCH
+    finally:
+        if index:
+            index.schliesse()
+
+    if messung:
+        for zeile in messung.zusammenfassung():
+            status(zeile)
+        try:
+            messung.speichere_bericht(args.bericht)
+        except OSError as e:
+            print(f"Fehler: Bericht konnte nicht geschrieben werden: {e}", file=sys.stderr)
+            return None, None, EXIT_FEHLER
+    if mit_metadaten:
+        return *ergebnisse, None
+    return ergebnisse, None, None
+
+
+def main(argv=None):
+    parser = erzeuge_parser()
+    args = parser.parse_args(argv)
+    if not args.pfade and not args.ergebnisse_laden:
+        parser.error("Videodateien oder Ordner angeben (oder --ergebnisse-laden)")
+
+    def status(meldung):
+        if not args.leise:
+            print(meldung, file=sys.stderr)
+
+    if args.ergebnisse_laden:
+        try:
+            ergebnis_menge = ErgebnisMenge.lade(args.ergebnisse_laden)
+        except (OSError, ValueError) as e:
+            print(f"Fehler: Ergebnisse konnten nicht geladen werden: {e}", file=sys.stderr)
+            return EXIT_FEHLER
+        # Die Standard-Schwelle richtet sich nach der Signatur, mit der die Datei erstellt wurde
+        if args.signatur_typ and args.signatur_typ != ergebnis_menge.signatur_typ:
+            print(f"Fehler: Die Ergebnisse wurden mit der Signatur '{ergebnis_menge.signatur_typ}' berechnet, nicht mit '{args.signatur_typ}'.",
+                  file=sys.stderr)
+            return EXIT_FEHLER
+        args.signatur_typ = ergebnis_menge.signatur_typ
+    if args.schwelle is None:
+        args.schwelle = STANDARD_SCHWELLEN[args.signatur_typ or 'histogramm']
+    # Paare, die sicher über der Schwelle liegen, werden nicht ausgegeben und müssen daher nicht exakt berechnet werden;
+    # gespeicherte Ergebnisse bleiben darüber hinaus exakt, damit sie sich später mit höherer Schwelle umfiltern lassen
+    if args.exakt or args.alle_paare:
+        abbruch_schwelle = None
+    elif args.ergebnisse_speichern:
+        abbruch_schwelle = nachfilter_schwelle(args.schwelle)
+    else:
+        abbruch_schwelle = args.schwelle
+    if args.ergebnisse_laden:
+        video_pfade = ergebnis_menge.video_pfade
+        ergebnisse = ergebnis_menge.als_ergebnisse()
+        status(f"{len(ergebnis_menge)} Paare aus {len(video_pfade)} Videos geladen.")
+        if not ergebnis_menge.ist_vollstaendig_bis(args.schwelle):
+            print(f"Warnung: Der Scan hat Paare über {ergebnis_menge.vollstaendig_bis} nicht alle berechnet; die Ausgabe ist oberhalb davon unvollständig.",
+                  file=sys.stderr)
+    else:
+        endungen = [endung if endung.startswith(".") else "." + endung for endung in args.endungen.split(",") if endung]
+        # Unerwartete Fehler dürfen nicht mit Exit-Code 1 ("Treffer gefunden") enden
+        try:
+            video_pfade = sammle_video_dateien(args.pfade, args.rekursiv, endungen)
+            if not video_pfade:
+                print("Fehler: Keine Videodateien gefunden.", file=sys.stderr)
+                return EXIT_FEHLER
+            status(f"{len(video_pfade)} Videos gefunden.")
+            ergebnisse, keyframe_metadaten, exit_code = scanne(args, video_pfade, status, abbruch_schwelle)
+        except Exception as e:
+            print(f"Fehler: Scan fehlgeschlagen: {type(e).__name__}: {e}", file=sys.stderr)
+            return EXIT_FEHLER
+        if ergebnisse is None:
+            return exit_code
+        if args.ergebnisse_speichern:
+            try:
+                # Gruppenmitglieder werden nur im normalen Scan ausgelassen
+                gruppen_schwelle = args.schwelle if args.gruppen and not args.index and not args.fortlaufend else None
+                ErgebnisMenge(ergebnisse, keyframe_metadaten, video_pfade, vollstaendigkeits_schwelle(abbruch_schwelle, gruppen_schwelle),
+                              args.signatur_typ or 'histogramm').speichere(args.ergebnisse_speichern)
+            except OSError as e:
+                print(f"Fehler: Ergebnisse konnten nicht gespeichert werden: {e}", file=sys.stderr)
+                return EXIT_FEHLER
+
+    zeilen = ergebnis_zeilen(ergebnisse, args.schwelle, args.alle_paare)
+    gruppen = gruppen_zeilen(ergebnisse, bilde_gruppen(ergebnisse, args.schwelle, video_pfade)) if args.gruppen else None
+    if gruppen is not None:
+        status(f"{len(gruppen)} Duplikatgruppen mit zusammen {sum(len(gruppe['videos']) for gruppe in gruppen)} Videos gefunden.")
+
+    def schreibe(datei):
+        if args.format == "csv" and gruppen is not None:
+            schreibe_gruppen_csv(gruppen, datei)
+        elif args.format == "csv":
+            schreibe_csv(zeilen, datei)
+        else:
+            schreibe_json(zeilen, datei, args, len(video_pfade), gruppen)
+
+    try:
+        if args.ausgabe:
+            with open(args.ausgabe, "w", encoding="utf-8", newline="") as datei:
+                schreibe(datei)
+        else:
+            schreibe(sys.stdout)
+    except OSError as e:
+        print(f"Fehler: Ausgabe konnte nicht geschrieben werden: {e}", file=sys.stderr)
+        return EXIT_FEHLER
+
+    aehnliche = sum(1 for zeile in zeilen if zeile['distanz'] <= args.schwelle)
+    status(f"{aehnliche} ähnliche Paare gefunden.")
+    return EXIT_TREFFER if aehnliche else EXIT_KEINE_TREFFER
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,228 @@
+# distanz_engine.py
+import numpy as np
+
+# OpenCV normiert Histogramme mit Summe <= FLT_EPSILON nicht; das Verhalten wird hier nachgebildet.
+_FLT_EPSILON = np.finfo(np.float32).eps
+
+HASH_BITS = 64
+
+# Grobe Histogramme für untere Schranken: so viele Bins pro Farbkanal (8x8x8 -> 4x4x4)
+GROB_BINS_PRO_KANAL = 4
+
+# Zeilen pro Block beim schrittweisen Vergleich mit Abbruchschwelle
+ABBRUCH_BLOCK_ZEILEN = 16
+
+# Toleranz gegen Rundungsfehler, damit ein Paar genau an der Schwelle nicht fälschlich verworfen wird
+_ABBRUCH_TOLERANZ = 1e-9
+
+# Anzahl gesetzter Bits pro Byte, für NumPy-Versionen ohne np.bitwise_count
+_BITS_PRO_BYTE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+def histogramm_matrix(histogramme):
+    """
+    Stapelt die Keyframe-Histogramme eines Videos zu einer Matrix normierter Wurzel-Histogramme.
+    Jede Zeile entspricht einem Keyframe; das Skalarprodukt zweier Zeilen ist der Bhattacharyya-Koeffizient.
+    """
+    if len(histogramme) == 0:
+        return np.empty((0, 0), dtype=np.float64)
+    matrix = np.asarray(histogramme, dtype=np.float64).reshape(len(histogramme), -1)
+    summen = matrix.sum(axis=1, keepdims=True)
+    summen[summen <= _FLT_EPSILON] = 1.0
+    return np.sqrt(matrix / summen)
+
+
+def hash_matrix(hashes):
+    """Fasst die 64-Bit-Hashes (dHash) der Keyframes eines Videos zu einem uint64-Array zusammen."""
+    return np.asarray(hashes, dtype=np.uint64).reshape(-1)
+
+
+def signatur_matrix(signaturen, signatur_typ='histogramm'):
+    """Bereitet die Keyframe-Signaturen eines Videos passend zum Signaturtyp für vergleiche_matrizen auf."""
+    if signatur_typ == 'dhash':
+        return hash_matrix(signaturen)
+    return histogramm_matrix(signaturen)
+
+
+def hash_bits(hashes):
+    """Entpackt ein uint64-Hash-Array in eine (Anzahl, 64)-Matrix aus Nullen und Einsen."""
+    return np.unpackbits(hashes.astype(">u8").view(np.uint8).reshape(len(hashes), 8), axis=1)
+
+
+def _popcount(werte):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(werte)
+    return _BITS_PRO_BYTE[werte.view(np.uint8)].reshape(*werte.shape, 8).sum(axis=-1)
+
+
+def hamming_distanzmatrix(hashes1, hashes2):
+    """
+    Berechnet alle Hamming-Distanzen zwischen den Keyframe-Hashes zweier Videos per XOR und Popcount,
+    geteilt durch 64, sodass die Werte wie die Bhattacharyya-Distanz zwischen 0 und 1 liegen.
+    """
+    return _popcount(hashes1[:, None] ^ hashes2[None, :]) / HASH_BITS
+
+
+def quantisiere_histogramm(histogramm, quantisierung=None):
+    """
+    Legt ein Histogramm kompakt ab: 'float16' normiert auf Summe 1 (1 KB statt 2 KB bei 512 Bins),
+    'uint8' skaliert das größte Bin auf 255 (512 Byte). Da histogramm_matrix jede Zeile ohnehin normiert,
+    ändert die Skalierung nichts an den Distanzen, nur die Rundung wirkt sich aus. None lässt float32 unverändert.
+    """
+    if quantisierung == 'float16':
+        summe = float(histogramm.sum())
+        return (histogramm / summe if summe > _FLT_EPSILON else histogramm).astype(np.float16)
+    if quantisierung == 'uint8':
+        maximum = float(histogramm.max()) if histogramm.size else 0.0
+        return np.rint(histogramm * (255.0 / maximum) if maximum > 0 else histogramm).astype(np.uint8)
+    return histogramm
+
+
+def diverse_auswahl(matrix, max_anzahl):
+    """
+    Wählt per Farthest-Point-Sampling bis zu max_anzahl möglichst verschiedene Zeilen einer Signatur-Matrix
+    (siehe signatur_matrix) aus: beginnend mit dem ersten Keyframe jeweils den, der von allen bisher gewählten
+    am weitesten entfernt ist. Liefert die gewählten Indizes aufsteigend sortiert.
+    """
+    if len(matrix) <= max_anzahl:
+        return np.arange(len(matrix))
+
+    def abstaende(index):
+        if matrix.dtype == np.uint64:
+            return _popcount(matrix ^ matrix[index]).astype(np.float64)
+        # 1 - Bhattacharyya-Koeffizient ist monoton in der Bhattacharyya-Distanz
+        return 1.0 - matrix @ matrix[index]
+
+    auswahl = [0]
+    min_abstaende = abstaende(0)
+    for _ in range(max_anzahl - 1):
+        index = int(np.argmax(min_abstaende))
+        if min_abstaende[index] <= 0:
+            break
+        auswahl.append(index)
+        min_abstaende = np.minimum(min_abstaende, abstaende(index))
+    return np.sort(auswahl)
+
+
+def als_float64_matrix(matrix):
+    """
+    Rechnet eine als float32 gespeicherte Histogramm-Matrix (z.B. eine memmap-Sicht aus dem SignaturSpeicher)
+    in float64 um und normiert die Zeilen nach, damit die Rundung auf float32 identische Keyframes nicht
+    von der Distanz 0 wegrückt. float64-Matrizen aus histogramm_matrix bleiben unverändert.
+    """
+    if matrix.dtype == np.float64:
+        return matrix
+    matrix = np.asarray(matrix, dtype=np.float64)
+    normen = np.linalg.norm(matrix, axis=1, keepdims=True)
+    normen[normen == 0] = 1.0
+    return matrix / normen
+
+
+def distanzmatrix(matrix1, matrix2):
+    """
+    Berechnet alle Bhattacharyya-Distanzen zwischen den Keyframes zweier Videos in einem Schritt.
+    Entspricht cv2.compareHist(..., cv2.HISTCMP_BHATTACHARYYA) für jedes Keyframe-Paar.
+    """
+    koeffizienten = matrix1 @ matrix2.T
+    return np.sqrt(np.clip(1.0 - koeffizienten, 0.0, None))
+
+
+def grobe_matrix(matrix):
+    """
+    Verdichtet eine Histogramm-Matrix zu groben Histogrammen für untere Schranken der Distanz (siehe grobe_distanzmatrix):
+    GROB_BINS_PRO_KANAL Bins pro Kanal, bei anderer Bin-Anzahl zusammenhängende Gruppen von Bins.
+    Hashes liefern None, ihr exakter Vergleich per XOR und Popcount kostet nicht mehr als eine Schranke.
+    """
+    if matrix.dtype == np.uint64:
+        return None
+    if len(matrix) == 0:
+        return np.empty((0, GROB_BINS_PRO_KANAL ** 3), dtype=np.float64)
+    matrix = als_float64_matrix(matrix)
+    anzahl, laenge = matrix.shape
+    wahrscheinlichkeiten = matrix * matrix
+    bins = round(laenge ** (1 / 3))
+    if bins ** 3 == laenge and bins % GROB_BINS_PRO_KANAL == 0:
+        grob = GROB_BINS_PRO_KANAL
+        gruppiert = wahrscheinlichkeiten.reshape(anzahl, grob, bins // grob, grob, bins // grob, grob, bins // grob).sum(axis=(2, 4, 6))
+    else:
+        gruppen = GROB_BINS_PRO_KANAL ** 3
+        aufgefuellt = np.zeros((anzahl, -(-laenge // gruppen) * gruppen))
+        aufgefuellt[:, :laenge] = wahrscheinlichkeiten
+        gruppiert = aufgefuellt.reshape(anzahl, gruppen, -1).sum(axis=2)
+    return np.sqrt(gruppiert.reshape(anzahl, -1))
+
+
+def grobe_distanzmatrix(grob1, grob2):
+    """
+    Untere Schranken aller Bhattacharyya-Distanzen aus den groben Histogrammen zweier Videos (siehe grobe_matrix):
+    Der Bhattacharyya-Koeffizient sinkt beim Zusammenfassen von Bins nicht (Cauchy-Schwarz), die Distanz steigt also nicht.
+    """
+    return distanzmatrix(grob1, grob2)
+
+
+def _distanzen_mit_abbruch(matrix1, matrix2, abbruch_schwelle, grob1, grob2):
+    """
+    Berechnet die Distanzmatrix blockweise und liefert None, sobald eine untere Schranke des Mittelwerts
+    abbruch_schwelle überschreitet. Die Schranke setzt sich aus den exakten Zeilenminima der fertigen Blöcke
+    und den groben Schranken für alle übrigen Zeilen und Spalten zusammen und wächst mit jedem Block.
+    """
+    grenze = abbruch_schwelle * (len(matrix1) + len(matrix2)) + _ABBRUCH_TOLERANZ
+    grob = grobe_distanzmatrix(grob1, grob2)
+    grobe_zeilen_minima = grob.min(axis=1)
+    starts = range(0, len(matrix1), ABBRUCH_BLOCK_ZEILEN)
+    # Grobe Spaltenminima über alle Zeilen ab dem jeweiligen Block
+    grobe_spalten_minima = np.minimum.accumulate([grob[start:start + ABBRUCH_BLOCK_ZEILEN].min(axis=0) for start in reversed(starts)])[::-1]
+    if grobe_zeilen_minima.sum() + grobe_spalten_minima[0].sum() > grenze:
+        return None
+
+    bloecke = []
+    zeilen_summe = 0.0
+    spalten_minima = np.full(len(matrix2), np.inf)
+    for nummer, start in enumerate(starts):
+        block = distanzmatrix(matrix1[start:start + ABBRUCH_BLOCK_ZEILEN], matrix2)
+        bloecke.append(block)
+        zeilen_summe += block.min(axis=1).sum()
+        spalten_minima = np.minimum(spalten_minima, block.min(axis=0))
+        ende = start + ABBRUCH_BLOCK_ZEILEN
+        if ende >= len(matrix1):
+            break
+        schranke = zeilen_summe + grobe_zeilen_minima[ende:].sum() + np.minimum(spalten_minima, grobe_spalten_minima[nummer + 1]).sum()
+        if schranke > grenze:
+            return None
+    return np.vstack(bloecke)
+
+
+def vergleiche_matrizen(matrix1, matrix2, mit_bestem_paar=False, abbruch_schwelle=None, grob1=None, grob2=None):
+    """
+    Vergleicht zwei Videos anhand ihrer Signatur-Matrizen (siehe signatur_matrix); Hash-Signaturen (uint64)
+    werden über die Hamming-Distanz verglichen, Histogramme über die Bhattacharyya-Distanz.
+    Liefert die mittlere Distanz aus den minimalen Distanzen in beide Richtungen (1→2 und 2→1)
+    oder None, wenn eines der Videos keine Keyframes hat.
+    Mit mit_bestem_paar=True wird (mittelwert, (index1, index2)) mit den Positionen des
+    ähnlichsten Keyframe-Paares zurückgegeben.
+
+    Mit abbruch_schwelle wird der Vergleich von Histogrammen abgebrochen, sobald über grobe Histogramme (grob1 und
+    grob2, siehe grobe_matrix; sonst werden sie hier berechnet) und Teilsummen feststeht, dass der Mittelwert darüber
+    liegt. Die Distanz ist dann unendlich und das beste Keyframe-Paar None; Paare bis zur Schwelle bleiben exakt.
+    Hashes werden vollständig verglichen, liefern über der Schwelle aber ebenso unendlich.
+    """
+    if len(matrix1) == 0 or len(matrix2) == 0:
+        return None
+    if matrix1.dtype == np.uint64:
+        distanzen = hamming_distanzmatrix(matrix1, matrix2)
+    elif abbruch_schwelle is None:
+        distanzen = distanzmatrix(als_float64_matrix(matrix1), als_float64_matrix(matrix2))
+    else:
+        distanzen = _distanzen_mit_abbruch(als_float64_matrix(matrix1), als_float64_matrix(matrix2), abbruch_schwelle,
+                                           grobe_matrix(matrix1) if grob1 is None else grob1,
+                                           grobe_matrix(matrix2) if grob2 is None else grob2)
+    if distanzen is not None:
+        min_distanzen1_zu_2 = distanzen.min(axis=1)
+        min_distanzen2_zu_1 = distanzen.min(axis=0)
+        mittelwert = float(np.mean(np.concatenate((min_distanzen1_zu_2, min_distanzen2_zu_1))))
+    if distanzen is None or (abbruch_schwelle is not None and mittelwert > abbruch_schwelle):
+        return (np.inf, None) if mit_bestem_paar else np.inf
+    if mit_bestem_paar:
+        index1, index2 = np.unravel_index(np.argmin(distanzen), distanzen.shape)
+        return mittelwert, (int(index1), int(index2))
+    return mittelwert
@@ -0,0 +1,79 @@
+# duplikat_gruppen.py
+
+
+class UnionFind:
+    """Disjunkte Mengen mit Pfadhalbierung und Vereinigung nach Größe; der Wurzelknoten ist der Vertreter der Gruppe."""
+
+    def __init__(self, elemente=()):
+        self.eltern = {}
+        self.groesse = {}
+        for element in elemente:
+            self.fuege_hinzu(element)
+
+    def fuege_hinzu(self, element):
+        if element not in self.eltern:
+            self.eltern[element] = element
+            self.groesse[element] = 1
+
+    def finde(self, element):
+        """Liefert den Vertreter der Gruppe, zu der element gehört."""
+        self.fuege_hinzu(element)
+        while self.eltern[element] != element:
+            self.eltern[element] = self.eltern[self.eltern[element]]
+            element = self.eltern[element]
+        return element
+
+    def vereinige(self, element1, element2):
+        """Vereinigt die Gruppen beider Elemente und liefert den Vertreter der neuen Gruppe."""
+        wurzel1, wurzel2 = self.finde(element1), self.finde(element2)
+        if wurzel1 == wurzel2:
+            return wurzel1
+        if self.groesse[wurzel1] < self.groesse[wurzel2]:
+            wurzel1, wurzel2 = wurzel2, wurzel1
+        self.eltern[wurzel2] = wurzel1
+        self.groesse[wurzel1] += self.groesse[wurzel2]
+        return wurzel1
+
+    def gruppen(self):
+        """Liefert {vertreter: [elemente]} in der Reihenfolge, in der die Elemente hinzugefügt wurden."""
+        gruppen = {}
+        for element in self.eltern:
+            gruppen.setdefault(self.finde(element), []).append(element)
+        return gruppen
+
+
+def bilde_gruppen(vergleichs_ergebnisse, schwelle, video_pfade=None):
+    """
+    Fasst alle Paare mit Distanz <= schwelle per Union-Find zu Duplikatgruppen zusammen.
+    Liefert eine Liste von Gruppen (Listen von Pfaden, mindestens zwei), jede in der Reihenfolge von
+    video_pfade, die Gruppen nach ihrem ersten Video sortiert.
+    """
+    union_find = UnionFind(video_pfade or ())
+    for (pfad1, pfad2), aehnlichkeit in vergleichs_ergebnisse.items():
+        if aehnlichkeit and aehnlichkeit[0] <= schwelle:
+            union_find.vereinige(pfad1, pfad2)
+    position = {pfad: i for i, pfad in enumerate(video_pfade or ())}
+    gruppen = []
+    for mitglieder in union_find.gruppen().values():
+        if len(mitglieder) > 1:
+            gruppen.append(sorted(mitglieder, key=lambda pfad: position.get(pfad, len(position))))
+    gruppen.sort(key=lambda gruppe: position.get(gruppe[0], len(position)))
+    return gruppen
+
+
+def gruppen_paare(gruppe, vergleichs_ergebnisse):
+    """Liefert die Vergleichsergebnisse, deren beide Videos zur Gruppe gehören."""
+    mitglieder = set(gruppe)
+    return {paar: aehnlichkeit for paar, aehnlichkeit in vergleichs_ergebnisse.items() if paar[0] in mitglieder and paar[1] in mitglieder}
+
+
+def naechste_distanzen(gruppe, vergleichs_ergebnisse):
+    """Liefert für jedes Gruppenmitglied die kleinste gemessene Distanz zu einem anderen Mitglied (oder None)."""
+    distanzen = {pfad: None for pfad in gruppe}
+    for (pfad1, pfad2), aehnlichkeit in gruppen_paare(gruppe, vergleichs_ergebnisse).items():
+        if not aehnlichkeit:
+            continue
+        for pfad in (pfad1, pfad2):
+            if distanzen[pfad] is None or aehnlichkeit[0] < distanzen[pfad]:
+                distanzen[pfad] = aehnlichkeit[0]
+    return distanzen
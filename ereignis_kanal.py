@@ -0,0 +1,83 @@
+# ereignis_kanal.py
+import queue
+import threading
+
+
+class EreignisKanal:
+    """
+    Threadsichere Übergabe von Fortschritt, Statusmeldungen und Aufrufen aus Worker-Threads an die Tk-Oberfläche.
+
+    Worker-Threads rufen nur melde_fortschritt, melde_status und rufe_auf auf; diese blockieren nie und
+    berühren keine Widgets. Der Tk-Hauptthread leert den Kanal per root.after im festen Takt:
+    Fortschrittswerte werden zusammengefasst (nur der neueste zählt), Statusmeldungen gesammelt übergeben.
+    Der Takt läuft nur zwischen starte und dem Ende eines Scans (beende), nicht während die Oberfläche ruht.
+    """
+
+    def __init__(self, root, fortschritt_callback, status_callback, intervall_ms=100, max_meldungen_pro_takt=1000):
+        self.root = root
+        self.fortschritt_callback = fortschritt_callback
+        self.status_callback = status_callback
+        self.intervall_ms = intervall_ms
+        self.max_meldungen_pro_takt = max_meldungen_pro_takt
+        self._fortschritt = None
+        self._fortschritt_lock = threading.Lock()
+        self._meldungen = queue.SimpleQueue()
+        self._aufrufe = queue.SimpleQueue()
+        self._timer = None
+
+    def melde_fortschritt(self, fortschritt):
+        with self._fortschritt_lock:
+            self._fortschritt = fortschritt
+
+    def melde_status(self, meldung):
+        self._meldungen.put(meldung)
+
+    def rufe_auf(self, funktion, *args):
+        """Führt funktion(*args) im Tk-Hauptthread aus, nachdem alle vorher gemeldeten Ereignisse angezeigt wurden."""
+        self._aufrufe.put((funktion, args))
+
+    def starte(self):
+        """Startet den Takt; läuft er bereits, bleibt es bei dem einen geplanten Timer."""
+        if self._timer is None:
+            self._timer = self.root.after(self.intervall_ms, self._verarbeite)
+
+    def beende(self):
+        """
+        Aus dem Worker-Thread nach seiner letzten Meldung: hält den Takt an, sobald alle bis dahin gemeldeten
+        Ereignisse verarbeitet sind. Danach eingereihte Aufrufe werden im selben Takt noch ausgeführt.
+        """
+        self.rufe_auf(self.stoppe)
+
+    def stoppe(self):
+        """Hält den Takt sofort an (nur im Tk-Hauptthread)."""
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+
+    def _verarbeite(self):
+        # Sofort neu einplanen: ein Aufruf kann eine eigene Ereignisschleife öffnen (z.B. wait_window)
+        self._timer = None
+        self.starte()
+
+        with self._fortschritt_lock:
+            fortschritt, self._fortschritt = self._fortschritt, None
+        if fortschritt is not None:
+            self.fortschritt_callback(fortschritt)
+
+        meldungen = []
+        while len(meldungen) < self.max_meldungen_pro_takt:
+            try:
+                meldungen.append(self._meldungen.get_nowait())
+            except queue.Empty:
+                break
+        if meldungen:
+            self.status_callback(meldungen)
+
+        # Aufrufe erst ausführen, wenn keine älteren Meldungen mehr ausstehen
+        if self._meldungen.empty():
+            while True:
+                try:
+                    funktion, args = self._aufrufe.get_nowait()
+                except queue.Empty:
+                    break
+                funktion(*args)
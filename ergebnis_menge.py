@@ -0,0 +1,135 @@
+# ergebnis_menge.py
+import bisect
+import json
+import os
+import time
+
+ERGEBNIS_VERSION = 1
+
+# Gespeicherte Scans enthalten exakte Distanzen bis zum Vielfachen der Scan-Schwelle, damit sich eine zu strenge
+# Schwelle nachträglich ohne neuen Scan anheben lässt
+NACHFILTER_FAKTOR = 2.0
+
+
+def standard_ergebnis_datei():
+    """Liefert den Pfad, unter dem die Oberfläche die Ergebnisse des letzten Scans ablegt."""
+    return os.path.join(os.path.expanduser("~"), ".easyvideocompare", "letzte_ergebnisse.json")
+
+
+def vollstaendigkeits_schwelle(abbruch_schwelle=None, gruppen_schwelle=None):
+    """
+    Distanz, bis zu der ein Scan alle Paare enthält: Über der Abbruchschwelle werden Paare verworfen, über der
+    Gruppenschwelle vergleicht der Gruppenmodus Mitglieder nur noch mit dem Vertreter und lässt Paare aus.
+    """
+    schwellen = [schwelle for schwelle in (abbruch_schwelle, gruppen_schwelle) if schwelle is not None]
+    return min(schwellen) if schwellen else None
+
+
+def nachfilter_schwelle(schwelle):
+    """Distanz, bis zu der ein Scan mit dieser Schwelle exakt rechnen muss, damit sich seine Ergebnisse später umfiltern lassen."""
+    return schwelle * NACHFILTER_FAKTOR
+
+
+class ErgebnisMenge:
+    """
+    Paarergebnisse eines Scans, aufsteigend nach Distanz sortiert, mit dem besten Keyframe-Paar jedes Paares
+    und den Keyframe-Metadaten der Videos.
+
+    anzahl_bis und bis suchen die Grenze zur Schwelle per Binärsuche, sodass eine geänderte Schwelle ohne neuen
+    Vergleich sofort gilt. vollstaendig_bis vermerkt, bis zu welcher Distanz der Scan alle Paare enthält (siehe
+    vollstaendigkeits_schwelle); Paare darüber können fehlen (None = alle Paare exakt). signatur_typ vermerkt, mit
+    welcher Signatur die Distanzen berechnet wurden, da die passende Schwelle davon abhängt. speichere und lade legen
+    die Menge als JSON ab, sodass ein Scan in einer späteren Sitzung ohne erneutes Dekodieren geprüft werden kann.
+    """
+
+    def __init__(self, vergleichs_ergebnisse=None, keyframe_metadaten=None, video_pfade=None, vollstaendig_bis=None, signatur_typ='histogramm'):
+        self.distanzen = []
+        self.paare = []
+        self.ohne_keyframes = []
+        self.keyframe_metadaten = dict(keyframe_metadaten or {})
+        self.video_pfade = list(video_pfade or [])
+        self.vollstaendig_bis = vollstaendig_bis
+        self.signatur_typ = signatur_typ
+        self.erstellt = time.time()
+        eintraege = []
+        for paar, ergebnis in (vergleichs_ergebnisse or {}).items():
+            if ergebnis:
+                eintraege.append((float(ergebnis[0]), (tuple(paar), _bestes_paar(ergebnis))))
+            else:
+                self.ohne_keyframes.append(tuple(paar))
+        eintraege.sort(key=lambda eintrag: eintrag[0])
+        self.distanzen = [distanz for distanz, _ in eintraege]
+        self.paare = [paar for _, paar in eintraege]
+
+    def __len__(self):
+        return len(self.distanzen)
+
+    def fuege_hinzu(self, paar, ergebnis):
+        """Sortiert ein einzelnes Paarergebnis ein (z.B. aus einem fortlaufenden Scan)."""
+        if not ergebnis:
+            self.ohne_keyframes.append(tuple(paar))
+            return
+        position = bisect.bisect_right(self.distanzen, float(ergebnis[0]))
+        self.distanzen.insert(position, float(ergebnis[0]))
+        self.paare.insert(position, (tuple(paar), _bestes_paar(ergebnis)))
+
+    def anzahl_bis(self, schwelle):
+        """Anzahl der Paare mit Distanz <= schwelle."""
+        return bisect.bisect_right(self.distanzen, schwelle)
+
+    def bis(self, schwelle):
+        """Liefert die Paare mit Distanz <= schwelle als {(pfad1, pfad2): [distanz, (keyframe1, keyframe2)]}, das ähnlichste zuerst."""
+        anzahl = self.anzahl_bis(schwelle)
+        return {paar: [distanz, bestes_paar] for distanz, (paar, bestes_paar) in zip(self.distanzen[:anzahl], self.paare[:anzahl])}
+
+    def als_ergebnisse(self):
+        """Liefert alle Paare im Format von vergleiche_videos, Paare ohne Keyframes mit leerem Ergebnis."""
+        ergebnisse = self.bis(float("inf"))
+        ergebnisse.update((paar, []) for paar in self.ohne_keyframes)
+        return ergebnisse
+
+    def ist_vollstaendig_bis(self, schwelle):
+        """True, wenn bis zu dieser Schwelle alle Paare im Scan exakt berechnet wurden."""
+        return self.vollstaendig_bis is None or schwelle <= self.vollstaendig_bis
+
+    def speichere(self, datei):
+        verzeichnis = os.path.dirname(os.path.abspath(datei))
+        os.makedirs(verzeichnis, exist_ok=True)
+        temp_datei = datei + ".tmp"
+        with open(temp_datei, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": ERGEBNIS_VERSION,
+                "erstellt": self.erstellt,
+                "vollstaendig_bis": self.vollstaendig_bis,
+                "signatur_typ": self.signatur_typ,
+                "video_pfade": self.video_pfade,
+                "paare": [[pfad1, pfad2, distanz, *(bestes_paar or (None, None))]
+                          for distanz, ((pfad1, pfad2), bestes_paar) in zip(self.distanzen, self.paare)],
+                "ohne_keyframes": [list(paar) for paar in self.ohne_keyframes],
+                "keyframe_metadaten": self.keyframe_metadaten,
+            }, f)
+        os.replace(temp_datei, datei)
+
+    @classmethod
+    def lade(cls, datei):
+        """Lädt eine mit speichere abgelegte Ergebnismenge; OSError bzw. ValueError bei unlesbarer Datei."""
+        with open(datei, "r", encoding="utf-8") as f:
+            daten = json.load(f)
+        if not isinstance(daten, dict) or daten.get("version") != ERGEBNIS_VERSION:
+            raise ValueError(f"{datei} ist keine Ergebnisdatei in Version {ERGEBNIS_VERSION}")
+        try:
+            menge = cls(keyframe_metadaten=daten["keyframe_metadaten"], video_pfade=daten["video_pfade"], vollstaendig_bis=daten["vollstaendig_bis"],
+                       signatur_typ=daten.get("signatur_typ", 'histogramm'))
+            menge.erstellt = daten["erstellt"]
+            # Die Datei ist bereits sortiert
+            for pfad1, pfad2, distanz, keyframe1, keyframe2 in daten["paare"]:
+                menge.distanzen.append(float(distanz))
+                menge.paare.append(((pfad1, pfad2), (keyframe1, keyframe2) if keyframe1 is not None else None))
+            menge.ohne_keyframes = [tuple(paar) for paar in daten["ohne_keyframes"]]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"{datei} ist beschädigt: {e}") from e
+        return menge
+
+
+def _bestes_paar(ergebnis):
+    return tuple(int(index) for index in ergebnis[1]) if len(ergebnis) > 1 and ergebnis[1] is not None else None
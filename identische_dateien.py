@@ -0,0 +1,90 @@
+# identische_dateien.py
+import hashlib
+import os
+
+TEIL_GROESSE = 64 * 1024
+LESE_GROESSE = 1024 * 1024
+
+
+def teil_hash(datei_pfad, groesse, teil_groesse=TEIL_GROESSE):
+    """Hasht Anfang, Mitte und Ende der Datei (je teil_groesse Bytes) mit BLAKE2b."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(datei_pfad, "rb") as datei:
+        for position in (0, max(0, groesse // 2 - teil_groesse // 2), max(0, groesse - teil_groesse)):
+            datei.seek(position)
+            h.update(datei.read(teil_groesse))
+    return h.digest()
+
+
+def voll_hash(datei_pfad, steuerung=None):
+    """Hasht den gesamten Dateiinhalt mit BLAKE2b."""
+    h = hashlib.blake2b(digest_size=32)
+    with open(datei_pfad, "rb") as datei:
+        while True:
+            if steuerung:
+                steuerung.pruefe()
+            block = datei.read(LESE_GROESSE)
+            if not block:
+                break
+            h.update(block)
+    return h.digest()
+
+
+def _gespeicherter_voll_hash(datei_pfad, hash_cache, steuerung=None):
+    inhalt_hash = hash_cache.hole_inhalt_hash(datei_pfad)
+    if inhalt_hash is None:
+        inhalt_hash = voll_hash(datei_pfad, steuerung)
+        hash_cache.speichere_inhalt_hash(datei_pfad, inhalt_hash)
+    return inhalt_hash
+
+
+def _gruppiere(pfade, schluessel_funktion):
+    gruppen = {}
+    for pfad in pfade:
+        try:
+            schluessel = schluessel_funktion(pfad)
+        except OSError as e:
+            print(f"Warnung: {pfad} konnte nicht gelesen werden: {e}")
+            continue
+        gruppen.setdefault(schluessel, []).append(pfad)
+    return [gruppe for gruppe in gruppen.values() if len(gruppe) > 1]
+
+
+def finde_identische_dateien(video_pfade, status_callback=None, steuerung=None, hash_cache=None):
+    """
+    Findet byte-identische Dateien, ohne sie zu dekodieren, und liefert eine Liste von Gruppen
+    (Listen von Pfaden in der Reihenfolge von video_pfade, jeweils mindestens zwei).
+
+    Nur Dateien gleicher Größe kommen in Frage; von diesen werden zuerst Anfang, Mitte und Ende gehasht,
+    und nur bei gleichem Teil-Hash wird der vollständige Inhalt zur Bestätigung gehasht. Mit hash_cache
+    (z.B. SignaturCache) werden vollständige Hashes unveränderter Dateien nicht erneut berechnet.
+    """
+    groessen = {}
+    for pfad in dict.fromkeys(video_pfade):
+        try:
+            groesse = os.path.getsize(pfad)
+        except OSError:
+            continue
+        if groesse > 0:
+            groessen.setdefault(groesse, []).append(pfad)
+
+    identische_gruppen = []
+    for groesse, pfade in groessen.items():
+        if len(pfade) < 2:
+            continue
+        if steuerung:
+            steuerung.pruefe()
+        for kandidaten in _gruppiere(pfade, lambda pfad: teil_hash(pfad, groesse)):
+            # Bei Dateien bis zur dreifachen Teilgröße deckt der Teil-Hash bereits den ganzen Inhalt ab
+            if groesse <= 3 * TEIL_GROESSE:
+                identische_gruppen.append(kandidaten)
+            else:
+                identische_gruppen.extend(_gruppiere(kandidaten, lambda pfad: _gespeicherter_voll_hash(pfad, hash_cache, steuerung) if hash_cache
+                                                     else voll_hash(pfad, steuerung)))
+
+    if status_callback and identische_gruppen:
+        for gruppe in identische_gruppen:
+            status_callback("Identisch (Distanz 0): " + " = ".join(os.path.basename(pfad) for pfad in gruppe))
+        kopien = sum(len(gruppe) - 1 for gruppe in identische_gruppen)
+        status_callback(f"Identische Dateien: {len(identische_gruppen)} Gruppen, {kopien} Kopien werden nicht erneut analysiert")
+    return identische_gruppen
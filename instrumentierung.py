@@ -0,0 +1,140 @@
+# instrumentierung.py
+import json
+import os
+import time
+
+
+class StufenZeiten:
+    """Kumulierte Zeit und Anzahl der Aufrufe pro Stufe (z.B. 'decode', 'calcHist') für ein Video oder Paar."""
+
+    def __init__(self):
+        self.stufen = {}
+        self.zaehler = {}
+
+    def erfasse(self, stufe, start):
+        """Bucht die Zeit seit start auf die Stufe und liefert den aktuellen Zeitpunkt als Start der nächsten Stufe."""
+        jetzt = time.perf_counter()
+        eintrag = self.stufen.get(stufe)
+        if eintrag is None:
+            self.stufen[stufe] = [jetzt - start, 1]
+        else:
+            eintrag[0] += jetzt - start
+            eintrag[1] += 1
+        return jetzt
+
+    def addiere(self, andere):
+        """Addiert die Stufenzeiten und Zähler einer anderen Messung (z.B. aus einem Hilfsthread)."""
+        for stufe, (sekunden, aufrufe) in andere.stufen.items():
+            eintrag = self.stufen.setdefault(stufe, [0.0, 0])
+            eintrag[0] += sekunden
+            eintrag[1] += aufrufe
+        for name, anzahl in andere.zaehler.items():
+            self.zaehle(name, anzahl)
+
+    def zaehle(self, name, anzahl=1):
+        self.zaehler[name] = self.zaehler.get(name, 0) + anzahl
+
+    def als_dict(self):
+        return {
+            'stufen': {stufe: {'sekunden': sekunden, 'aufrufe': aufrufe} for stufe, (sekunden, aufrufe) in self.stufen.items()},
+            'zaehler': dict(self.zaehler),
+        }
+
+    @classmethod
+    def aus_dict(cls, daten):
+        zeiten = cls()
+        zeiten.stufen = {stufe: [werte['sekunden'], werte['aufrufe']] for stufe, werte in daten['stufen'].items()}
+        zeiten.zaehler = dict(daten['zaehler'])
+        return zeiten
+
+    @property
+    def sekunden(self):
+        return sum(sekunden for sekunden, _ in self.stufen.values())
+
+
+class Messung:
+    """
+    Sammelt Stufenzeiten eines Scans pro Video und pro Paar sowie die Dauer der Scan-Phasen.
+
+    Wird extrahiere_keyframe_histogramme bzw. vergleiche_videos keine Messung übergeben, entfallen alle
+    Zeitmessungen im Hot-Path bis auf eine None-Prüfung. Aus einem Prozesspool kommen die Zeiten eines
+    Videos als Dict zurück und werden mit uebernehme_video eingetragen.
+    """
+
+    def __init__(self):
+        self.videos = {}
+        self.paare = {}
+        self.phasen = StufenZeiten()
+
+    def video(self, pfad):
+        if pfad not in self.videos:
+            self.videos[pfad] = StufenZeiten()
+        return self.videos[pfad]
+
+    def paar(self, pfad1, pfad2):
+        if (pfad1, pfad2) not in self.paare:
+            self.paare[(pfad1, pfad2)] = StufenZeiten()
+        return self.paare[(pfad1, pfad2)]
+
+    def uebernehme_video(self, pfad, daten):
+        if daten is not None:
+            self.videos[pfad] = StufenZeiten.aus_dict(daten)
+
+    def _summen(self, eintraege):
+        summe = StufenZeiten()
+        for zeiten in eintraege:
+            summe.addiere(zeiten)
+        return summe.stufen, summe.zaehler
+
+    def bericht(self):
+        """Liefert den strukturierten Bericht als JSON-serialisierbares Dict."""
+        video_stufen, video_zaehler = self._summen(self.videos.values())
+        paar_stufen, _ = self._summen(self.paare.values())
+        dekodiert = video_zaehler.get('dekodierte_frames', 0)
+        analysiert = video_zaehler.get('analysierte_frames', 0)
+        extraktion_sekunden = sum(zeiten.sekunden for zeiten in self.videos.values() if not zeiten.zaehler.get('aus_cache'))
+        return {
+            'phasen': self.phasen.als_dict()['stufen'],
+            'extraktion': {
+                'stufen': {stufe: {'sekunden': s, 'aufrufe': a} for stufe, (s, a) in video_stufen.items()},
+                'dekodierte_frames': dekodiert,
+                'frames_pro_sekunde': dekodiert / extraktion_sekunden if extraktion_sekunden > 0 else 0.0,
+                'keyframes': video_zaehler.get('keyframes', 0),
+                'keyframe_ausbeute': video_zaehler.get('keyframes', 0) / analysiert if analysiert else 0.0,
+            },
+            'vergleich': {
+                'stufen': {stufe: {'sekunden': s, 'aufrufe': a} for stufe, (s, a) in paar_stufen.items()},
+                'paare': len(self.paare),
+            },
+            'videos': {pfad: zeiten.als_dict() for pfad, zeiten in self.videos.items()},
+            'paare': [{'video1': pfad1, 'video2': pfad2, **zeiten.als_dict()} for (pfad1, pfad2), zeiten in self.paare.items()],
+        }
+
+    def zusammenfassung(self):
+        """Liefert die wichtigsten Kennzahlen als Textzeilen für das Log."""
+        bericht = self.bericht()
+        extraktion = bericht['extraktion']
+        zeilen = ["Messung:"]
+        for phase, werte in bericht['phasen'].items():
+            zeilen.append(f"  Phase {phase}: {werte['sekunden']:.2f} s")
+        zeilen.append(f"  Extraktion: {len(self.videos)} Videos, {extraktion['dekodierte_frames']} Frames dekodiert "
+                      f"({extraktion['frames_pro_sekunde']:.1f} Frames/s), {extraktion['keyframes']} Keyframes "
+                      f"(Ausbeute {extraktion['keyframe_ausbeute'] * 100:.1f} %)")
+        for bereich in ('extraktion', 'vergleich'):
+            stufen = bericht[bereich]['stufen']
+            gesamt = sum(werte['sekunden'] for werte in stufen.values())
+            for stufe, werte in sorted(stufen.items(), key=lambda eintrag: -eintrag[1]['sekunden']):
+                anteil = werte['sekunden'] / gesamt * 100 if gesamt > 0 else 0.0
+                zeilen.append(f"  {bereich}/{stufe}: {werte['sekunden']:.3f} s ({anteil:.1f} %), {werte['aufrufe']} Aufrufe")
+        if self.paare:
+            sekunden = sum(zeiten.sekunden for zeiten in self.paare.values())
+            zeilen.append(f"  Paarvergleich: {len(self.paare)} Paare in {sekunden:.3f} s")
+        extrahiert = [(zeiten.sekunden, pfad) for pfad, zeiten in self.videos.items() if not zeiten.zaehler.get('aus_cache')]
+        if extrahiert:
+            sekunden, pfad = max(extrahiert)
+            zeilen.append(f"  Langsamstes Video: {os.path.basename(pfad)} ({sekunden:.2f} s)")
+        return zeilen
+
+    def speichere_bericht(self, datei_pfad):
+        with open(datei_pfad, "w", encoding="utf-8") as datei:
+            json.dump(self.bericht(), datei, indent=2)
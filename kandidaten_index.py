@@ -0,0 +1,79 @@
+# kandidaten_index.py
+import numpy as np
+
+from distanz_engine import hash_bits
+
+
+def globaler_deskriptor(matrix):
+    """
+    Fasst die Histogramm-Matrix eines Videos (siehe distanz_engine.histogramm_matrix) zu einem
+    kompakten globalen Deskriptor zusammen: dem auf Länge 1 normierten Mittel der Wurzel-Histogramme.
+    Bei Hash-Signaturen (uint64) wird stattdessen jedes Bit als -1/+1 gemittelt.
+    Liefert None für Videos ohne Keyframes.
+    """
+    if len(matrix) == 0:
+        return None
+    if matrix.dtype == np.uint64:
+        matrix = hash_bits(matrix).astype(np.float32) * 2.0 - 1.0
+    deskriptor = matrix.mean(axis=0)
+    norm = np.linalg.norm(deskriptor)
+    if norm == 0:
+        return None
+    return (deskriptor / norm).astype(np.float32)
+
+
+class KandidatenIndex:
+    """
+    Nächste-Nachbarn-Index über die globalen Deskriptoren aller Videos.
+
+    Liefert nur die Videopaare, die für den teuren Keyframe-Vergleich in Frage kommen:
+    die top_k nächsten Nachbarn jedes Videos und/oder alle Paare innerhalb von max_distanz.
+    Größere top_k bzw. max_distanz erhöhen die Trefferquote (Recall) auf Kosten der Laufzeit.
+    """
+
+    def __init__(self, deskriptoren):
+        """deskriptoren: Liste von (schluessel, deskriptor); der Schlüssel ist z.B. die Position in der Videoliste."""
+        self.schluessel = [schluessel for schluessel, _ in deskriptoren]
+        if deskriptoren:
+            self.matrix = np.vstack([deskriptor for _, deskriptor in deskriptoren])
+        else:
+            self.matrix = np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.schluessel)
+
+    def kandidaten_paare(self, top_k=None, max_distanz=None, block_groesse=256):
+        """
+        Liefert die Kandidatenpaare als sortierte Liste von (schluessel_a, schluessel_b).
+        Die Distanz zweier Deskriptoren ist sqrt(1 - Skalarprodukt), analog zur Bhattacharyya-Distanz.
+        """
+        n = len(self)
+        if n < 2:
+            return []
+        k = min(top_k, n - 1) if top_k else 0
+        min_koeffizient = 1.0 - max_distanz ** 2 if max_distanz is not None else None
+
+        zeilen_teile = []
+        spalten_teile = []
+        # Blockweise, damit die Ähnlichkeitsmatrix nie vollständig im Speicher liegt
+        for start in range(0, n, block_groesse):
+            block = self.matrix[start:start + block_groesse]
+            koeffizienten = block @ self.matrix.T
+            zeilen = np.arange(len(block))
+            koeffizienten[zeilen, start + zeilen] = -np.inf  # Ein Video ist nicht sein eigener Nachbar
+
+            if k:
+                nachbarn = np.argpartition(-koeffizienten, k - 1, axis=1)[:, :k]
+                zeilen_teile.append(np.repeat(start + zeilen, k))
+                spalten_teile.append(nachbarn.ravel())
+            if min_koeffizient is not None:
+                treffer_zeilen, treffer_spalten = np.nonzero(koeffizienten >= min_koeffizient)
+                zeilen_teile.append(start + treffer_zeilen)
+                spalten_teile.append(treffer_spalten)
+
+        if not zeilen_teile:
+            return []
+        zeilen = np.concatenate(zeilen_teile)
+        spalten = np.concatenate(spalten_teile)
+        kodiert = np.unique(np.minimum(zeilen, spalten).astype(np.int64) * n + np.maximum(zeilen, spalten))
+        return [(self.schluessel[a], self.schluessel[b]) for a, b in zip(*np.divmod(kodiert, n))]
@@ -4,138 +4,39 @@ from version import __version__
 import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, Scrollbar, LabelFrame
-from PIL import Image, ImageTk
-import cv2
-import numpy as np
-from itertools import combinations
+import multiprocessing
+import sqlite3
 import threading
-from auswahl_dialog import AuswahlDialog
-
-
-def extrahiere_keyframe_histogramme(video_pfad, schwellwert=20, bins=None, ranges=None, progress_callback=None, status_callback=None):
-    """
-    Extrahiert Keyframes aus einem Video und gibt deren Farbhistogramme als NumPy-Arrays zurück.
-    """
-    if ranges is None:
-        ranges = [0, 256, 0, 256, 0, 256]
-    if bins is None:
-        bins = [8, 8, 8]
-
-    cap = cv2.VideoCapture(video_pfad)
-    if not cap.isOpened():
-        print(f"Fehler: Konnte Video nicht öffnen: {video_pfad}")
-        return []
-
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    histogramme = []
-    letzter_grauer_frame = None
-
-    for i in range(frame_count):
-        ret, aktueller_frame = cap.read()
-        if not ret:
-            break
-
-        grauer_aktueller_frame = cv2.cvtColor(aktueller_frame, cv2.COLOR_BGR2GRAY)
-
-        if letzter_grauer_frame is None or np.mean(cv2.absdiff(grauer_aktueller_frame, letzter_grauer_frame)) > schwellwert:
-            histogramm = cv2.calcHist([aktueller_frame], [0, 1, 2], None, bins, ranges).flatten()
-            histogramme.append(histogramm)
-            letzter_grauer_frame = grauer_aktueller_frame
-
-        if progress_callback and frame_count > 0:
-            progress_callback(i / frame_count * 0.5)
-
-    if status_callback:
-        status_callback(f"Keyframes extrahiert: {len(histogramme)}")
-
-    cap.release()
-    return histogramme
-
-
-def vergleiche_videos(video_pfade, progress_callback=None, status_callback=None):
-    """
-    Vergleicht die ausgewählten Videos anhand ihrer Keyframe-Histogramme.
-    """
-    alle_histogramme = {}
-    total_videos = len(video_pfade)
-    for i, pfad in enumerate(video_pfade):
-        if os.path.exists(pfad):
-            if status_callback:
-                status_callback(f"Analysiere Video {i+1}/{total_videos}: {os.path.basename(pfad)}")
-            alle_histogramme[pfad] = extrahiere_keyframe_histogramme(
-                pfad,
-                progress_callback=lambda p: progress_callback(p / total_videos * 0.5 + i / total_videos * 0.5) if progress_callback else None,
-                status_callback=status_callback
-            )
-        else:
-            print(f"Warnung: Video nicht gefunden: {pfad}")
-
-    vergleichs_ergebnisse = {}
-    video_paare = list(combinations(video_pfade, 2))
-    total_vergleiche = len(video_paare)
-
-    for i, (video_pfad1, video_pfad2) in enumerate(video_paare):
-        if video_pfad1 in alle_histogramme and video_pfad2 in alle_histogramme:
-            if status_callback:
-                status_callback(f"Vergleiche '{os.path.basename(video_pfad1)}' mit '{os.path.basename(video_pfad2)}' ({i+1}/{total_vergleiche})")
-            histogramme1 = alle_histogramme[video_pfad1]
-            histogramme2 = alle_histogramme[video_pfad2]
-
-            min_distanzen1_zu_2 = []
-            for hist1 in histogramme1:
-                min_dist = float('inf')
-                for hist2 in histogramme2:
-                    distanz = cv2.compareHist(hist1, hist2, cv2.HISTCMP_BHATTACHARYYA)
-                    min_dist = min(min_dist, distanz)
-                if min_dist != float('inf'):
-                    min_distanzen1_zu_2.append(min_dist)
-
-            min_distanzen2_zu_1 = []
-            for hist2 in histogramme2:
-                min_dist = float('inf')
-                for hist1 in histogramme1:
-                    distanz = cv2.compareHist(hist1, hist2, cv2.HISTCMP_BHATTACHARYYA)
-                    min_dist = min(min_dist, distanz)
-                if min_dist != float('inf'):
-                    min_distanzen2_zu_1.append(min_dist)
-
-            gesamt_aehnlichkeit = []
-            if min_distanzen1_zu_2:
-                gesamt_aehnlichkeit.extend(min_distanzen1_zu_2)
-            if min_distanzen2_zu_1:
-                gesamt_aehnlichkeit.extend(min_distanzen2_zu_1)
-
-            if gesamt_aehnlichkeit:
-                mittelwert_distanz = np.mean(gesamt_aehnlichkeit)
-                vergleichs_ergebnisse[(video_pfad1, video_pfad2)] = [mittelwert_distanz]
-            else:
-                vergleichs_ergebnisse[(video_pfad1, video_pfad2)] = []
-
-        if progress_callback and total_vergleiche > 0:
-            progress_callback(0.5 + (i + 1) / total_vergleiche * 0.5)
-
-    return vergleichs_ergebnisse
-
-
-def erzeuge_thumbnail(video_pfad, groesse=(100, 75)):
-    """
-    Erzeugt ein kleines Vorschaubild (Thumbnail) für das angegebene Video.
-    """
-    try:
-        cap = cv2.VideoCapture(video_pfad)
-        if not cap.isOpened():
-            return None
-        ret, frame = cap.read()
-        cap.release()
-        if ret:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame)
-            img.thumbnail(groesse)
-            return ImageTk.PhotoImage(img)
-        return None
-    except Exception as e:
-        print(f"Fehler beim Erzeugen des Thumbnails für {video_pfad}: {e}")
-        return None
+from auswahl_dialog import AuswahlDialog, GruppenDialog
+from bibliothek_index import BibliothekIndex
+from duplikat_gruppen import bilde_gruppen
+from ereignis_kanal import EreignisKanal
+from ergebnis_menge import ErgebnisMenge, nachfilter_schwelle, standard_ergebnis_datei, vollstaendigkeits_schwelle
+from instrumentierung import Messung
+from ordner_durchlauf import sammle_video_dateien
+from scan_checkpoint import standard_checkpoint_verzeichnis
+from scan_steuerung import ScanAbgebrochen, ScanSteuerung
+from signatur_cache import SignaturCache
+from virtuelle_liste import VirtuelleListe
+from video_vergleich import STANDARD_SCHWELLEN, vergleiche_inkrementell, vergleiche_videos, vergleiche_videos_fortlaufend
+
+MAX_LOG_ZEILEN = 5000
+
+# Videos ab der doppelten Länge werden bei mehreren Prozessen in Abschnitte geteilt und parallel analysiert
+ABSCHNITT_SEKUNDEN = 300
+
+# Voreinstellungen für die Abtastung in der Oberfläche (Anzeigename -> Extraktionsoptionen)
+ABTAST_VOREINSTELLUNGEN = {
+    "Alle Frames (exakt)": {},
+    "Jeder 5. Frame, verkleinert": {'modus': 'jeder_n', 'schritt': 5, 'analyse_groesse': [160, 90]},
+    "1 Frame pro Sekunde, verkleinert": {'modus': 'intervall', 'intervall_sekunden': 1.0, 'analyse_groesse': [160, 90]},
+}
+
+# Signaturtypen in der Oberfläche (Anzeigename -> signatur_typ); beim Wechsel wird die Schwelle auf STANDARD_SCHWELLEN gesetzt
+SIGNATUR_AUSWAHL = {
+    "Farbhistogramm": 'histogramm',
+    "dHash (64 Bit, schnell)": 'dhash',
+}
 
 
 class VideoVergleichsApp:
@@ -143,8 +44,28 @@ class VideoVergleichsApp:
         self.root = root_
         self.root.title(f"Video Vergleich - v{__version__}")
         self.video_pfade = []
-        self.vergleichs_ergebnisse = {}
-        self.vergleichs_schwelle = tk.DoubleVar(value=0.3)
+        # Sortierte Ergebnisse des letzten Scans oder einer geladenen Datei; die Schwelle filtert sie ohne neuen Vergleich
+        self.ergebnis_menge = None
+        self.vergleichs_schwelle = tk.DoubleVar(value=STANDARD_SCHWELLEN['histogramm'])
+        self.anzahl_prozesse = tk.IntVar(value=os.cpu_count() or 1)
+        self.vorfilter_top_k = tk.IntVar(value=0)
+        self.abtastung = tk.StringVar(value=next(iter(ABTAST_VOREINSTELLUNGEN)))
+        self.signatur = tk.StringVar(value=next(iter(SIGNATUR_AUSWAHL)))
+        self.max_keyframes = tk.IntVar(value=0)
+        self.messung_aktiv = tk.BooleanVar(value=False)
+        self.exakt_aktiv = tk.BooleanVar(value=False)
+        self.gruppen_aktiv = tk.BooleanVar(value=True)
+        self.inkrementell_aktiv = tk.BooleanVar(value=False)
+        self.fortlaufend_aktiv = tk.BooleanVar(value=False)
+        self.unterordner_aktiv = tk.BooleanVar(value=True)
+        self.letzte_messung = None
+        # Auswahl-Dialog, der während eines fortlaufenden Scans die Treffer sammelt
+        self.fortlaufender_dialog = None
+        try:
+            self.signatur_cache = SignaturCache()
+        except OSError as e:
+            print(f"Warnung: Signatur-Cache nicht verfügbar: {e}")
+            self.signatur_cache = None
 
         self.status_text = tk.StringVar(value="")
         self.status_display = tk.Text(root, height=5, state=tk.DISABLED)
@@ -156,30 +77,48 @@ class VideoVergleichsApp:
         self.progressbar_label = ttk.Label(root, text="0.00 %")
 
         self.vergleichs_thread = None
-        self.stop_flag = False
+        self.ordner_thread = None
+        self.scan_steuerung = None
+        self.ereignis_kanal = EreignisKanal(self.root, self.update_progressbar, self.zeige_statusmeldungen)
 
-        self.video_liste_text = tk.Text(root, height=5, state=tk.DISABLED)
-        self.video_liste_scrollbar = Scrollbar(root, command=self.video_liste_text.yview)
-        self.video_liste_text.config(yscrollcommand=self.video_liste_scrollbar.set)
+        self.video_liste = None
 
         self.schwellwert_eingabe = None
+        self.prozesse_eingabe = None
+        self.vorfilter_eingabe = None
+        self.abtastung_auswahl = None
+        self.signatur_auswahl = None
+        self.max_keyframes_eingabe = None
+        self.messung_auswahl = None
+        self.exakt_auswahl = None
+        self.gruppen_auswahl = None
+        self.inkrementell_auswahl = None
+        self.unterordner_auswahl = None
+        self.fortlaufend_auswahl = None
+        self.treffer_label = None
+        self.pruefen_button = None
+        self.speichern_button = None
+        self.oeffnen_button = None
+        self.ordner_button = None
+        self.bericht_button = None
         self.browse_button = None
         self.vergleichen_button = None
+        self.pause_button = None
+        self.abbrechen_button = None
 
         self.create_widgets()
         self.root.grid_columnconfigure(0, weight=1)
         self.root.grid_columnconfigure(1, weight=0)
         self.root.grid_rowconfigure(2, weight=1)
+        self.root.protocol("WM_DELETE_WINDOW", self.beim_schliessen)
 
     def create_widgets(self):
         # GroupBox für Videoliste
         videoliste_group = LabelFrame(self.root, text="Videoliste")
         videoliste_group.grid(row=0, column=0, padx=2, pady=2, sticky="nsew")
-        self.video_liste_text = tk.Text(videoliste_group, height=5, state=tk.DISABLED)
-        self.video_liste_text.grid(row=0, column=0, sticky="nsew")
-        self.video_liste_scrollbar = Scrollbar(videoliste_group, command=self.video_liste_text.yview)
-        self.video_liste_scrollbar.grid(row=0, column=1, sticky="ns")
-        self.video_liste_text.config(yscrollcommand=self.video_liste_scrollbar.set)
+        # Zeichnet nur die sichtbaren Zeilen, damit auch Bibliotheken mit 100.000 Videos flüssig bleiben
+        self.video_liste = VirtuelleListe(videoliste_group, anzeige=os.path.basename)
+        self.video_liste.grid(row=0, column=0, sticky="nsew")
         videoliste_group.grid_rowconfigure(0, weight=1)
         videoliste_group.grid_columnconfigure(0, weight=1)
 
@@ -195,6 +134,63 @@ class VideoVergleichsApp:
         ttk.Label(schwelle_frame, text="Ähnlichkeitsschwelle: ").pack(side=tk.LEFT)
         self.schwellwert_eingabe = ttk.Entry(schwelle_frame, textvariable=self.vergleichs_schwelle, width=5)
         self.schwellwert_eingabe.pack(side=tk.LEFT)
+        self.treffer_label = ttk.Label(schwelle_frame, text="")
+        self.treffer_label.pack(side=tk.LEFT, padx=5)
+        self.vergleichs_schwelle.trace_add("write", lambda *_: self.aktualisiere_trefferzahl())
+        prozesse_frame = ttk.Frame(eingabe_group)
+        prozesse_frame.grid(row=3, column=0, padx=5, pady=5, sticky="ew")
+        ttk.Label(prozesse_frame, text="Prozesse: ").pack(side=tk.LEFT)
+        self.prozesse_eingabe = ttk.Spinbox(prozesse_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.anzahl_prozesse, width=5)
+        self.prozesse_eingabe.pack(side=tk.LEFT)
+        vorfilter_frame = ttk.Frame(eingabe_group)
+        vorfilter_frame.grid(row=4, column=0, padx=5, pady=5, sticky="ew")
+        ttk.Label(vorfilter_frame, text="Vorfilter Top-k (0 = aus): ").pack(side=tk.LEFT)
+        self.vorfilter_eingabe = ttk.Spinbox(vorfilter_frame, from_=0, to=1000, textvariable=self.vorfilter_top_k, width=5)
+        self.vorfilter_eingabe.pack(side=tk.LEFT)
+        abtastung_frame = ttk.Frame(eingabe_group)
+        abtastung_frame.grid(row=5, column=0, padx=5, pady=5, sticky="ew")
+        ttk.Label(abtastung_frame, text="Abtastung: ").pack(side=tk.LEFT)
+        self.abtastung_auswahl = ttk.Combobox(abtastung_frame, textvariable=self.abtastung, values=list(ABTAST_VOREINSTELLUNGEN), state="readonly", width=30)
+        self.abtastung_auswahl.pack(side=tk.LEFT)
+        signatur_frame = ttk.Frame(eingabe_group)
+        signatur_frame.grid(row=6, column=0, padx=5, pady=5, sticky="ew")
+        ttk.Label(signatur_frame, text="Signatur: ").pack(side=tk.LEFT)
+        self.signatur_auswahl = ttk.Combobox(signatur_frame, textvariable=self.signatur, values=list(SIGNATUR_AUSWAHL), state="readonly", width=30)
+        self.signatur_auswahl.pack(side=tk.LEFT)
+        self.signatur_auswahl.bind("<<ComboboxSelected>>", lambda event: self.setze_standard_schwelle())
+        max_keyframes_frame = ttk.Frame(eingabe_group)
+        max_keyframes_frame.grid(row=7, column=0, padx=5, pady=5, sticky="ew")
+        ttk.Label(max_keyframes_frame, text="Max. Keyframes pro Video (0 = alle): ").pack(side=tk.LEFT)
+        self.max_keyframes_eingabe = ttk.Spinbox(max_keyframes_frame, from_=0, to=10000, textvariable=self.max_keyframes, width=5)
+        self.max_keyframes_eingabe.pack(side=tk.LEFT)
+        messung_frame = ttk.Frame(eingabe_group)
+        messung_frame.grid(row=8, column=0, padx=5, pady=5, sticky="ew")
+        self.messung_auswahl = ttk.Checkbutton(messung_frame, text="Stufenzeiten messen", variable=self.messung_aktiv)
+        self.messung_auswahl.pack(side=tk.LEFT)
+        self.bericht_button = ttk.Button(messung_frame, text="Bericht exportieren...", command=self.exportiere_bericht, state=tk.DISABLED)
+        self.bericht_button.pack(side=tk.LEFT, padx=5)
+        self.exakt_auswahl = ttk.Checkbutton(messung_frame, text="Alle Paare exakt berechnen", variable=self.exakt_aktiv)
+        self.exakt_auswahl.pack(side=tk.LEFT, padx=5)
+        self.gruppen_auswahl = ttk.Checkbutton(eingabe_group, text="Duplikatgruppen bilden", variable=self.gruppen_aktiv)
+        self.gruppen_auswahl.grid(row=9, column=0, padx=5, pady=5, sticky="w")
+        bibliothek_frame = ttk.Frame(eingabe_group)
+        bibliothek_frame.grid(row=10, column=0, padx=5, pady=5, sticky="ew")
+        self.ordner_button = ttk.Button(bibliothek_frame, text="Ordner auswählen...", command=self.waehle_ordner)
+        self.ordner_button.pack(side=tk.LEFT)
+        self.unterordner_auswahl = ttk.Checkbutton(bibliothek_frame, text="Unterordner", variable=self.unterordner_aktiv)
+        self.unterordner_auswahl.pack(side=tk.LEFT, padx=5)
+        self.inkrementell_auswahl = ttk.Checkbutton(bibliothek_frame, text="Inkrementell (Bibliotheksindex)", variable=self.inkrementell_aktiv)
+        self.inkrementell_auswahl.pack(side=tk.LEFT, padx=5)
+        self.fortlaufend_auswahl = ttk.Checkbutton(eingabe_group, text="Treffer schon während des Scans prüfen", variable=self.fortlaufend_aktiv)
+        self.fortlaufend_auswahl.grid(row=11, column=0, padx=5, pady=5, sticky="w")
+        ergebnis_frame = ttk.Frame(eingabe_group)
+        ergebnis_frame.grid(row=12, column=0, padx=5, pady=5, sticky="ew")
+        self.pruefen_button = ttk.Button(ergebnis_frame, text="Ähnliche Paare überprüfen", command=self.pruefe_ergebnisse, state=tk.DISABLED)
+        self.pruefen_button.pack(side=tk.LEFT)
+        self.speichern_button = ttk.Button(ergebnis_frame, text="Ergebnisse speichern...", command=self.speichere_ergebnisse, state=tk.DISABLED)
+        self.speichern_button.pack(side=tk.LEFT, padx=5)
+        self.oeffnen_button = ttk.Button(ergebnis_frame, text="Ergebnisse öffnen...", command=self.oeffne_ergebnisse)
+        self.oeffnen_button.pack(side=tk.LEFT)
         eingabe_group.grid_columnconfigure(0, weight=1)
 
         # GroupBox für Fortschritt
@@ -204,6 +200,10 @@ class VideoVergleichsApp:
         self.progressbar.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
         self.progressbar_label = ttk.Label(fortschritt_group, text="0.00 %")
         self.progressbar_label.grid(row=0, column=1, sticky="w", padx=5, pady=5)
+        self.pause_button = ttk.Button(fortschritt_group, text="Pause", command=self.pausiere_oder_setze_fort, state=tk.DISABLED)
+        self.pause_button.grid(row=0, column=2, padx=5, pady=5)
+        self.abbrechen_button = ttk.Button(fortschritt_group, text="Abbrechen", command=self.breche_scan_ab, state=tk.DISABLED)
+        self.abbrechen_button.grid(row=0, column=3, padx=5, pady=5)
         fortschritt_group.grid_columnconfigure(0, weight=1)
 
         # GroupBox für Log
@@ -224,14 +224,52 @@ class VideoVergleichsApp:
             self.video_pfade = list(dateien)
             self.update_video_liste_anzeige()
             self.update_status("Videos ausgewählt.")
-            self.vergleichs_ergebnisse = {}
+            self.setze_ergebnis_menge(None)
+
+    def waehle_ordner(self):
+        ordner = filedialog.askdirectory(title="Ordner auswählen")
+        if not ordner:
+            return
+        # Große Bibliotheken nicht im Tk-Hauptthread durchsuchen; Pause und Abbrechen gelten auch für die Suche
+        self.setze_ergebnis_menge(None)
+        self.setze_eingaben_aktiv(False)
+        self.update_status(f"Durchsuche {ordner}...")
+        self.scan_steuerung = ScanSteuerung()
+        self.ereignis_kanal.starte()
+        self.ordner_thread = threading.Thread(target=self.durchsuche_ordner, args=(ordner, self.unterordner_aktiv.get(), self.scan_steuerung))
+        self.ordner_thread.start()
+
+    def durchsuche_ordner(self, ordner, rekursiv, steuerung):
+        # Läuft im Worker-Thread; die Videoliste wird am Ende in einem Schritt übernommen
+        try:
+            video_pfade = sammle_video_dateien(
+                [ordner],
+                rekursiv=rekursiv,
+                fortschritt_callback=lambda anzahl_ordner, anzahl_videos: self.ereignis_kanal.melde_status(
+                    f"{anzahl_ordner} Ordner durchsucht, {anzahl_videos} Videos gefunden..."),
+                steuerung=steuerung
+            )
+        except ScanAbgebrochen:
+            self.ereignis_kanal.melde_status("Ordnersuche abgebrochen.")
+            self.ereignis_kanal.beende()
+            self.ereignis_kanal.rufe_auf(self.setze_eingaben_aktiv, True)
+            return
+        except OSError as e:
+            self.ereignis_kanal.melde_status(f"Fehler: {ordner} konnte nicht gelesen werden: {e}")
+            self.ereignis_kanal.beende()
+            self.ereignis_kanal.rufe_auf(self.setze_eingaben_aktiv, True)
+            return
+        self.ereignis_kanal.beende()
+        self.ereignis_kanal.rufe_auf(self.uebernehme_ordner, ordner, video_pfade)
+
+    def uebernehme_ordner(self, ordner, video_pfade):
+        self.video_pfade = video_pfade
+        self.update_video_liste_anzeige()
+        self.setze_eingaben_aktiv(True)
+        self.update_status(f"{len(self.video_pfade)} Videos aus {ordner} ausgewählt.")
 
     def update_video_liste_anzeige(self):
-        self.video_liste_text.config(state=tk.NORMAL)
-        self.video_liste_text.delete("1.0", tk.END)
-        for pfad in self.video_pfade:
-            self.video_liste_text.insert(tk.END, os.path.basename(pfad) + "\n")
-        self.video_liste_text.config(state=tk.DISABLED)
+        self.video_liste.setze_eintraege(self.video_pfade)
 
     def starte_vergleich_threaded(self):
         if not self.video_pfade:
@@ -239,12 +277,8 @@ class VideoVergleichsApp:
             return
 
         # Deaktiviere die Eingabefelder und Buttons
-        if self.schwellwert_eingabe:
-            self.schwellwert_eingabe.config(state=tk.DISABLED)
-        if self.browse_button:
-            self.browse_button.config(state=tk.DISABLED)
-        if self.vergleichen_button:
-            self.vergleichen_button.config(state=tk.DISABLED)
+        self.setze_ergebnis_menge(None)
+        self.setze_eingaben_aktiv(False)
 
         self.progress_var.set(0.0)
         self.progressbar['value'] = 0.0
@@ -252,54 +286,353 @@ class VideoVergleichsApp:
         self.update_progressbar(0.0)
         self.update_status("Starte Videovergleich...")
 
-        self.stop_flag = False
-        self.vergleichs_thread = threading.Thread(target=self.fuehre_vergleich_aus)
+        # Tk-Variablen nur im Hauptthread lesen; der Worker bekommt fertige Werte
+        try:
+            anzahl_prozesse = max(1, self.anzahl_prozesse.get())
+        except tk.TclError:
+            anzahl_prozesse = 1
+        try:
+            vorfilter_top_k = max(0, self.vorfilter_top_k.get())
+        except tk.TclError:
+            vorfilter_top_k = 0
+        try:
+            max_keyframes = max(0, self.max_keyframes.get())
+        except tk.TclError:
+            max_keyframes = 0
+        try:
+            # Gespeicherte Ergebnisse sollen sich später auch mit einer höheren Schwelle umfiltern lassen
+            abbruch_schwelle = None if self.exakt_aktiv.get() else nachfilter_schwelle(self.vergleichs_schwelle.get())
+        except tk.TclError:
+            abbruch_schwelle = None
+        try:
+            fortlaufend_schwelle = self.vergleichs_schwelle.get() if self.fortlaufend_aktiv.get() else None
+        except tk.TclError:
+            fortlaufend_schwelle = None
+        einstellungen = {
+            'extraktions_optionen': {
+                **ABTAST_VOREINSTELLUNGEN.get(self.abtastung.get(), {}),
+                'signatur_typ': SIGNATUR_AUSWAHL.get(self.signatur.get()),
+                'max_keyframes': max_keyframes or None,
+            },
+            'anzahl_prozesse': anzahl_prozesse,
+            'vorfilter_top_k': vorfilter_top_k or None,
+            'messung': Messung() if self.messung_aktiv.get() else None,
+            # Paare abbrechen, sobald sie sicher über dem Umfilter-Spielraum liegen. Der Gruppenvergleich mit dem
+            # Vertreter ließe dagegen auch Paare knapp über der Schwelle aus; Gruppen bildet daher erst der Dialog.
+            'abbruch_schwelle': abbruch_schwelle,
+            # Nur neue oder geänderte Videos analysieren und gegen den Bestand im Bibliotheksindex vergleichen
+            'inkrementell': self.inkrementell_aktiv.get(),
+            # Jedes fertige Video sofort vergleichen und Treffer schon während des Scans im Auswahl-Dialog zeigen
+            'fortlaufend_schwelle': fortlaufend_schwelle,
+            # Vorauslesen per Dekodier-Thread nur, wenn neben den Prozessen noch Kerne frei sind
+            'pipeline': anzahl_prozesse * 2 <= (os.cpu_count() or 1),
+            'abschnitt_sekunden': ABSCHNITT_SEKUNDEN if anzahl_prozesse > 1 else None,
+        }
+
+        self.scan_steuerung = ScanSteuerung()
+        self.fortlaufender_dialog = None
+        self.ereignis_kanal.starte()
+        als_gruppen = self.gruppen_aktiv.get()
+        self.vergleichs_thread = threading.Thread(target=self.fuehre_vergleich_aus, args=(list(self.video_pfade), einstellungen, self.scan_steuerung, als_gruppen))
         self.vergleichs_thread.start()
 
-    def fuehre_vergleich_aus(self):
-        ergebnisse = vergleiche_videos(
-            self.video_pfade,
-            progress_callback=self.update_progressbar,
-            status_callback=self.update_status
+    def fuehre_vergleich_aus(self, video_pfade, einstellungen, steuerung, als_gruppen=False):
+        # Läuft im Worker-Thread: Oberfläche nur über den Ereigniskanal ansprechen
+        messung = einstellungen['messung']
+        inkrementell = einstellungen.pop('inkrementell')
+        fortlaufend_schwelle = einstellungen.pop('fortlaufend_schwelle')
+        try:
+            if inkrementell:
+                ergebnisse, keyframe_metadaten = self.vergleiche_mit_index(video_pfade, einstellungen, steuerung)
+            elif fortlaufend_schwelle is not None:
+                ergebnisse, keyframe_metadaten = self.vergleiche_fortlaufend(video_pfade, einstellungen, steuerung, fortlaufend_schwelle)
+            else:
+                ergebnisse, keyframe_metadaten = vergleiche_videos(
+                    video_pfade,
+                    progress_callback=self.ereignis_kanal.melde_fortschritt,
+                    status_callback=self.ereignis_kanal.melde_status,
+                    cache=self.signatur_cache,
+                    mit_metadaten=True,
+                    steuerung=steuerung,
+                    checkpoint_verzeichnis=standard_checkpoint_verzeichnis(),
+                    **einstellungen
+                )
+        except ScanAbgebrochen:
+            self.ereignis_kanal.melde_status("Scan abgebrochen. Bereits berechnete Ergebnisse bleiben gesichert; ein neuer Start setzt dort fort.")
+            self.melde_messung(messung)
+            self.ereignis_kanal.beende()
+            self.ereignis_kanal.rufe_auf(self.setze_eingaben_aktiv, True)
+            self.ereignis_kanal.rufe_auf(self.beende_fortlaufenden_dialog)
+            return
+        except (OSError, ValueError, sqlite3.Error) as e:
+            # Checkpoint, Cache oder Index nicht nutzbar: Fehler melden statt den Thread mit gesperrter Oberfläche zu beenden
+            self.ereignis_kanal.melde_status(f"Fehler: Scan fehlgeschlagen: {e}")
+            self.ereignis_kanal.beende()
+            self.ereignis_kanal.rufe_auf(self.setze_eingaben_aktiv, True)
+            self.ereignis_kanal.rufe_auf(self.beende_fortlaufenden_dialog)
+            return
+        self.melde_messung(messung)
+        # Sortiert für das sofortige Umfiltern und gesichert, damit sich der Scan später ohne Dekodieren öffnen lässt
+        ergebnis_menge = ErgebnisMenge(ergebnisse, keyframe_metadaten, video_pfade,
+                                       vollstaendigkeits_schwelle(einstellungen['abbruch_schwelle']),
+                                       einstellungen['extraktions_optionen']['signatur_typ'])
+        try:
+            ergebnis_menge.speichere(standard_ergebnis_datei())
+        except OSError as e:
+            self.ereignis_kanal.melde_status(f"Warnung: Ergebnisse konnten nicht gespeichert werden: {e}")
+        # Gruppen nur für den normalen Scan anzeigen; fortlaufend und inkrementell wurden die Paare einzeln geprüft
+        als_gruppen = als_gruppen and fortlaufend_schwelle is None and not inkrementell
+        self.ereignis_kanal.beende()
+        self.ereignis_kanal.rufe_auf(self.uebernehme_ergebnisse, ergebnis_menge, als_gruppen)
+
+    def uebernehme_ergebnisse(self, ergebnis_menge, als_gruppen):
+        self.setze_ergebnis_menge(ergebnis_menge)
+        self.zeige_auswahl_dialog(als_gruppen)
+
+    def setze_ergebnis_menge(self, ergebnis_menge):
+        self.ergebnis_menge = ergebnis_menge
+        zustand = tk.NORMAL if ergebnis_menge is not None else tk.DISABLED
+        for widget in (self.pruefen_button, self.speichern_button):
+            if widget:
+                widget.config(state=zustand)
+        self.aktualisiere_trefferzahl()
+
+    def aktualisiere_trefferzahl(self):
+        """Zeigt, wie viele Paare die aktuelle Schwelle unterschreiten; per Binärsuche, also ohne neuen Vergleich."""
+        if not self.treffer_label:
+            return
+        try:
+            schwelle = self.vergleichs_schwelle.get()
+        except tk.TclError:
+            schwelle = None
+        if self.ergebnis_menge is None or schwelle is None:
+            self.treffer_label.config(text="")
+            return
+        text = f"{self.ergebnis_menge.anzahl_bis(schwelle)} von {len(self.ergebnis_menge)} Paaren"
+        if not self.ergebnis_menge.ist_vollstaendig_bis(schwelle):
+            text += f" (über {self.ergebnis_menge.vollstaendig_bis} unvollständig)"
+        self.treffer_label.config(text=text)
+
+    def pruefe_ergebnisse(self):
+        try:
+            self.vergleichs_schwelle.get()
+        except tk.TclError:
+            messagebox.showerror("Fehler", "Bitte eine gültige Ähnlichkeitsschwelle eingeben.")
+            return
+        self.zeige_auswahl_dialog(self.gruppen_aktiv.get())
+
+    def speichere_ergebnisse(self):
+        if self.ergebnis_menge is None:
+            return
+        datei_pfad = filedialog.asksaveasfilename(title="Ergebnisse speichern", defaultextension=".json",
+                                                  filetypes=(("JSON-Dateien", "*.json"), ("Alle Dateien", "*.*")))
+        if not datei_pfad:
+            return
+        try:
+            self.ergebnis_menge.speichere(datei_pfad)
+        except OSError as e:
+            messagebox.showerror("Fehler", f"Ergebnisse konnten nicht gespeichert werden: {e}")
+            return
+        self.update_status(f"Ergebnisse gespeichert: {datei_pfad}")
+
+    def oeffne_ergebnisse(self):
+        datei_pfad = filedialog.askopenfilename(title="Ergebnisse öffnen", initialdir=os.path.dirname(standard_ergebnis_datei()),
+                                                filetypes=(("JSON-Dateien", "*.json"), ("Alle Dateien", "*.*")))
+        if not datei_pfad:
+            return
+        try:
+            ergebnis_menge = ErgebnisMenge.lade(datei_pfad)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Fehler", f"Ergebnisse konnten nicht geladen werden: {e}")
+            return
+        self.video_pfade = ergebnis_menge.video_pfade
+        self.update_video_liste_anzeige()
+        self.setze_ergebnis_menge(ergebnis_menge)
+        self.update_status(f"Ergebnisse geladen: {len(ergebnis_menge)} Paare aus {len(self.video_pfade)} Videos ({datei_pfad})")
+        # Die Schwelle muss zur Signatur passen, mit der die Distanzen berechnet wurden
+        for name, signatur_typ in SIGNATUR_AUSWAHL.items():
+            if signatur_typ == ergebnis_menge.signatur_typ and name != self.signatur.get():
+                self.signatur.set(name)
+                self.setze_standard_schwelle()
+
+    def setze_standard_schwelle(self):
+        """Setzt die Ähnlichkeitsschwelle auf den Standardwert der gewählten Signatur (dHash- und Histogramm-Distanzen sind nicht vergleichbar)."""
+        schwelle = STANDARD_SCHWELLEN[SIGNATUR_AUSWAHL.get(self.signatur.get(), 'histogramm')]
+        self.vergleichs_schwelle.set(schwelle)
+        self.update_status(f"Ähnlichkeitsschwelle für {self.signatur.get()} auf {schwelle} gesetzt.")
+
+    def vergleiche_fortlaufend(self, video_pfade, einstellungen, steuerung, schwelle):
+        # Läuft im Worker-Thread; Treffer gehen über den Ereigniskanal an den Auswahl-Dialog
+        return vergleiche_videos_fortlaufend(
+            video_pfade,
+            schwelle,
+            treffer_callback=lambda paar, ergebnis, metadaten: self.ereignis_kanal.rufe_auf(self.zeige_treffer, paar, ergebnis, metadaten, schwelle),
+            progress_callback=self.ereignis_kanal.melde_fortschritt,
+            status_callback=self.ereignis_kanal.melde_status,
+            extraktions_optionen=einstellungen['extraktions_optionen'],
+            cache=self.signatur_cache,
+            anzahl_prozesse=einstellungen['anzahl_prozesse'],
+            mit_metadaten=True,
+            steuerung=steuerung,
+            messung=einstellungen['messung'],
+            pipeline=einstellungen['pipeline'],
+            abschnitt_sekunden=einstellungen['abschnitt_sekunden'],
+            exakt=einstellungen['abbruch_schwelle'] is None,
+            abbruch_schwelle=einstellungen['abbruch_schwelle']
         )
-        self.root.after(0, self.zeige_auswahl_dialog, ergebnisse)
+
+    def zeige_treffer(self, paar, ergebnis, keyframe_metadaten, schwelle):
+        # Den Dialog beim ersten Treffer öffnen; hat ihn der Benutzer geschlossen, wird er während des Scans nicht wieder geöffnet
+        if self.fortlaufender_dialog is None:
+            self.fortlaufender_dialog = AuswahlDialog(self.root, {}, schwelle, self.video_pfade, {}, laufend=True)
+        if self.fortlaufender_dialog.winfo_exists():
+            self.fortlaufender_dialog.fuege_paar_hinzu(paar, ergebnis, keyframe_metadaten)
+
+    def beende_fortlaufenden_dialog(self):
+        """Teilt einem noch offenen fortlaufenden Auswahl-Dialog das Scanende mit; liefert True, falls es ihn gab."""
+        dialog, self.fortlaufender_dialog = self.fortlaufender_dialog, None
+        if dialog is None or not dialog.winfo_exists():
+            return False
+        dialog.scan_beendet()
+        return True
+
+    def vergleiche_mit_index(self, video_pfade, einstellungen, steuerung):
+        # Läuft im Worker-Thread; die SQLite-Verbindung lebt nur für diesen Scan
+        try:
+            index = BibliothekIndex()
+        except (OSError, sqlite3.Error) as e:
+            self.ereignis_kanal.melde_status(f"Fehler: Bibliotheksindex konnte nicht geöffnet werden: {e}")
+            return {}, {}
+        try:
+            return vergleiche_inkrementell(
+                video_pfade,
+                index,
+                progress_callback=self.ereignis_kanal.melde_fortschritt,
+                status_callback=self.ereignis_kanal.melde_status,
+                extraktions_optionen=einstellungen['extraktions_optionen'],
+                anzahl_prozesse=einstellungen['anzahl_prozesse'],
+                mit_metadaten=True,
+                steuerung=steuerung,
+                messung=einstellungen['messung'],
+                pipeline=einstellungen['pipeline'],
+                abschnitt_sekunden=einstellungen['abschnitt_sekunden'],
+                abbruch_schwelle=einstellungen['abbruch_schwelle']
+            )
+        finally:
+            index.schliesse()
+
+    def melde_messung(self, messung):
+        # Läuft im Worker-Thread: Zusammenfassung ins Log, Bericht für den Export merken
+        if messung is None:
+            return
+        for zeile in messung.zusammenfassung():
+            self.ereignis_kanal.melde_status(zeile)
+        self.ereignis_kanal.rufe_auf(self.setze_letzte_messung, messung)
+
+    def setze_letzte_messung(self, messung):
+        self.letzte_messung = messung
+        self.bericht_button.config(state=tk.NORMAL)
+
+    def exportiere_bericht(self):
+        if self.letzte_messung is None:
+            return
+        datei_pfad = filedialog.asksaveasfilename(title="Bericht exportieren", defaultextension=".json",
+                                                  filetypes=(("JSON-Dateien", "*.json"), ("Alle Dateien", "*.*")))
+        if not datei_pfad:
+            return
+        try:
+            self.letzte_messung.speichere_bericht(datei_pfad)
+        except OSError as e:
+            messagebox.showerror("Fehler", f"Bericht konnte nicht gespeichert werden: {e}")
+            return
+        self.update_status(f"Bericht gespeichert: {datei_pfad}")
+
+    def setze_eingaben_aktiv(self, aktiv):
+        """Schaltet die Eingaben vor bzw. nach einem Scan frei; Pause und Abbrechen gibt es nur während des Scans."""
+        zustand = tk.NORMAL if aktiv else tk.DISABLED
+        for widget in (self.schwellwert_eingabe, self.prozesse_eingabe, self.vorfilter_eingabe, self.max_keyframes_eingabe, self.messung_auswahl, self.exakt_auswahl,
+                       self.gruppen_auswahl, self.inkrementell_auswahl, self.unterordner_auswahl, self.fortlaufend_auswahl, self.browse_button, self.ordner_button, self.vergleichen_button,
+                       self.oeffnen_button):
+            if widget:
+                widget.config(state=zustand)
+        for auswahl in (self.abtastung_auswahl, self.signatur_auswahl):
+            if auswahl:
+                auswahl.config(state="readonly" if aktiv else tk.DISABLED)
+        for widget in (self.pause_button, self.abbrechen_button):
+            if widget:
+                widget.config(state=tk.DISABLED if aktiv else tk.NORMAL)
+        if self.pause_button:
+            self.pause_button.config(text="Pause")
+        for widget in (self.pruefen_button, self.speichern_button):
+            if widget:
+                widget.config(state=tk.NORMAL if aktiv and self.ergebnis_menge is not None else tk.DISABLED)
+
+    def pausiere_oder_setze_fort(self):
+        if self.scan_steuerung is None:
+            return
+        if self.scan_steuerung.pausiert:
+            self.scan_steuerung.fortsetzen()
+            self.pause_button.config(text="Pause")
+            self.update_status("Scan fortgesetzt.")
+        else:
+            self.scan_steuerung.pausieren()
+            self.pause_button.config(text="Fortsetzen")
+            self.update_status("Scan pausiert.")
+
+    def breche_scan_ab(self):
+        if self.scan_steuerung is not None and not self.scan_steuerung.abgebrochen:
+            self.scan_steuerung.abbrechen()
+            self.update_status("Breche Scan ab...")
+
+    def beim_schliessen(self):
+        self.breche_scan_ab()
+        self.root.destroy()
 
     def update_progressbar(self, progress):
-        if not self.stop_flag:
-            self.progress_var.set(progress * 100)
-            self.progressbar['value'] = progress * 100
-            self.update_progressbar_label(progress)
-            self.root.update_idletasks()
+        self.progress_var.set(progress * 100)
+        self.progressbar['value'] = progress * 100
+        self.update_progressbar_label(progress)
 
     def update_progressbar_label(self, progress):
         self.progressbar_label.config(text=f"{progress * 100:.2f} %")
 
     def update_status(self, status_meldung):
-        if not self.stop_flag:
-            self.status_display.config(state=tk.NORMAL)
-            self.status_display.insert(tk.END, status_meldung + "\n")
-            self.status_display.see(tk.END)  # Auto-Scroll
-            self.status_display.config(state=tk.DISABLED)
-            self.root.update_idletasks()
-
-    def zeige_auswahl_dialog(self, ergebnisse):
-        thumbnails = {pfad: erzeuge_thumbnail(pfad) for pfad in self.video_pfade}
+        self.zeige_statusmeldungen([status_meldung])
+
+    def zeige_statusmeldungen(self, meldungen):
+        """Hängt mehrere Meldungen mit einem einzigen Insert an das Log an (nur im Tk-Hauptthread aufrufen)."""
+        self.status_display.config(state=tk.NORMAL)
+        self.status_display.insert(tk.END, "\n".join(meldungen) + "\n")
+        # Log begrenzen, damit lange Scans das Text-Widget nicht ausbremsen
+        zeilen = int(self.status_display.index("end-1c").split(".")[0])
+        if zeilen > MAX_LOG_ZEILEN:
+            self.status_display.delete("1.0", f"{zeilen - MAX_LOG_ZEILEN}.0")
+        self.status_display.see(tk.END)  # Auto-Scroll
+        self.status_display.config(state=tk.DISABLED)
+
+    def zeige_auswahl_dialog(self, als_gruppen=False):
+        # Nur die Paare bis zur aktuellen Schwelle, das ähnlichste zuerst
+        schwelle = self.vergleichs_schwelle.get()
+        ergebnisse = self.ergebnis_menge.bis(schwelle)
+        keyframe_metadaten = self.ergebnis_menge.keyframe_metadaten
 
         # Re-aktiviere die Eingabefelder und Buttons
-        if self.schwellwert_eingabe:
-            self.schwellwert_eingabe.config(state=tk.NORMAL)
-        if self.browse_button:
-            self.browse_button.config(state=tk.NORMAL)
-        if self.vergleichen_button:
-            self.vergleichen_button.config(state=tk.NORMAL)
-
-        dialog = AuswahlDialog(
-            self.root,
-            ergebnisse,
-            self.vergleichs_schwelle.get(),
-            thumbnails,
-            self.video_pfade
-        )
+        self.setze_eingaben_aktiv(True)
+        if self.beende_fortlaufenden_dialog():
+            return
+
+        if als_gruppen:
+            gruppen = bilde_gruppen(ergebnisse, schwelle, self.video_pfade)
+            self.update_status(f"{len(gruppen)} Duplikatgruppen mit zusammen {sum(len(gruppe) for gruppe in gruppen)} Videos gefunden.")
+            dialog = GruppenDialog(self.root, gruppen, ergebnisse, self.video_pfade, keyframe_metadaten)
+        else:
+            dialog = AuswahlDialog(
+                self.root,
+                ergebnisse,
+                schwelle,
+                self.video_pfade,
+                keyframe_metadaten
+            )
         dialog.grab_set()
         self.root.wait_window(dialog)
 
@@ -309,6 +642,8 @@ class VideoVergleichsApp:
 
 
 if __name__ == '__main__':
+    # Nötig, damit der Prozesspool in der mit cx_Freeze gebauten Windows-Exe funktioniert
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = VideoVergleichsApp(root)
     root.mainloop()
@@ -0,0 +1,108 @@
+# ordner_durchlauf.py
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Mindestabstand zwischen zwei Fortschrittsmeldungen in Sekunden
+FORTSCHRITT_INTERVALL = 0.5
+
+STANDARD_ENDUNGEN = [".mp4", ".avi", ".mkv"]
+
+
+def standard_thread_anzahl():
+    """Ordner lesen wartet vor allem auf das Dateisystem (besonders bei Netzlaufwerken), daher mehr Threads als Kerne."""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def durchlaufe_ordner(ordner, endungen, rekursiv=True, anzahl_threads=None, fortschritt_callback=None, steuerung=None):
+    """
+    Sucht alle Dateien mit einer der Endungen (klein geschrieben, als Tupel) in ordner und, falls rekursiv,
+    in allen Unterordnern.
+
+    Jeder Ordner wird als eigene Aufgabe per os.scandir in einem Thread-Pool gelesen; gefundene Unterordner
+    werden sofort eingeplant. Die Reihenfolge entspricht trotzdem einem sortierten os.walk: pro Ordner zuerst die
+    Dateien, dann die Unterordner, jeweils nach Namen. Verlinkten Ordnern wird wie bei os.walk nicht gefolgt,
+    unlesbare Unterordner werden übersprungen. fortschritt_callback(anzahl_ordner, anzahl_dateien) wird höchstens
+    alle FORTSCHRITT_INTERVALL Sekunden und am Ende aufgerufen; steuerung.pruefe() erlaubt Pause und Abbruch.
+    """
+    inhalte = {}
+    anzahl_dateien = 0
+    letzte_meldung = time.monotonic()
+    with ThreadPoolExecutor(max_workers=anzahl_threads or standard_thread_anzahl()) as executor:
+        offen = {executor.submit(_lies_ordner, ordner, endungen): ordner}
+        try:
+            while offen:
+                fertig, _ = wait(offen, timeout=FORTSCHRITT_INTERVALL, return_when=FIRST_COMPLETED)
+                for future in fertig:
+                    pfad = offen.pop(future)
+                    try:
+                        dateien, unterordner = future.result()
+                    except OSError:
+                        # Den Startordner selbst nicht stillschweigend übergehen
+                        if pfad == ordner:
+                            raise
+                        dateien, unterordner = [], []
+                    inhalte[pfad] = (dateien, unterordner)
+                    anzahl_dateien += len(dateien)
+                    if rekursiv:
+                        for unter in unterordner:
+                            offen[executor.submit(_lies_ordner, unter, endungen)] = unter
+                if steuerung:
+                    steuerung.pruefe()
+                if fortschritt_callback and time.monotonic() - letzte_meldung >= FORTSCHRITT_INTERVALL:
+                    letzte_meldung = time.monotonic()
+                    fortschritt_callback(len(inhalte), anzahl_dateien)
+        finally:
+            # Bei Abbruch nicht erst die restlichen Ordner lesen
+            for future in offen:
+                future.cancel()
+    if fortschritt_callback:
+        fortschritt_callback(len(inhalte), anzahl_dateien)
+
+    gefunden = []
+    stapel = [ordner]
+    while stapel:
+        dateien, unterordner = inhalte.get(stapel.pop(), ((), ()))
+        gefunden.extend(dateien)
+        if rekursiv:
+            stapel.extend(reversed(unterordner))
+    return gefunden
+
+
+def sammle_video_dateien(pfade, rekursiv=False, endungen=None, fortschritt_callback=None, steuerung=None):
+    """
+    Sammelt alle Videodateien aus den angegebenen Dateien und Ordnern, gefiltert nach Dateiendung.
+
+    Ordner werden parallel durchsucht (siehe durchlaufe_ordner); fortschritt_callback(anzahl_ordner, anzahl_videos)
+    und steuerung werden an den Durchlauf weitergegeben.
+    """
+    endungen = tuple(endung.lower() for endung in (endungen or STANDARD_ENDUNGEN))
+    gefunden = []
+    for pfad in pfade:
+        if os.path.isfile(pfad):
+            gefunden.append(pfad)
+        elif os.path.isdir(pfad):
+            gefunden.extend(durchlaufe_ordner(pfad, endungen, rekursiv, fortschritt_callback=fortschritt_callback, steuerung=steuerung))
+        else:
+            print(f"Warnung: Pfad nicht gefunden: {pfad}", file=sys.stderr)
+    # Doppelte Angaben (z.B. Datei und ihr Ordner) nur einmal vergleichen
+    return list(dict.fromkeys(os.path.abspath(pfad) for pfad in gefunden))
+
+
+def _lies_ordner(ordner, endungen):
+    dateien = []
+    unterordner = []
+    with os.scandir(ordner) as eintraege:
+        for eintrag in eintraege:
+            try:
+                if eintrag.is_dir():
+                    if not eintrag.is_symlink():
+                        unterordner.append(eintrag.path)
+                elif eintrag.name.lower().endswith(endungen) and eintrag.is_file():
+                    dateien.append(eintrag.path)
+            except OSError:
+                continue
+    dateien.sort()
+    unterordner.sort()
+    return dateien, unterordner
@@ -0,0 +1,76 @@
+# scan_checkpoint.py
+import hashlib
+import json
+import os
+import time
+
+from signatur_cache import datei_identitaet
+
+
+def standard_checkpoint_verzeichnis():
+    """Liefert das Standardverzeichnis für Scan-Checkpoints im Benutzerverzeichnis."""
+    return os.path.join(os.path.expanduser("~"), ".easyvideocompare", "checkpoints")
+
+
+class ScanCheckpoint:
+    """
+    Hält fertige Paarergebnisse eines Scans während der Laufzeit auf der Festplatte fest.
+
+    Der Checkpoint ist an die Videoliste (inklusive Größe und Änderungszeit jeder Datei) und die
+    Extraktionsparameter gebunden. Wird derselbe Scan nach einem Abbruch oder Absturz neu gestartet,
+    liefert laden() die bereits berechneten Paare. Die Signaturen selbst sichert der SignaturCache.
+    Die Datei wird gepuffert im JSON-Lines-Format fortgeschrieben und nach erfolgreichem Abschluss gelöscht.
+    """
+
+    def __init__(self, video_pfade, optionen, verzeichnis=None, schreib_intervall=2.0):
+        self.verzeichnis = verzeichnis or standard_checkpoint_verzeichnis()
+        self.schreib_intervall = schreib_intervall
+        identitaeten = sorted(identitaet for identitaet in map(datei_identitaet, video_pfade) if identitaet is not None)
+        schluessel = hashlib.sha1(json.dumps([identitaeten, optionen], sort_keys=True).encode("utf-8")).hexdigest()
+        self.datei = os.path.join(self.verzeichnis, schluessel + ".jsonl")
+        self._puffer = []
+        self._letztes_schreiben = time.monotonic()
+
+    def laden(self):
+        """Liefert die bereits gesicherten Ergebnisse als {(pfad1, pfad2): ergebnis}."""
+        ergebnisse = {}
+        try:
+            with open(self.datei, "r", encoding="utf-8") as f:
+                for zeile in f:
+                    try:
+                        eintrag = json.loads(zeile)
+                    except ValueError:
+                        break  # Unvollständig geschriebene letzte Zeile nach einem Absturz
+                    ergebnis = eintrag["ergebnis"]
+                    if len(ergebnis) > 1 and ergebnis[1] is not None:
+                        ergebnis[1] = tuple(ergebnis[1])
+                    ergebnisse[tuple(eintrag["paar"])] = ergebnis
+        except OSError:
+            pass
+        return ergebnisse
+
+    def sichere(self, paar, ergebnis):
+        """Merkt ein fertiges Paarergebnis vor; geschrieben wird höchstens alle schreib_intervall Sekunden."""
+        self._puffer.append(json.dumps({"paar": list(paar), "ergebnis": list(ergebnis)}))
+        if time.monotonic() - self._letztes_schreiben >= self.schreib_intervall:
+            self.flush()
+
+    def flush(self):
+        self._letztes_schreiben = time.monotonic()
+        if not self._puffer:
+            return
+        try:
+            os.makedirs(self.verzeichnis, exist_ok=True)
+            with open(self.datei, "a", encoding="utf-8") as f:
+                f.write("\n".join(self._puffer) + "\n")
+            self._puffer = []
+        except OSError as e:
+            print(f"Warnung: Checkpoint konnte nicht geschrieben werden: {e}")
+
+    def abschliessen(self):
+        """Verwirft den Checkpoint nach einem vollständig abgeschlossenen Scan."""
+        self._puffer = []
+        try:
+            os.remove(self.datei)
+        except OSError:
+            pass
@@ -0,0 +1,45 @@
+# scan_steuerung.py
+import threading
+
+
+class ScanAbgebrochen(Exception):
+    """Wird ausgelöst, wenn ein laufender Scan über die ScanSteuerung abgebrochen wurde."""
+
+
+class ScanSteuerung:
+    """
+    Kooperatives Abbrechen und Pausieren eines Scans.
+
+    Der Scan ruft regelmäßig pruefe() auf: bei Pause wartet der Aufruf, bis fortgesetzt wird,
+    nach abbrechen() löst er ScanAbgebrochen aus. Alle Methoden dürfen aus beliebigen Threads aufgerufen werden.
+    """
+
+    def __init__(self):
+        self._abbruch = threading.Event()
+        self._weiter = threading.Event()
+        self._weiter.set()
+
+    @property
+    def abgebrochen(self):
+        return self._abbruch.is_set()
+
+    @property
+    def pausiert(self):
+        return not self._weiter.is_set()
+
+    def abbrechen(self):
+        self._abbruch.set()
+        self._weiter.set()  # Eine pausierte Schleife muss aufwachen, um den Abbruch zu bemerken
+
+    def pausieren(self):
+        if not self._abbruch.is_set():
+            self._weiter.clear()
+
+    def fortsetzen(self):
+        self._weiter.set()
+
+    def pruefe(self):
+        if not self._weiter.is_set():
+            self._weiter.wait()
+        if self._abbruch.is_set():
+            raise ScanAbgebrochen()
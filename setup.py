@@ -11,7 +11,11 @@ setup(
     name="EasyVideoCompare",  # Ersetze dies durch den Namen deines Programms
     version=__version__,
     description="Ein einfaches Programm um Videos zu vergleichen",  # Füge hier eine Beschreibung hinzu
-    executables=[Executable("main.py", base=base)],
+    executables=[
+        Executable("main.py", base=base),
+        # Konsolenprogramm für Scans ohne Oberfläche (siehe cli.py)
+        Executable("cli.py", base=None, target_name="EasyVideoCompareCLI"),
+    ],
     packages=["tkinter", "PIL", "cv2", "os", "tkinter.ttk"],  # Explizit benötigte Packages
     include_files=["version.py"],  # Füge version.py zu den Included Files hinzu
     # Wenn du zusätzliche Daten oder Ordner hast (z.B. Bilder), füge sie hier hinzu:
@@ -0,0 +1,238 @@
+# signatur_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+CACHE_VERSION = 2
+
+# Der Index wird spätestens nach so vielen neuen Einträgen geschrieben, sonst erst bei flush
+INDEX_SCHREIB_INTERVALL = 100
+
+
+def standard_cache_verzeichnis():
+    """Liefert das Standardverzeichnis für den Signatur-Cache im Benutzerverzeichnis."""
+    return os.path.join(os.path.expanduser("~"), ".easyvideocompare", "signatur_cache")
+
+
+def datei_identitaet(video_pfad):
+    """Liefert (absoluter Pfad, Größe, Änderungszeit in ns) oder None, falls die Datei fehlt."""
+    try:
+        stat = os.stat(video_pfad)
+    except OSError:
+        return None
+    return os.path.abspath(video_pfad), stat.st_size, stat.st_mtime_ns
+
+
+def parameter_schluessel(optionen):
+    """Erzeugt einen stabilen Schlüssel für einen Satz Extraktionsparameter."""
+    return hashlib.sha1(json.dumps(optionen, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SignaturCache:
+    """
+    Persistenter Cache für Keyframe-Signaturen auf der Festplatte.
+
+    Ein Eintrag wird über Pfad, Dateigröße, Änderungszeit und die Extraktionsparameter identifiziert.
+    Ändert sich die Datei, passt der Schlüssel nicht mehr und der veraltete Eintrag wird ersetzt.
+    Überschreitet der Cache max_bytes, werden die am längsten nicht genutzten Einträge entfernt (LRU).
+    Der Index wird gesammelt geschrieben (alle INDEX_SCHREIB_INTERVALL Einträge und bei flush); Signatur-Dateien,
+    die nach einem Absturz in keinem Index stehen, werden beim nächsten Öffnen gelöscht.
+    Daneben merkt sich der Index die Inhalts-Hashes der Erkennung identischer Dateien (siehe identische_dateien).
+    Sie werden mit den Signaturen verdrängt: Ein Hash bleibt, solange es Einträge für seine Datei gibt oder er
+    zuletzt nach dem ältesten verbliebenen Eintrag genutzt wurde.
+    """
+
+    def __init__(self, verzeichnis=None, max_bytes=512 * 1024 * 1024):
+        self.verzeichnis = verzeichnis or standard_cache_verzeichnis()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index_pfad = os.path.join(self.verzeichnis, "index.json")
+        self._index_geaendert = False
+        self._neue_eintraege = 0
+        # {absoluter Pfad: [Größe, Änderungszeit in ns, Inhalts-Hash als Hex, letzter Zugriff]}
+        self._inhalt_hashes = {}
+        os.makedirs(self.verzeichnis, exist_ok=True)
+        self._eintraege = self._lade_index()
+        # (Pfad, Parameterschlüssel) -> Schlüssel, damit speichere veraltete Einträge ohne Suche über alle findet
+        self._schluessel_von = {(eintrag["pfad"], eintrag["parameter"]): schluessel for schluessel, eintrag in self._eintraege.items()}
+        self._gesamt_bytes = sum(eintrag["bytes"] for eintrag in self._eintraege.values())
+        self._entferne_verwaiste_dateien()
+
+    def _lade_index(self):
+        try:
+            with open(self._index_pfad, "r", encoding="utf-8") as f:
+                daten = json.load(f)
+            if daten.get("version") == CACHE_VERSION:
+                self._inhalt_hashes = daten.get("inhalt_hashes", {})
+                return daten["eintraege"]
+            self._leere_verzeichnis()
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def _leere_verzeichnis(self):
+        """Entfernt Einträge eines Caches mit veraltetem Format."""
+        for name in os.listdir(self.verzeichnis):
+            if name.endswith(".npz"):
+                try:
+                    os.remove(os.path.join(self.verzeichnis, name))
+                except OSError:
+                    pass
+
+    def _entferne_verwaiste_dateien(self):
+        try:
+            namen = os.listdir(self.verzeichnis)
+        except OSError:
+            return
+        for name in namen:
+            if name.endswith(".npz") and name[:-len(".npz")] not in self._eintraege:
+                try:
+                    os.remove(os.path.join(self.verzeichnis, name))
+                except OSError:
+                    pass
+
+    def _schreibe_index(self):
+        temp_pfad = self._index_pfad + ".tmp"
+        with open(temp_pfad, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "eintraege": self._eintraege, "inhalt_hashes": self._inhalt_hashes}, f)
+        os.replace(temp_pfad, self._index_pfad)
+        self._index_geaendert = False
+        self._neue_eintraege = 0
+
+    def _eintrag_datei(self, schluessel):
+        return os.path.join(self.verzeichnis, schluessel + ".npz")
+
+    @staticmethod
+    def _schluessel(identitaet, param_schluessel):
+        return hashlib.sha1(json.dumps([*identitaet, param_schluessel]).encode("utf-8")).hexdigest()
+
+    def _entferne(self, schluessel):
+        eintrag = self._eintraege.pop(schluessel, None)
+        if eintrag is not None:
+            self._gesamt_bytes -= eintrag["bytes"]
+            if self._schluessel_von.get((eintrag["pfad"], eintrag["parameter"])) == schluessel:
+                del self._schluessel_von[(eintrag["pfad"], eintrag["parameter"])]
+        try:
+            os.remove(self._eintrag_datei(schluessel))
+        except OSError:
+            pass
+        self._index_geaendert = True
+
+    def hole(self, video_pfad, optionen):
+        """Liefert (histogramme, metadaten) aus dem Cache oder None, falls kein gültiger Eintrag existiert."""
+        identitaet = datei_identitaet(video_pfad)
+        if identitaet is None:
+            return None
+        schluessel = self._schluessel(identitaet, parameter_schluessel(optionen))
+        with self._lock:
+            if schluessel not in self._eintraege:
+                return None
+            try:
+                with np.load(self._eintrag_datei(schluessel)) as daten:
+                    histogramme = list(daten["histogramme"])
+                    metadaten = {name[len("meta_"):]: daten[name].tolist() for name in daten.files if name.startswith("meta_")}
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warnung: Defekter Cache-Eintrag für {video_pfad} wird verworfen: {e}")
+                self._entferne(schluessel)
+                return None
+            self._eintraege[schluessel]["zugriff"] = time.time()
+            self._index_geaendert = True
+            return histogramme, metadaten
+
+    def speichere(self, video_pfad, optionen, histogramme, metadaten):
+        """Legt die Signaturen eines Videos im Cache ab und ersetzt veraltete Einträge derselben Datei."""
+        identitaet = datei_identitaet(video_pfad)
+        if identitaet is None:
+            return
+        param_schluessel = parameter_schluessel(optionen)
+        schluessel = self._schluessel(identitaet, param_schluessel)
+        histogramme = np.asarray(histogramme)
+        # Hash-Signaturen und quantisierte Histogramme behalten ihren Typ, alle anderen werden als float32 abgelegt
+        if histogramme.dtype not in (np.uint64, np.uint8, np.float16):
+            histogramme = histogramme.astype(np.float32)
+        arrays = {"histogramme": histogramme}
+        for name, werte in (metadaten or {}).items():
+            arrays["meta_" + name] = np.asarray(werte)
+
+        with self._lock:
+            alter_schluessel = self._schluessel_von.get((identitaet[0], param_schluessel))
+            if alter_schluessel is not None and alter_schluessel != schluessel:
+                self._entferne(alter_schluessel)
+            try:
+                # Der Dateiname endet auf .npz, damit np.savez keine zweite Endung anhängt
+                temp_datei = self._eintrag_datei(schluessel + ".tmp")
+                np.savez(temp_datei, **arrays)
+                os.replace(temp_datei, self._eintrag_datei(schluessel))
+                groesse = os.path.getsize(self._eintrag_datei(schluessel))
+            except OSError as e:
+                print(f"Warnung: Signaturen für {video_pfad} konnten nicht zwischengespeichert werden: {e}")
+                return
+            if schluessel in self._eintraege:
+                # Gleiche Datei erneut gespeichert: die Signatur-Datei wurde eben überschrieben
+                self._gesamt_bytes -= self._eintraege[schluessel]["bytes"]
+            self._eintraege[schluessel] = {"pfad": identitaet[0], "parameter": param_schluessel, "bytes": groesse, "zugriff": time.time()}
+            self._schluessel_von[(identitaet[0], param_schluessel)] = schluessel
+            self._gesamt_bytes += groesse
+            self._index_geaendert = True
+            self._neue_eintraege += 1
+            self._raeume_auf()
+            if self._neue_eintraege >= INDEX_SCHREIB_INTERVALL:
+                try:
+                    self._schreibe_index()
+                except OSError as e:
+                    print(f"Warnung: Cache-Index konnte nicht geschrieben werden: {e}")
+
+    def hole_inhalt_hash(self, datei_pfad):
+        """Liefert den gespeicherten Inhalts-Hash (bytes) der Datei oder None, falls sie fehlt oder sich geändert hat."""
+        identitaet = datei_identitaet(datei_pfad)
+        if identitaet is None:
+            return None
+        with self._lock:
+            eintrag = self._inhalt_hashes.get(identitaet[0])
+            if eintrag is None or eintrag[0] != identitaet[1] or eintrag[1] != identitaet[2]:
+                return None
+            self._inhalt_hashes[identitaet[0]] = [*eintrag[:3], time.time()]
+            self._index_geaendert = True
+        return bytes.fromhex(eintrag[2])
+
+    def speichere_inhalt_hash(self, datei_pfad, inhalt_hash):
+        """Merkt sich den Inhalts-Hash der Datei bis zur nächsten Änderung; geschrieben wird er mit dem Index."""
+        identitaet = datei_identitaet(datei_pfad)
+        if identitaet is None:
+            return
+        with self._lock:
+            self._inhalt_hashes[identitaet[0]] = [identitaet[1], identitaet[2], inhalt_hash.hex(), time.time()]
+            self._index_geaendert = True
+
+    def _raeume_auf(self):
+        if self._gesamt_bytes <= self.max_bytes:
+            return
+        for schluessel, _ in sorted(self._eintraege.items(), key=lambda e: e[1]["zugriff"]):
+            if self._gesamt_bytes <= self.max_bytes:
+                break
+            self._entferne(schluessel)
+        self._raeume_inhalt_hashes_auf()
+
+    def _raeume_inhalt_hashes_auf(self):
+        # Kopien werden nie dekodiert und haben daher keinen eigenen Eintrag; für sie gilt die Zugriffszeit
+        pfade = {eintrag["pfad"] for eintrag in self._eintraege.values()}
+        grenze = min((eintrag["zugriff"] for eintrag in self._eintraege.values()), default=float("inf"))
+        veraltet = [pfad for pfad, eintrag in self._inhalt_hashes.items()
+                    if pfad not in pfade and (eintrag[3] if len(eintrag) > 3 else 0) < grenze]
+        for pfad in veraltet:
+            del self._inhalt_hashes[pfad]
+        if veraltet:
+            self._index_geaendert = True
+
+    def flush(self):
+        """Schreibt neue Einträge und geänderte Zugriffszeiten in den Index."""
+        with self._lock:
+            if self._index_geaendert:
+                try:
+                    self._schreibe_index()
+                except OSError as e:
+                    print(f"Warnung: Cache-Index konnte nicht geschrieben werden: {e}")
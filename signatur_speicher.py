@@ -0,0 +1,235 @@
+# signatur_speicher.py
+import json
+import os
+import threading
+
+import numpy as np
+
+from signatur_cache import datei_identitaet, parameter_schluessel
+
+SPEICHER_VERSION = 1
+
+
+def standard_speicher_verzeichnis():
+    """Liefert das Standardverzeichnis des spaltenorientierten Signatur-Speichers im Benutzerverzeichnis."""
+    return os.path.join(os.path.expanduser("~"), ".easyvideocompare", "signatur_speicher")
+
+
+class _Tabelle:
+    """
+    Spalten eines Parametersatzes: eine Datei mit allen Signatur-Zeilen (eine Zeile pro Keyframe) und je eine
+    Datei pro Metadatum, dazu ein JSON-Index {pfad: [erste Zeile, Anzahl, Größe, Änderungszeit]}.
+    Neue Videos werden angehängt; Zeilen hinter der im Index vermerkten Anzahl (z.B. nach einem Absturz) werden verworfen.
+    Fehlt der Index oder ist er unlesbar, werden alle Spalten-Dateien gelöscht, da sich ihre Zeilen keinem Video
+    mehr zuordnen lassen.
+    """
+
+    def __init__(self, verzeichnis, schluessel):
+        self.verzeichnis = verzeichnis
+        self.schluessel = schluessel
+        self.basis = os.path.join(verzeichnis, schluessel)
+        self.index_datei = self.basis + ".json"
+        self.dtype = None
+        self.zeilen_form = None
+        self.spalten = {}
+        self.zeilen = 0
+        self.videos = {}
+        self.generation = 0
+        self.geaendert = False
+        self._memmaps = {}
+        index_gueltig = False
+        try:
+            with open(self.index_datei, "r", encoding="utf-8") as f:
+                daten = json.load(f)
+            if daten.get("version") == SPEICHER_VERSION:
+                # Erst vollständig lesen, dann übernehmen, damit ein halb gelesener Index nichts zurücklässt
+                dtype = np.dtype(daten["dtype"]) if daten["dtype"] else None
+                zeilen_form = tuple(daten["zeilen_form"]) if daten["zeilen_form"] is not None else None
+                spalten = {name: np.dtype(dtype) for name, dtype in daten["spalten"].items()}
+                zeilen, videos, generation = int(daten["zeilen"]), dict(daten["videos"]), int(daten["generation"])
+                self.dtype, self.zeilen_form, self.spalten = dtype, zeilen_form, spalten
+                self.zeilen, self.videos, self.generation = zeilen, videos, generation
+                index_gueltig = True
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+        if index_gueltig:
+            self._kuerze_dateien()
+        else:
+            self._entferne_spalten_dateien()
+
+    def _datei(self, spalte, generation=None):
+        # Verdichtete Spalten bekommen eine neue Generation, damit noch geöffnete memmaps (unter Windows gesperrt) gültig bleiben
+        generation = self.generation if generation is None else generation
+        return f"{self.basis}.{generation}" + (".daten" if spalte is None else f".{spalte}")
+
+    def _zeilen_bytes(self, spalte):
+        return self.dtype.itemsize * int(np.prod(self.zeilen_form, dtype=np.int64)) if spalte is None else self.spalten[spalte].itemsize
+
+    def _kuerze_dateien(self):
+        if self.dtype is None:
+            # Bisher nur Videos ohne Keyframes: angehängte Zeilen gehören zu keinem Eintrag
+            self._entferne_spalten_dateien()
+            return
+        for spalte in [None, *self.spalten]:
+            try:
+                if os.path.getsize(self._datei(spalte)) > self.zeilen * self._zeilen_bytes(spalte):
+                    os.truncate(self._datei(spalte), self.zeilen * self._zeilen_bytes(spalte))
+            except OSError:
+                pass
+
+    def _entferne_spalten_dateien(self):
+        # Alle Generationen und Spalten dieses Parametersatzes, nur der Index selbst bleibt
+        try:
+            with os.scandir(self.verzeichnis) as eintraege:
+                dateien = [eintrag.path for eintrag in eintraege
+                           if eintrag.name.startswith(self.schluessel + ".") and eintrag.path != self.index_datei]
+        except OSError:
+            return
+        for datei in dateien:
+            try:
+                os.remove(datei)
+            except OSError:
+                pass
+
+    def _memmap(self, spalte):
+        """Liefert die Spalte als schreibgeschützte numpy.memmap über alle bisher geschriebenen Zeilen."""
+        memmap = self._memmaps.get(spalte)
+        if memmap is None or len(memmap) < self.zeilen:
+            if spalte is None:
+                memmap = np.memmap(self._datei(None), dtype=self.dtype, mode="r", shape=(self.zeilen, *self.zeilen_form))
+            else:
+                memmap = np.memmap(self._datei(spalte), dtype=self.spalten[spalte], mode="r", shape=(self.zeilen,))
+            self._memmaps[spalte] = memmap
+        return memmap
+
+    def hole(self, pfad, groesse, mtime_ns):
+        eintrag = self.videos.get(pfad)
+        if eintrag is None or eintrag[2] != groesse or eintrag[3] != mtime_ns:
+            return None
+        start, anzahl = eintrag[0], eintrag[1]
+        if anzahl == 0:
+            return np.empty((0, *(self.zeilen_form or (0,))), dtype=self.dtype or np.float32), {name: [] for name in self.spalten}
+        matrix = self._memmap(None)[start:start + anzahl]
+        metadaten = {name: self._memmap(name)[start:start + anzahl].tolist() for name in self.spalten}
+        return matrix, metadaten
+
+    def haenge_an(self, pfad, groesse, mtime_ns, matrix, metadaten):
+        if self.dtype is None and len(matrix):
+            self.dtype = matrix.dtype
+            self.zeilen_form = tuple(matrix.shape[1:])
+            self.spalten = {name: np.asarray(werte).dtype for name, werte in metadaten.items()}
+        if len(matrix):
+            with open(self._datei(None), "ab") as f:
+                f.write(np.ascontiguousarray(matrix, dtype=self.dtype).tobytes())
+            for name, dtype in self.spalten.items():
+                with open(self._datei(name), "ab") as f:
+                    f.write(np.asarray(metadaten[name], dtype=dtype).tobytes())
+        self.videos[pfad] = [self.zeilen, len(matrix), groesse, mtime_ns]
+        self.zeilen += len(matrix)
+        self.geaendert = True
+
+    def schreibe_index(self):
+        temp_datei = self.index_datei + ".tmp"
+        with open(temp_datei, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": SPEICHER_VERSION,
+                "dtype": self.dtype.str if self.dtype is not None else None,
+                "zeilen_form": list(self.zeilen_form) if self.zeilen_form is not None else None,
+                "spalten": {name: dtype.str for name, dtype in self.spalten.items()},
+                "zeilen": self.zeilen,
+                "generation": self.generation,
+                "videos": self.videos,
+            }, f)
+        os.replace(temp_datei, self.index_datei)
+        self.geaendert = False
+
+    def belegte_zeilen(self):
+        return sum(eintrag[1] for eintrag in self.videos.values())
+
+    def verdichte(self):
+        """Schreibt die Spalten ohne die Zeilen ersetzter oder entfernter Videos neu."""
+        if self.dtype is None:
+            return
+        reihenfolge = sorted(self.videos.items(), key=lambda eintrag: eintrag[1][0])
+        alte_generation = self.generation
+        for spalte in [None, *self.spalten]:
+            quelle = self._memmap(spalte)
+            with open(self._datei(spalte, alte_generation + 1), "wb") as f:
+                for _, (start, anzahl, _, _) in reihenfolge:
+                    f.write(np.ascontiguousarray(quelle[start:start + anzahl]).tobytes())
+        self._memmaps.clear()
+        neue_videos = {}
+        zeile = 0
+        for pfad, (_, anzahl, groesse, mtime_ns) in reihenfolge:
+            neue_videos[pfad] = [zeile, anzahl, groesse, mtime_ns]
+            zeile += anzahl
+        self.videos = neue_videos
+        self.zeilen = zeile
+        self.generation = alte_generation + 1
+        self.schreibe_index()
+        for spalte in [None, *self.spalten]:
+            try:
+                os.remove(self._datei(spalte, alte_generation))
+            except OSError:
+                pass  # Noch geöffnet; die Datei wird nicht mehr referenziert
+
+
+class SignaturSpeicher:
+    """
+    Spaltenorientierter Signatur-Speicher für sehr große Bibliotheken.
+
+    Pro Satz Extraktionsparameter liegen die vergleichsfertigen Signatur-Matrizen (siehe
+    distanz_engine.signatur_matrix) aller Videos hintereinander in einer Datei, die per numpy.memmap
+    geöffnet wird; ein Index vermerkt für jedes Video erste Zeile und Anzahl der Keyframes. hole liefert
+    eine Sicht auf diesen Bereich ohne Kopie, sodass nur die Seiten der tatsächlich verglichenen Videos
+    in den Speicher geladen werden und ein Start mit vielen bekannten Videos kaum Zeit kostet.
+
+    Histogramm-Matrizen werden als float32 abgelegt, Hashes als uint64. Ändert sich eine Datei, wird ihr
+    Eintrag neu angehängt; flush verdichtet die Spalten, sobald mehr als die Hälfte der Zeilen veraltet ist.
+    """
+
+    def __init__(self, verzeichnis=None):
+        self.verzeichnis = verzeichnis or standard_speicher_verzeichnis()
+        os.makedirs(self.verzeichnis, exist_ok=True)
+        self._lock = threading.Lock()
+        self._tabellen = {}
+
+    def _tabelle(self, optionen):
+        schluessel = parameter_schluessel(optionen)
+        if schluessel not in self._tabellen:
+            self._tabellen[schluessel] = _Tabelle(self.verzeichnis, schluessel)
+        return self._tabellen[schluessel]
+
+    def hole(self, video_pfad, optionen):
+        """Liefert (Signatur-Matrix als memmap-Sicht, metadaten) oder None, falls kein gültiger Eintrag existiert."""
+        identitaet = datei_identitaet(video_pfad)
+        if identitaet is None:
+            return None
+        with self._lock:
+            return self._tabelle(optionen).hole(*identitaet)
+
+    def speichere(self, video_pfad, optionen, matrix, metadaten):
+        """Hängt die Signatur-Matrix und die Metadaten eines Videos an; der Index wird erst mit flush geschrieben."""
+        identitaet = datei_identitaet(video_pfad)
+        if identitaet is None:
+            return
+        matrix = np.asarray(matrix)
+        if matrix.dtype != np.uint64:
+            matrix = matrix.astype(np.float32)
+        with self._lock:
+            try:
+                self._tabelle(optionen).haenge_an(*identitaet, matrix, metadaten or {})
+            except OSError as e:
+                print(f"Warnung: Signaturen für {video_pfad} konnten nicht gespeichert werden: {e}")
+
+    def flush(self):
+        """Schreibt geänderte Indizes und verdichtet Spalten mit überwiegend veralteten Zeilen."""
+        with self._lock:
+            for tabelle in self._tabellen.values():
+                try:
+                    if tabelle.zeilen > 2 * tabelle.belegte_zeilen():
+                        tabelle.verdichte()
+                    elif tabelle.geaendert:
+                        tabelle.schreibe_index()
+                except OSError as e:
+                    print(f"Warnung: Signatur-Speicher konnte nicht geschrieben werden: {e}")
@@ -0,0 +1,114 @@
+# synthetische_videos.py
+"""
+Erzeugt deterministische synthetische Testvideos mit cv2.VideoWriter, ohne echtes Bildmaterial.
+
+Ein Video besteht aus Szenen mit eigener Hintergrundfarbe und bewegten Formen; harte Schnitte zwischen
+den Szenen sind die Szenenwechsel, die extrahiere_keyframe_histogramme finden soll. Da die Frames aus
+einer Szenenbeschreibung berechnet werden, lassen sich Near-Duplicate-Varianten (neu kodiert, skaliert,
+gekürzt, farbverschoben) aus derselben Beschreibung erzeugen.
+"""
+import os
+
+import cv2
+import numpy as np
+
+
+def erzeuge_szenen(seed, dauer_sekunden, schnitte_pro_minute):
+    """Liefert eine deterministische Liste von Szenen (Startzeit, Farben, Formen) für ein Video."""
+    rng = np.random.default_rng(seed)
+    anzahl = max(1, int(round(dauer_sekunden / 60.0 * schnitte_pro_minute)))
+    grenzen = np.sort(rng.uniform(0, dauer_sekunden, anzahl - 1)) if anzahl > 1 else np.array([])
+    szenen = []
+    for start in np.concatenate(([0.0], grenzen)):
+        szenen.append({
+            'start': float(start),
+            'hintergrund': rng.integers(0, 256, 3).tolist(),
+            'formen': [{
+                'farbe': rng.integers(0, 256, 3).tolist(),
+                'position': rng.uniform(0.1, 0.9, 2).tolist(),
+                'geschwindigkeit': rng.uniform(-0.2, 0.2, 2).tolist(),
+                'radius': float(rng.uniform(0.05, 0.2)),
+                'kreis': bool(rng.integers(0, 2)),
+            } for _ in range(int(rng.integers(2, 6)))],
+        })
+    return szenen
+
+
+def zeichne_frame(szenen, zeit, breite, hoehe, farbverschiebung=(0, 0, 0)):
+    """Berechnet den Frame zum Zeitpunkt zeit (Sekunden) als BGR-Bild."""
+    szene = szenen[0]
+    for kandidat in szenen:
+        if kandidat['start'] <= zeit:
+            szene = kandidat
+    frame = np.empty((hoehe, breite, 3), dtype=np.uint8)
+    frame[:] = szene['hintergrund']
+    t = zeit - szene['start']
+    for form in szene['formen']:
+        x = (form['position'][0] + form['geschwindigkeit'][0] * t) % 1.0
+        y = (form['position'][1] + form['geschwindigkeit'][1] * t) % 1.0
+        mitte = (int(x * breite), int(y * hoehe))
+        radius = max(1, int(form['radius'] * min(breite, hoehe)))
+        if form['kreis']:
+            cv2.circle(frame, mitte, radius, form['farbe'], -1)
+        else:
+            cv2.rectangle(frame, (mitte[0] - radius, mitte[1] - radius), (mitte[0] + radius, mitte[1] + radius), form['farbe'], -1)
+    if any(farbverschiebung):
+        frame = np.clip(frame.astype(np.int16) + np.array(farbverschiebung, dtype=np.int16), 0, 255).astype(np.uint8)
+    return frame
+
+
+def schreibe_video(pfad, szenen, dauer_sekunden, breite, hoehe, fps=25, codec="MJPG", start_sekunden=0.0, farbverschiebung=(0, 0, 0)):
+    """Schreibt ein Video aus der Szenenbeschreibung; liefert den Pfad oder None, falls der Codec fehlt."""
+    writer = cv2.VideoWriter(pfad, cv2.VideoWriter_fourcc(*codec), fps, (breite, hoehe))
+    if not writer.isOpened():
+        return None
+    try:
+        for i in range(int(round((dauer_sekunden - start_sekunden) * fps))):
+            writer.write(zeichne_frame(szenen, start_sekunden + i / fps, breite, hoehe, farbverschiebung))
+    finally:
+        writer.release()
+    return pfad
+
+
+# Near-Duplicate-Varianten: Name -> Abweichungen gegenüber dem Original
+VARIANTEN = {
+    'neu_kodiert': {'codec': 'mp4v', 'endung': '.mp4'},
+    'skaliert': {'skalierung': 0.5},
+    'gekuerzt': {'kuerzung': 0.2},
+    'farbverschoben': {'farbverschiebung': (12, -8, 6)},
+}
+
+
+def erzeuge_korpus(verzeichnis, konfigurationen, varianten=True, fps=25, seed=0):
+    """
+    Erzeugt für jede Konfiguration (Dict mit breite, hoehe, dauer, schnitte_pro_minute) ein Original
+    und optional die Near-Duplicate-Varianten. Liefert eine Liste von Dicts mit 'pfad', 'original'
+    (Pfad des Originals) und 'variante' (None für Originale). Bereits vorhandene Dateien werden wiederverwendet.
+    """
+    os.makedirs(verzeichnis, exist_ok=True)
+    korpus = []
+    for nummer, konfiguration in enumerate(konfigurationen):
+        breite, hoehe, dauer = konfiguration['breite'], konfiguration['hoehe'], konfiguration['dauer']
+        szenen = erzeuge_szenen(seed + nummer, dauer, konfiguration['schnitte_pro_minute'])
+        name = f"video{nummer:03d}_{breite}x{hoehe}_{dauer}s_{konfiguration['schnitte_pro_minute']}spm"
+        original = os.path.join(verzeichnis, name + ".avi")
+        if not os.path.exists(original):
+            schreibe_video(original, szenen, dauer, breite, hoehe, fps)
+        korpus.append({'pfad': original, 'original': original, 'variante': None, **konfiguration})
+        if not varianten:
+            continue
+
+        for variante, abweichung in VARIANTEN.items():
+            pfad = os.path.join(verzeichnis, f"{name}_{variante}{abweichung.get('endung', '.avi')}")
+            skalierung = abweichung.get('skalierung', 1.0)
+            if not os.path.exists(pfad):
+                pfad = schreibe_video(
+                    pfad, szenen, dauer,
+                    max(16, int(breite * skalierung)) // 2 * 2, max(16, int(hoehe * skalierung)) // 2 * 2,
+                    fps, codec=abweichung.get('codec', 'MJPG'),
+                    start_sekunden=dauer * abweichung.get('kuerzung', 0.0),
+                    farbverschiebung=abweichung.get('farbverschiebung', (0, 0, 0))
+                )
+            if pfad:
+                korpus.append({'pfad': pfad, 'original': original, 'variante': variante, **konfiguration})
+    return korpus
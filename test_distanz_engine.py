@@ -0,0 +1,64 @@
+# test_distanz_engine.py
+import cv2
+import numpy as np
+import pytest
+
+from distanz_engine import grobe_matrix, hash_matrix, histogramm_matrix, vergleiche_matrizen
+
+TOLERANZ = 1e-6
+
+
+def _histogramme(rng, anzahl, leere=0):
+    histogramme = [rng.random((512, 1)).astype(np.float32) ** 4 for _ in range(anzahl)]
+    histogramme += [np.zeros((512, 1), dtype=np.float32) for _ in range(leere)]
+    return histogramme
+
+
+def _referenz(histogramme1, histogramme2):
+    """Paarweise cv2.compareHist wie vor der Vektorisierung: Mittelwert der Minima in beide Richtungen."""
+    distanzen = np.array([[cv2.compareHist(h1, h2, cv2.HISTCMP_BHATTACHARYYA) for h2 in histogramme2] for h1 in histogramme1])
+    return float(np.mean(np.concatenate((distanzen.min(axis=1), distanzen.min(axis=0))))), distanzen
+
+
+@pytest.mark.parametrize("anzahl1, anzahl2, leere1, leere2", [(1, 1, 0, 0), (7, 4, 0, 0), (5, 6, 1, 0), (3, 3, 2, 2), (0, 0, 1, 1)])
+def test_entspricht_compare_hist(anzahl1, anzahl2, leere1, leere2):
+    rng = np.random.default_rng(anzahl1 * 10 + anzahl2)
+    histogramme1 = _histogramme(rng, anzahl1, leere1)
+    histogramme2 = _histogramme(rng, anzahl2, leere2)
+    erwartet, distanzen = _referenz(histogramme1, histogramme2)
+
+    mittelwert, (index1, index2) = vergleiche_matrizen(histogramm_matrix(histogramme1), histogramm_matrix(histogramme2), mit_bestem_paar=True)
+    assert mittelwert == pytest.approx(erwartet, abs=TOLERANZ)
+    assert distanzen[index1, index2] == pytest.approx(distanzen.min(), abs=TOLERANZ)
+
+
+def test_identische_histogramme_haben_distanz_null():
+    histogramme = _histogramme(np.random.default_rng(1), 5)
+    matrix = histogramm_matrix(histogramme)
+    assert vergleiche_matrizen(matrix, matrix) == pytest.approx(0.0, abs=TOLERANZ)
+
+
+def test_ohne_keyframes():
+    matrix = histogramm_matrix(_histogramme(np.random.default_rng(2), 3))
+    assert vergleiche_matrizen(matrix, histogramm_matrix([])) is None
+
+
+def test_abbruch_schwelle_exakt_bis_zur_schwelle():
+    rng = np.random.default_rng(3)
+    matrix1 = histogramm_matrix(_histogramme(rng, 40))
+    matrix2 = histogramm_matrix(_histogramme(rng, 30))
+    exakt = vergleiche_matrizen(matrix1, matrix2, mit_bestem_paar=True)
+    oberhalb = vergleiche_matrizen(matrix1, matrix2, mit_bestem_paar=True, abbruch_schwelle=exakt[0] + 1e-6,
+                                   grob1=grobe_matrix(matrix1), grob2=grobe_matrix(matrix2))
+    assert oberhalb[0] == pytest.approx(exakt[0], abs=TOLERANZ)
+    assert oberhalb[1] == exakt[1]
+    assert vergleiche_matrizen(matrix1, matrix2, mit_bestem_paar=True, abbruch_schwelle=exakt[0] - 1e-3) == (np.inf, None)
+
+
+def test_hamming_distanz():
+    rng = np.random.default_rng(4)
+    hashes1 = [int(wert) for wert in rng.integers(0, 2 ** 63, size=6)]
+    hashes2 = [int(wert) for wert in rng.integers(0, 2 ** 63, size=4)]
+    distanzen = np.array([[bin(h1 ^ h2).count("1") / 64 for h2 in hashes2] for h1 in hashes1])
+    erwartet = np.mean(np.concatenate((distanzen.min(axis=1), distanzen.min(axis=0))))
+    assert vergleiche_matrizen(hash_matrix(hashes1), hash_matrix(hashes2)) == pytest.approx(erwartet, abs=TOLERANZ)
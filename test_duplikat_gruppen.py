@@ -0,0 +1,65 @@
+# test_duplikat_gruppen.py
+import pytest
+
+from duplikat_gruppen import UnionFind, bilde_gruppen, gruppen_paare, naechste_distanzen
+from synthetische_videos import erzeuge_korpus
+from video_vergleich import vergleiche_videos
+
+SCHWELLE = 0.3
+
+
+def test_transitive_kette_ergibt_eine_gruppe():
+    # a-b und b-c sind ähnlich, a-c nicht: alle drei gehören trotzdem zu einer Gruppe
+    ergebnisse = {("a", "b"): [0.1, (0, 0)], ("b", "c"): [0.2, (0, 0)], ("a", "c"): [0.9, (0, 0)], ("c", "d"): [0.5, (0, 0)]}
+    assert bilde_gruppen(ergebnisse, SCHWELLE, ["a", "b", "c", "d"]) == [["a", "b", "c"]]
+
+
+def test_schwelle_gilt_einschliesslich():
+    ergebnisse = {("a", "b"): [SCHWELLE, (0, 0)], ("c", "d"): [SCHWELLE + 1e-9, (0, 0)]}
+    assert bilde_gruppen(ergebnisse, SCHWELLE, ["a", "b", "c", "d"]) == [["a", "b"]]
+
+
+def test_paare_ohne_keyframes_werden_ignoriert():
+    assert bilde_gruppen({("a", "b"): []}, SCHWELLE, ["a", "b"]) == []
+
+
+def test_reihenfolge_folgt_video_pfaden():
+    ergebnisse = {("d", "a"): [0.1, (0, 0)], ("c", "b"): [0.1, (0, 0)]}
+    assert bilde_gruppen(ergebnisse, SCHWELLE, ["b", "d", "a", "c"]) == [["b", "c"], ["d", "a"]]
+
+
+def test_vertreter_ist_wurzel_der_groesseren_gruppe():
+    union_find = UnionFind(["a", "b", "c", "d"])
+    assert union_find.vereinige("a", "b") == "a"
+    # Gleich groß: der Vertreter des ersten Elements bleibt
+    assert union_find.vereinige("c", "d") == "c"
+    union_find.fuege_hinzu("e")
+    # Die kleinere Gruppe wird unter die größere gehängt, egal in welcher Reihenfolge
+    assert union_find.vereinige("e", "b") == "a"
+    assert union_find.vereinige("d", "a") == "a"
+    assert {union_find.finde(element) for element in "abcde"} == {"a"}
+    assert union_find.gruppen() == {"a": ["a", "b", "c", "d", "e"]}
+
+
+def test_gruppen_paare_und_naechste_distanzen():
+    ergebnisse = {("a", "b"): [0.2, (0, 0)], ("b", "c"): [0.1, (0, 0)], ("a", "x"): [0.05, (0, 0)], ("a", "c"): []}
+    assert gruppen_paare(["a", "b", "c"], ergebnisse) == {("a", "b"): [0.2, (0, 0)], ("b", "c"): [0.1, (0, 0)], ("a", "c"): []}
+    assert naechste_distanzen(["a", "b", "c", "d"], ergebnisse) == {"a": 0.2, "b": 0.1, "c": 0.1, "d": None}
+
+
+@pytest.fixture(scope="module")
+def korpus(tmp_path_factory):
+    konfigurationen = [{'breite': 64, 'hoehe': 48, 'dauer': 6, 'schnitte_pro_minute': 40},
+                       {'breite': 64, 'hoehe': 48, 'dauer': 6, 'schnitte_pro_minute': 60}]
+    return [eintrag['pfad'] for eintrag in erzeuge_korpus(str(tmp_path_factory.mktemp("korpus")), konfigurationen)]
+
+
+def test_vergleich_mit_vertreter_findet_dieselben_gruppen(korpus):
+    alle_paare = vergleiche_videos(korpus, identische_zusammenfassen=False)
+    mit_vertreter = vergleiche_videos(korpus, identische_zusammenfassen=False, gruppen_schwelle=SCHWELLE)
+
+    assert bilde_gruppen(mit_vertreter, SCHWELLE, korpus) == bilde_gruppen(alle_paare, SCHWELLE, korpus)
+    assert len(mit_vertreter) < len(alle_paare)
+    # Verglichene Paare haben dieselbe Distanz wie im vollständigen Lauf
+    for paar, ergebnis in mit_vertreter.items():
+        assert ergebnis[0] == pytest.approx(alle_paare[paar][0])
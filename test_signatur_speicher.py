@@ -0,0 +1,65 @@
+# test_signatur_speicher.py
+import os
+
+import numpy as np
+
+from signatur_speicher import SignaturSpeicher
+
+OPTIONEN = {'signatur_typ': 'histogramm'}
+
+
+def _video(verzeichnis, name, inhalt):
+    pfad = os.path.join(verzeichnis, name)
+    with open(pfad, "wb") as f:
+        f.write(inhalt)
+    return pfad
+
+
+def _signaturen(wert, anzahl):
+    return np.full((anzahl, 4), wert, dtype=np.float32), {'frame_index': list(range(wert * 100, wert * 100 + anzahl))}
+
+
+def test_speichern_und_holen(tmp_path):
+    video = _video(tmp_path, "a.avi", b"a")
+    speicher = SignaturSpeicher(str(tmp_path / "speicher"))
+    speicher.speichere(video, OPTIONEN, *_signaturen(1, 3))
+    speicher.flush()
+
+    matrix, metadaten = SignaturSpeicher(str(tmp_path / "speicher")).hole(video, OPTIONEN)
+    np.testing.assert_array_equal(matrix, _signaturen(1, 3)[0])
+    assert metadaten == _signaturen(1, 3)[1]
+
+
+def test_ohne_index_keine_fremden_zeilen(tmp_path):
+    # Absturz vor flush: die Spalten enthalten Zeilen, zu denen es keinen Index gibt
+    video_a = _video(tmp_path, "a.avi", b"a")
+    video_b = _video(tmp_path, "b.avi", b"b")
+    SignaturSpeicher(str(tmp_path / "speicher")).speichere(video_a, OPTIONEN, *_signaturen(1, 3))
+
+    speicher = SignaturSpeicher(str(tmp_path / "speicher"))
+    assert speicher.hole(video_a, OPTIONEN) is None
+    speicher.speichere(video_b, OPTIONEN, *_signaturen(2, 2))
+    speicher.flush()
+
+    for speicher in (speicher, SignaturSpeicher(str(tmp_path / "speicher"))):
+        matrix, metadaten = speicher.hole(video_b, OPTIONEN)
+        np.testing.assert_array_equal(matrix, _signaturen(2, 2)[0])
+        assert metadaten == _signaturen(2, 2)[1]
+
+
+def test_unlesbarer_index_verwirft_spalten(tmp_path):
+    video_a = _video(tmp_path, "a.avi", b"a")
+    video_b = _video(tmp_path, "b.avi", b"b")
+    speicher = SignaturSpeicher(str(tmp_path / "speicher"))
+    speicher.speichere(video_a, OPTIONEN, *_signaturen(1, 3))
+    speicher.flush()
+    for name in os.listdir(tmp_path / "speicher"):
+        if name.endswith(".json"):
+            (tmp_path / "speicher" / name).write_text("{kaputt", encoding="utf-8")
+
+    speicher = SignaturSpeicher(str(tmp_path / "speicher"))
+    speicher.speichere(video_b, OPTIONEN, *_signaturen(2, 2))
+    speicher.flush()
+    matrix, metadaten = SignaturSpeicher(str(tmp_path / "speicher")).hole(video_b, OPTIONEN)
+    np.testing.assert_array_equal(matrix, _signaturen(2, 2)[0])
+    assert metadaten == _signaturen(2, 2)[1]
@@ -0,0 +1,86 @@
+# test_video_vergleich.py
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from bibliothek_index import BibliothekIndex
+from synthetische_videos import erzeuge_korpus, erzeuge_szenen, schreibe_video
+from video_vergleich import (_extrahiere_abschnitt, _fuege_abschnitte_zusammen, extrahiere_keyframe_histogramme, normalisiere_extraktions_optionen,
+                             plane_abschnitte, vergleiche_inkrementell, vergleiche_videos)
+
+KONFIGURATIONEN = [
+    {'breite': 96, 'hoehe': 64, 'dauer': 16, 'schnitte_pro_minute': 30},
+    {'breite': 80, 'hoehe': 48, 'dauer': 12, 'schnitte_pro_minute': 90},
+]
+
+OPTIONEN = [
+    {},
+    {'modus': 'jeder_n', 'schritt': 3},
+    {'modus': 'intervall', 'intervall_sekunden': 0.5},
+    {'analyse_groesse': [32, 24]},
+    {'signatur_typ': 'dhash'},
+    {'max_keyframes': 4},
+    {'quantisierung': 'uint8', 'schwellwert': 10},
+]
+
+
+@pytest.fixture(scope="module")
+def videos(tmp_path_factory):
+    return [eintrag['pfad'] for eintrag in erzeuge_korpus(str(tmp_path_factory.mktemp("videos")), KONFIGURATIONEN, varianten=False)]
+
+
+@pytest.mark.parametrize("optionen", OPTIONEN)
+@pytest.mark.parametrize("abschnitt_sekunden", [1.5, 2.7, 5])
+def test_abschnitte_wie_serieller_durchlauf(videos, optionen, abschnitt_sekunden):
+    optionen = normalisiere_extraktions_optionen(optionen)
+    for video in videos:
+        bereiche = plane_abschnitte(video, abschnitt_sekunden)
+        assert bereiche and len(bereiche) >= 2
+        abschnitte = [_extrahiere_abschnitt(video, start, ende, optionen) for start, ende in bereiche]
+        histogramme, metadaten = _fuege_abschnitte_zusammen(video, abschnitte, optionen)
+
+        erwartet, erwartete_metadaten = extrahiere_keyframe_histogramme(video, **optionen, mit_metadaten=True)
+        assert metadaten == erwartete_metadaten
+        np.testing.assert_array_equal(np.asarray(histogramme), np.asarray(erwartet))
+
+
+def test_kurzes_video_wird_nicht_geteilt(videos):
+    assert plane_abschnitte(videos[0], 10) is None
+
+
+def _ungeordnet(ergebnisse, schwelle=None):
+    """Paare ohne Reihenfolge der Videos, optional nur bis schwelle, mit gerundeter Distanz."""
+    return {frozenset(paar): round(ergebnis[0], 9) for paar, ergebnis in ergebnisse.items()
+            if ergebnis and (schwelle is None or ergebnis[0] <= schwelle)}
+
+
+def test_inkrementell_wie_vollstaendiger_scan(tmp_path):
+    konfigurationen = [{'breite': 64, 'hoehe': 48, 'dauer': 5, 'schnitte_pro_minute': 40},
+                       {'breite': 64, 'hoehe': 48, 'dauer': 5, 'schnitte_pro_minute': 70}]
+    korpus = [eintrag['pfad'] for eintrag in erzeuge_korpus(str(tmp_path / "korpus"), konfigurationen)]
+    bibliothek = str(tmp_path / "bibliothek")
+    os.makedirs(bibliothek)
+    videos = [shutil.copy(pfad, bibliothek) for pfad in korpus]
+    optionen = normalisiere_extraktions_optionen()
+    speicher_schwelle = 0.5
+
+    index = BibliothekIndex(str(tmp_path / "index.sqlite"))
+    try:
+        vergleiche_inkrementell(videos[:7], index, speicher_schwelle=speicher_schwelle)
+
+        # Ein Video gelöscht, eines mit neuem Inhalt überschrieben, drei neu hinzugekommen
+        os.remove(videos[1])
+        geaendert = videos[4]
+        schreibe_video(geaendert, erzeuge_szenen(99, 5, 50), 5, 64, 48)
+        aktuell = [pfad for pfad in videos if pfad != videos[1]]
+        neu_oder_geaendert = {geaendert, *videos[7:]}
+        neue_ergebnisse = vergleiche_inkrementell(aktuell, index, speicher_schwelle=speicher_schwelle)
+        gespeichert = index.ergebnisse(aktuell, optionen, schwelle=speicher_schwelle)
+    finally:
+        index.schliesse()
+
+    vollstaendig = vergleiche_videos(aktuell)
+    assert _ungeordnet(neue_ergebnisse) == {paar: distanz for paar, distanz in _ungeordnet(vollstaendig).items() if paar & neu_oder_geaendert}
+    assert _ungeordnet(gespeichert) == _ungeordnet(vollstaendig, speicher_schwelle)
@@ -0,0 +1,1092 @@
+# video_vergleich.py
+"""Keyframe-Extraktion und Videovergleich ohne Abhängigkeit von tkinter (genutzt von GUI und Kommandozeile)."""
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from collections import deque
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from distanz_engine import diverse_auswahl, grobe_matrix, quantisiere_histogramm, signatur_matrix, vergleiche_matrizen
+from duplikat_gruppen import UnionFind
+from identische_dateien import finde_identische_dateien
+from instrumentierung import Messung, StufenZeiten
+from kandidaten_index import KandidatenIndex, globaler_deskriptor
+from scan_checkpoint import ScanCheckpoint
+
+STANDARD_EXTRAKTIONS_OPTIONEN = {
+    'schwellwert': 20,
+    'bins': [8, 8, 8],
+    'ranges': [0, 256, 0, 256, 0, 256],
+    'modus': 'alle',
+    'schritt': 1,
+    'intervall_sekunden': 1.0,
+    'analyse_groesse': None,
+    'signatur_typ': 'histogramm',
+    'max_keyframes': None,
+    'quantisierung': None,
+}
+
+# 'histogramm': 8x8x8-Farbhistogramm (512 float32), 'dhash': 64-Bit-Differenz-Hash des Graubilds (uint64)
+SIGNATUR_TYPEN = ('histogramm', 'dhash')
+
+# Voreingestellte Ähnlichkeitsschwelle pro Signaturtyp. dHash-Distanzen fallen deutlich kleiner aus (unverwandte Videos
+# liegen im Benchmark-Korpus bei etwa 0.22-0.3), mit der Histogramm-Schwelle wäre dort fast jedes Paar ein Treffer.
+STANDARD_SCHWELLEN = {'histogramm': 0.3, 'dhash': 0.15}
+
+# Inkrementeller Scan: so viele neue Videos werden gemeinsam gegen den einzeln aus dem Index geladenen Bestand verglichen
+NEUE_VIDEOS_PRO_DURCHLAUF = 256
+
+
+def normalisiere_extraktions_optionen(optionen=None):
+    """Ergänzt fehlende Extraktionsparameter um die Standardwerte."""
+    normalisiert = dict(STANDARD_EXTRAKTIONS_OPTIONEN)
+    if optionen:
+        normalisiert.update({name: wert for name, wert in optionen.items() if wert is not None})
+    return normalisiert
+
+
+def extrahiere_keyframe_histogramme(video_pfad, schwellwert=20, bins=None, ranges=None, progress_callback=None, status_callback=None, mit_metadaten=False,
+                                    modus='alle', schritt=1, intervall_sekunden=1.0, analyse_groesse=None, steuerung=None, messung=None,
+                                    signatur_typ='histogramm', max_keyframes=None, quantisierung=None, pipeline=False, decoder_threads=None):
+    """
+    Extrahiert Keyframes aus einem Video und gibt deren Farbhistogramme als NumPy-Arrays zurück.
+    Mit signatur_typ='dhash' wird statt des Histogramms ein 64-Bit-Differenz-Hash (np.uint64) pro Keyframe geliefert.
+    Mit max_keyframes wird das Video auf höchstens so viele möglichst verschiedene Keyframes reduziert;
+    quantisierung ('float16' oder 'uint8') legt die Histogramme kompakter ab (siehe reduziere_keyframes).
+    modus bestimmt, welche Frames analysiert werden: 'alle', 'jeder_n' (jeder schritt-te Frame) oder
+    'intervall' (ein Frame alle intervall_sekunden). Übersprungene Frames werden nur per cap.grab()
+    weitergeschaltet, nicht abgerufen. Mit analyse_groesse=(breite, hoehe) laufen Szenenwechsel-Test
+    und calcHist auf einem verkleinerten Frame.
+    Mit mit_metadaten=True wird zusätzlich ein Dict mit Frame-Index ('frame_indizes') und Zeitstempel in
+    Sekunden ('zeitstempel') jedes Keyframes zurückgegeben (oder None, falls das Video nicht geöffnet werden konnte).
+    Mit einer ScanSteuerung wird pro Frame auf Pause und Abbruch geprüft (ScanAbgebrochen).
+    Mit einer Messung werden Zeit und Aufrufe der Stufen (grab, decode, resize, cvtColor, absdiff, calcHist) erfasst.
+    Mit pipeline=True dekodiert ein eigener Thread die Frames in einen kleinen Pufferpool voraus, während
+    dieser Thread sie analysiert (siehe _lese_frames_parallel); das Ergebnis ist identisch.
+    decoder_threads begrenzt die Threads des Video-Decoders (CAP_PROP_N_THREADS, sofern vom Backend unterstützt).
+    """
+    if ranges is None:
+        ranges = [0, 256, 0, 256, 0, 256]
+    if bins is None:
+        bins = [8, 8, 8]
+
+    zeiten = messung.video(video_pfad) if messung else None
+    if zeiten is not None:
+        t = time.perf_counter()
+    if decoder_threads:
+        cap = cv2.VideoCapture(video_pfad, cv2.CAP_ANY, [cv2.CAP_PROP_N_THREADS, int(decoder_threads)])
+    else:
+        cap = cv2.VideoCapture(video_pfad)
+    if zeiten is not None:
+        zeiten.erfasse('oeffnen', t)
+    if not cap.isOpened():
+        print(f"Fehler: Konnte Video nicht öffnen: {video_pfad}")
+        return ([], None) if mit_metadaten else []
+
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    schritt = _abtast_schritt(modus, schritt, intervall_sekunden, fps)
+
+    if pipeline:
+        frames = _lese_frames_parallel(cap, frame_count, schritt, fps <= 0, zeiten)
+    else:
+        frames = _lese_frames(cap, frame_count, schritt, fps <= 0, zeiten)
+    try:
+        analyse = _analysiere_frames(frames, fps, frame_count, schwellwert, bins, ranges, signatur_typ, quantisierung, analyse_groesse, zeiten, steuerung,
+                                     progress_callback)
+    finally:
+        # Beendet bei Abbruch auch den Dekodier-Thread, bevor das Video geschlossen wird
+        frames.close()
+        cap.release()
+
+    histogramme = analyse['histogramme']
+    if zeiten is not None:
+        zeiten.zaehle('dekodierte_frames', analyse['letzter_index'] + 1)
+        zeiten.zaehle('analysierte_frames', analyse['analysierte_frames'])
+        zeiten.zaehle('keyframes', len(histogramme))
+
+    metadaten = {'frame_indizes': analyse['frame_indizes'], 'zeitstempel': analyse['zeitstempel']}
+    anzahl_gefunden = len(histogramme)
+    if max_keyframes and anzahl_gefunden > max_keyframes:
+        if zeiten is not None:
+            t = time.perf_counter()
+        histogramme, metadaten = reduziere_keyframes(histogramme, metadaten, max_keyframes, signatur_typ)
+        if zeiten is not None:
+            zeiten.erfasse('auswahl', t)
+
+    if status_callback:
+        if len(histogramme) < anzahl_gefunden:
+            status_callback(f"Keyframes extrahiert: {anzahl_gefunden}, davon {len(histogramme)} repräsentative behalten")
+        else:
+            status_callback(f"Keyframes extrahiert: {len(histogramme)}")
+
+    if mit_metadaten:
+        return histogramme, metadaten
+    return histogramme
+
+
+def _abtast_schritt(modus, schritt, intervall_sekunden, fps):
+    """Liefert den Abstand der analysierten Frames für den Abtastmodus."""
+    if modus == 'intervall':
+        return max(1, int(round(intervall_sekunden * fps))) if fps > 0 else 1
+    if modus == 'jeder_n':
+        return max(1, int(schritt))
+    return 1
+
+
+def _analysiere_frames(frames, fps, frame_count, schwellwert, bins, ranges, signatur_typ, quantisierung, analyse_groesse, zeiten, steuerung,
+                       progress_callback, referenz=None, synchron_indizes=None):
+    """
+    Szenenwechsel-Erkennung über die Frames aus _lese_frames bzw. _lese_frames_parallel: Ein Frame ist ein Keyframe,
+    wenn sich sein Graubild im Mittel um mehr als schwellwert vom letzten Keyframe unterscheidet.
+
+    referenz ist das Graubild des letzten Keyframes vor dem ersten gelieferten Frame; ohne referenz ist der
+    erste analysierte Frame ein Keyframe. Mit synchron_indizes endet die Analyse nach dem ersten Keyframe,
+    dessen Frame-Index darin enthalten ist (siehe _fuege_abschnitte_zusammen).
+    Liefert ein Dict mit histogramme, frame_indizes, zeitstempel, referenz (Graubild des letzten Keyframes),
+    letzter_index, analysierte_frames und synchron_index (None, falls nicht synchronisiert).
+    """
+    analyse_groesse = tuple(analyse_groesse) if analyse_groesse else None
+    histogramme = []
+    frame_indizes = []
+    zeitstempel = []
+    # Kopie, da der Referenzpuffer beim nächsten Keyframe als grauer Puffer wiederverwendet wird
+    letzter_grauer_frame = referenz.copy() if referenz is not None else None
+    # Wiederverwendete Puffer statt einer Neuallokation pro Frame; der graue Puffer wird bei jedem Keyframe
+    # mit dem Referenzframe getauscht, da dieser bis zum nächsten Szenenwechsel erhalten bleiben muss
+    grauer_puffer = None
+    differenz_puffer = None
+    verkleinert_puffer = None
+    letzter_index = -1
+    analysierte_frames = 0
+    synchron_index = None
+
+    for i, aktueller_frame, position_ms in frames:
+        if steuerung:
+            steuerung.pruefe()
+        letzter_index = i
+        if aktueller_frame is None:
+            # Übersprungener Frame: nur weitergeschaltet, nicht abgerufen
+            if progress_callback and frame_count > 0:
+                progress_callback(i / frame_count * 0.5)
+            continue
+
+        analysierte_frames += 1
+        if zeiten is not None:
+            t = time.perf_counter()
+        if analyse_groesse:
+            aktueller_frame = verkleinert_puffer = cv2.resize(aktueller_frame, analyse_groesse, dst=verkleinert_puffer, interpolation=cv2.INTER_AREA)
+            if zeiten is not None:
+                t = zeiten.erfasse('resize', t)
+
+        grauer_aktueller_frame = grauer_puffer = cv2.cvtColor(aktueller_frame, cv2.COLOR_BGR2GRAY, dst=grauer_puffer)
+        if zeiten is not None:
+            t = zeiten.erfasse('cvtColor', t)
+
+        if letzter_grauer_frame is None:
+            szenenwechsel = True
+        else:
+            differenz_puffer = cv2.absdiff(grauer_aktueller_frame, letzter_grauer_frame, dst=differenz_puffer)
+            szenenwechsel = np.mean(differenz_puffer) > schwellwert
+            if zeiten is not None:
+                t = zeiten.erfasse('absdiff', t)
+
+        if szenenwechsel:
+            if signatur_typ == 'dhash':
+                histogramme.append(dhash(grauer_aktueller_frame))
+                if zeiten is not None:
+                    zeiten.erfasse('dHash', t)
+            else:
+                histogramme.append(quantisiere_histogramm(cv2.calcHist([aktueller_frame], [0, 1, 2], None, bins, ranges).flatten(), quantisierung))
+                if zeiten is not None:
+                    zeiten.erfasse('calcHist', t)
+            frame_indizes.append(i)
+            zeitstempel.append(i / fps if fps > 0 else position_ms / 1000.0)
+            letzter_grauer_frame, grauer_puffer = grauer_aktueller_frame, letzter_grauer_frame
+            if synchron_indizes is not None and i in synchron_indizes:
+                synchron_index = i
+                break
+
+        if progress_callback and frame_count > 0:
+            progress_callback(i / frame_count * 0.5)
+
+    return {
+        'histogramme': histogramme,
+        'frame_indizes': frame_indizes,
+        'zeitstempel': zeitstempel,
+        'referenz': letzter_grauer_frame,
+        'letzter_index': letzter_index,
+        'analysierte_frames': analysierte_frames,
+        'synchron_index': synchron_index,
+    }
+
+
+# Anzahl der Frame-Puffer, die der Dekodier-Thread im Pipeline-Modus vorausliest
+PIPELINE_PUFFER = 4
+
+_ENDE = object()
+
+
+def _lese_frames(cap, frame_count, schritt, mit_position, zeiten, start=0):
+    """
+    Liefert (index, frame, position_ms) für jeden Frame von start bis frame_count (cap muss bereits auf start
+    stehen); übersprungene Frames (index % schritt != 0) werden nur per grab() weitergeschaltet und mit
+    frame=None geliefert. Der Frame-Puffer wird wiederverwendet und ist nur bis zum nächsten Schritt gültig.
+    position_ms wird nur mit mit_position abgefragt.
+    """
+    puffer = None
+    for i in range(start, frame_count):
+        if zeiten is not None:
+            t = time.perf_counter()
+        if i % schritt:
+            if not cap.grab():
+                return
+            if zeiten is not None:
+                zeiten.erfasse('grab', t)
+            yield i, None, None
+            continue
+        ret, frame = cap.read(puffer)
+        if not ret:
+            return
+        puffer = frame
+        if zeiten is not None:
+            zeiten.erfasse('decode', t)
+        yield i, frame, cap.get(cv2.CAP_PROP_POS_MSEC) if mit_position else None
+
+
+def _lese_frames_parallel(cap, frame_count, schritt, mit_position, zeiten, puffer_anzahl=PIPELINE_PUFFER, start=0):
+    """
+    Wie _lese_frames, aber ein Dekodier-Thread liest voraus, während der Aufrufer analysiert (cap.read gibt den
+    GIL frei). Die Frames landen in puffer_anzahl wiederverwendeten Puffern; ein Puffer geht erst an den
+    Dekodier-Thread zurück, wenn der Aufrufer den nächsten Frame anfordert. Übersprungene Frames werden nicht geliefert.
+    Die Wartezeit des Aufrufers auf den Dekodier-Thread wird als Stufe 'warten' erfasst.
+    """
+    freie_puffer = queue.SimpleQueue()
+    for _ in range(puffer_anzahl):
+        freie_puffer.put(None)
+    gelesen = queue.SimpleQueue()
+    stopp = threading.Event()
+    dekodier_zeiten = StufenZeiten() if zeiten is not None else None
+    fehler = []
+
+    def dekodiere():
+        try:
+            for i in range(start, frame_count):
+                if stopp.is_set():
+                    return
+                if dekodier_zeiten is not None:
+                    t = time.perf_counter()
+                if i % schritt:
+                    if not cap.grab():
+                        return
+                    if dekodier_zeiten is not None:
+                        dekodier_zeiten.erfasse('grab', t)
+                    continue
+                # Wartet, bis der Aufrufer einen Puffer freigibt: begrenzt den Vorlauf
+                puffer = freie_puffer.get()
+                if stopp.is_set():
+                    return
+                if dekodier_zeiten is not None:
+                    t = time.perf_counter()
+                ret, frame = cap.read(puffer)
+                if not ret:
+                    return
+                if dekodier_zeiten is not None:
+                    dekodier_zeiten.erfasse('decode', t)
+                gelesen.put((i, frame, cap.get(cv2.CAP_PROP_POS_MSEC) if mit_position else None))
+        except Exception as e:
+            fehler.append(e)
+        finally:
+            gelesen.put(_ENDE)
+
+    dekodierer = threading.Thread(target=dekodiere, daemon=True)
+    dekodierer.start()
+    try:
+        while True:
+            if zeiten is not None:
+                t = time.perf_counter()
+            eintrag = gelesen.get()
+            if zeiten is not None:
+                zeiten.erfasse('warten', t)
+            if eintrag is _ENDE:
+                break
+            yield eintrag
+            freie_puffer.put(eintrag[1])
+    finally:
+        stopp.set()
+        freie_puffer.put(None)
+        dekodierer.join()
+        if zeiten is not None:
+            zeiten.addiere(dekodier_zeiten)
+    if fehler:
+        raise fehler[0]
+
+
+def dhash(grauer_frame):
+    """
+    Berechnet den 64-Bit-Differenz-Hash eines Graubilds: Verkleinern auf 9x8 Pixel, dann ein Bit pro
+    Pixelpaar, ob der rechte Nachbar heller ist. Ähnliche Bilder unterscheiden sich nur in wenigen Bits.
+    """
+    klein = cv2.resize(grauer_frame, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = klein[:, 1:] > klein[:, :-1]
+    return np.packbits(bits).view(">u8")[0].astype(np.uint64)
+
+
+def reduziere_keyframes(histogramme, metadaten, max_keyframes, signatur_typ='histogramm'):
+    """
+    Fasst ein Video auf höchstens max_keyframes repräsentative Keyframes zusammen (Diversitätsauswahl, siehe
+    distanz_engine.diverse_auswahl), damit Speicher und Paarvergleich unabhängig von der Videolänge begrenzt sind.
+    Die Metadaten werden auf dieselben Keyframes gekürzt; die Reihenfolge bleibt chronologisch.
+    """
+    if not max_keyframes or len(histogramme) <= max_keyframes:
+        return histogramme, metadaten
+    indizes = diverse_auswahl(signatur_matrix(histogramme, signatur_typ), max_keyframes)
+    histogramme = [histogramme[index] for index in indizes]
+    if metadaten is not None:
+        metadaten = {name: [werte[index] for index in indizes] for name, werte in metadaten.items()}
+    return histogramme, metadaten
+
+
+def _initialisiere_prozess(opencv_threads):
+    """Begrenzt die OpenCV-Threads eines Pool-Prozesses, damit mehrere Prozesse die Kerne nicht überbelegen."""
+    cv2.setNumThreads(opencv_threads)
+
+
+def _extrahiere_im_prozess(video_pfad, optionen, mit_messung=False, lauf_optionen=None):
+    """
+    Worker-Funktion für den Prozesspool; liegt auf Modulebene, damit sie gepickelt werden kann.
+    Liefert (histogramme, metadaten, messdaten), wobei messdaten die Stufenzeiten als Dict oder None sind.
+    """
+    messung = Messung() if mit_messung else None
+    histogramme, metadaten = extrahiere_keyframe_histogramme(video_pfad, **optionen, **(lauf_optionen or {}), mit_metadaten=True, messung=messung)
+    return histogramme, metadaten, messung.video(video_pfad).als_dict() if messung else None
+
+
+def _plane_oder_extrahiere(video_pfad, optionen, mit_messung=False, lauf_optionen=None, abschnitt_sekunden=None):
+    """
+    Worker-Funktion für den Prozesspool mit abschnitt_sekunden: Länge und Bildrate werden im Worker gelesen, nicht
+    vorab im Hauptprozess. Liefert ('abschnitte', bereiche) für ein aufzuteilendes Video (siehe plane_abschnitte),
+    sonst ('video', Ergebnis von _extrahiere_im_prozess).
+    """
+    bereiche = plane_abschnitte(video_pfad, abschnitt_sekunden)
+    if bereiche:
+        return 'abschnitte', bereiche
+    return 'video', _extrahiere_im_prozess(video_pfad, optionen, mit_messung, lauf_optionen)
+
+
+def _dateigroesse(pfad):
+    try:
+        return os.path.getsize(pfad)
+    except OSError:
+        return 0
+
+
+def plane_abschnitte(video_pfad, abschnitt_sekunden):
+    """
+    Teilt ein langes Video in Frame-Bereiche von etwa abschnitt_sekunden Länge auf, die parallel analysiert werden
+    können. Liefert eine Liste von (start, ende) oder None, wenn sich die Aufteilung nicht lohnt (kürzer als zwei
+    Abschnitte) oder Länge bzw. Bildrate unbekannt sind.
+    """
+    cap = cv2.VideoCapture(video_pfad)
+    try:
+        if not cap.isOpened():
+            return None
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+    finally:
+        cap.release()
+    if fps <= 0 or frame_count <= 0:
+        return None
+    anzahl = frame_count // max(1, int(abschnitt_sekunden * fps))
+    if anzahl < 2:
+        return None
+    grenzen = [k * frame_count // anzahl for k in range(anzahl + 1)]
+    return list(zip(grenzen[:-1], grenzen[1:]))
+
+
+def _extrahiere_abschnitt(video_pfad, start, ende, optionen, mit_messung=False, lauf_optionen=None, referenz=None, synchron_indizes=None):
+    """
+    Analysiert die Frames start bis ende-1 eines Videos; Worker-Funktion für den Prozesspool und für die Korrektur
+    an Abschnittsgrenzen (referenz und synchron_indizes siehe _analysiere_frames).
+    Liefert das Ergebnis von _analysiere_frames, ergänzt um 'start', 'ende' und 'messdaten'.
+    """
+    lauf_optionen = lauf_optionen or {}
+    zeiten = StufenZeiten() if mit_messung else None
+    if lauf_optionen.get('decoder_threads'):
+        cap = cv2.VideoCapture(video_pfad, cv2.CAP_ANY, [cv2.CAP_PROP_N_THREADS, int(lauf_optionen['decoder_threads'])])
+    else:
+        cap = cv2.VideoCapture(video_pfad)
+    if not cap.isOpened():
+        raise OSError(f"Konnte Video nicht öffnen: {video_pfad}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    schritt = _abtast_schritt(optionen['modus'], optionen['schritt'], optionen['intervall_sekunden'], fps)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    if lauf_optionen.get('pipeline'):
+        frames = _lese_frames_parallel(cap, ende, schritt, fps <= 0, zeiten, start=start)
+    else:
+        frames = _lese_frames(cap, ende, schritt, fps <= 0, zeiten, start=start)
+    try:
+        analyse = _analysiere_frames(frames, fps, 0, optionen['schwellwert'], optionen['bins'], optionen['ranges'], optionen['signatur_typ'],
+                                     optionen['quantisierung'], optionen['analyse_groesse'], zeiten, None, None, referenz, synchron_indizes)
+    finally:
+        frames.close()
+        cap.release()
+    if zeiten is not None:
+        zeiten.zaehle('dekodierte_frames', max(0, analyse['letzter_index'] + 1 - start))
+        zeiten.zaehle('analysierte_frames', analyse['analysierte_frames'])
+    analyse.update(start=start, ende=ende, messdaten=zeiten.als_dict() if zeiten is not None else None)
+    return analyse
+
+
+def _fuege_abschnitte_zusammen(video_pfad, abschnitte, optionen, zeiten=None, lauf_optionen=None):
+    """
+    Fügt die Keyframes der parallel analysierten Abschnitte eines Videos so zusammen, wie sie ein serieller
+    Durchlauf gefunden hätte, und liefert (histogramme, metadaten).
+
+    Jeder Abschnitt wurde ohne Referenz analysiert, sein erster Frame ist also nur vorläufig ein Keyframe. An jeder
+    Grenze wird deshalb ab dem Abschnittsstart mit dem tatsächlich letzten Keyframe als Referenz erneut analysiert,
+    bis ein Keyframe gefunden wird, den auch der Abschnitt hat: Ab dort vergleichen beide Durchläufe mit demselben
+    Referenzframe und liefern dieselben Keyframes. Bei einem Szenenwechsel nahe der Grenze kostet das nur wenige Frames.
+    """
+    histogramme = []
+    frame_indizes = []
+    zeitstempel = []
+    referenz = None
+    for abschnitt in sorted(abschnitte, key=lambda abschnitt: abschnitt['start']):
+        uebernahme_ab = 0
+        if referenz is not None:
+            korrektur = _extrahiere_abschnitt(video_pfad, abschnitt['start'], abschnitt['ende'], optionen, zeiten is not None, lauf_optionen, referenz,
+                                              set(abschnitt['frame_indizes']))
+            if zeiten is not None:
+                zeiten.addiere(StufenZeiten.aus_dict(korrektur['messdaten']))
+                zeiten.zaehle('korrigierte_frames', max(0, korrektur['letzter_index'] + 1 - abschnitt['start']))
+            histogramme.extend(korrektur['histogramme'])
+            frame_indizes.extend(korrektur['frame_indizes'])
+            zeitstempel.extend(korrektur['zeitstempel'])
+            referenz = korrektur['referenz']
+            if korrektur['synchron_index'] is None:
+                continue
+            uebernahme_ab = abschnitt['frame_indizes'].index(korrektur['synchron_index']) + 1
+        histogramme.extend(abschnitt['histogramme'][uebernahme_ab:])
+        frame_indizes.extend(abschnitt['frame_indizes'][uebernahme_ab:])
+        zeitstempel.extend(abschnitt['zeitstempel'][uebernahme_ab:])
+        if abschnitt['frame_indizes']:
+            referenz = abschnitt['referenz']
+
+    if zeiten is not None:
+        zeiten.zaehle('keyframes', len(histogramme))
+    metadaten = {'frame_indizes': frame_indizes, 'zeitstempel': zeitstempel}
+    if optionen['max_keyframes'] and len(histogramme) > optionen['max_keyframes']:
+        histogramme, metadaten = reduziere_keyframes(histogramme, metadaten, optionen['max_keyframes'], optionen['signatur_typ'])
+    return histogramme, metadaten
+
+
+def extrahiere_alle_signaturen(video_pfade, optionen, cache=None, anzahl_prozesse=1, progress_callback=None, status_callback=None, steuerung=None, messung=None,
+                               pipeline=False, opencv_threads=None, abschnitt_sekunden=None, signatur_callback=None):
+    """
+    Extrahiert die Keyframe-Signaturen aller Videos und liefert {pfad: (histogramme, metadaten)}.
+    Bei anzahl_prozesse > 1 werden die Videos parallel in einem Prozesspool analysiert;
+    der Fortschritt wird dann pro fertigem Video gemeldet. Pause und Abbruch über die ScanSteuerung
+    greifen im Prozesspool zwischen zwei Videos, sonst pro Frame.
+
+    pipeline schaltet das Vorauslesen per Dekodier-Thread ein (siehe extrahiere_keyframe_histogramme).
+    opencv_threads begrenzt OpenCV (cv2.setNumThreads) und den Video-Decoder auf so viele Threads; im
+    Prozesspool gilt ohne Angabe 1 Thread pro Prozess, seriell bleibt es ohne Angabe beim OpenCV-Standard.
+    Beide beeinflussen nur die Laufzeit, nicht die Signaturen, und gehören daher nicht zu den Cache-Schlüsseln.
+
+    Mit abschnitt_sekunden und anzahl_prozesse > 1 werden Videos, die mindestens zwei solche Abschnitte lang sind,
+    in Frame-Bereiche aufgeteilt, die parallel analysiert und danach mit Korrektur an den Grenzen zusammengefügt
+    werden (siehe _fuege_abschnitte_zusammen); so nutzt auch ein einzelnes langes Video alle Prozesse.
+
+    signatur_callback(pfad, histogramme, metadaten) wird für jedes Video aufgerufen, sobald seine Signaturen
+    vorliegen (aus dem Cache oder fertig analysiert), und zwar im aufrufenden Thread, während der Prozesspool
+    weiterarbeitet (siehe vergleiche_videos_fortlaufend).
+    """
+    alle_signaturen = {}
+    zu_extrahieren = []
+    total_videos = len(video_pfade)
+    for i, pfad in enumerate(video_pfade):
+        if not os.path.exists(pfad):
+            print(f"Warnung: Video nicht gefunden: {pfad}")
+            continue
+        if messung:
+            t = time.perf_counter()
+        eintrag = cache.hole(pfad, optionen) if cache else None
+        if eintrag is not None:
+            if messung:
+                messung.video(pfad).erfasse('cache', t)
+                messung.video(pfad).zaehle('aus_cache')
+            if status_callback:
+                status_callback(f"Signaturen aus Cache geladen {i+1}/{total_videos}: {os.path.basename(pfad)}")
+            alle_signaturen[pfad] = eintrag
+            if signatur_callback:
+                signatur_callback(pfad, *eintrag)
+        else:
+            zu_extrahieren.append(pfad)
+
+    fertig = total_videos - len(zu_extrahieren)
+    if progress_callback and total_videos > 0:
+        progress_callback(fertig / total_videos * 0.5)
+
+    vorherige_opencv_threads = cv2.getNumThreads()
+    try:
+        if anzahl_prozesse and anzahl_prozesse > 1 and (len(zu_extrahieren) > 1 or (abschnitt_sekunden and zu_extrahieren)):
+            lauf_optionen = {'pipeline': pipeline, 'decoder_threads': opencv_threads or 1}
+            fertig = _extrahiere_im_prozesspool(zu_extrahieren, optionen, alle_signaturen, cache,
+                                                anzahl_prozesse if abschnitt_sekunden else min(anzahl_prozesse, len(zu_extrahieren)),
+                                                fertig, total_videos, progress_callback, status_callback, steuerung, messung, lauf_optionen, abschnitt_sekunden,
+                                                signatur_callback)
+        else:
+            lauf_optionen = {'pipeline': pipeline, 'decoder_threads': opencv_threads}
+            if opencv_threads:
+                cv2.setNumThreads(opencv_threads)
+            for pfad in zu_extrahieren:
+                if steuerung:
+                    steuerung.pruefe()
+                fertig = _extrahiere_seriell(pfad, optionen, alle_signaturen, cache, fertig, total_videos, progress_callback, status_callback, steuerung, messung,
+                                             lauf_optionen, signatur_callback)
+    finally:
+        if opencv_threads:
+            cv2.setNumThreads(vorherige_opencv_threads)
+        # Auch bei Abbruch bleiben die fertigen Signaturen im Cache erhalten
+        if cache:
+            cache.flush()
+    return alle_signaturen
+
+
+def _extrahiere_seriell(pfad, optionen, alle_signaturen, cache, fertig, total_videos, progress_callback, status_callback, steuerung, messung, lauf_optionen,
+                        signatur_callback=None):
+    if status_callback:
+        status_callback(f"Analysiere Video {fertig+1}/{total_videos}: {os.path.basename(pfad)}")
+    histogramme, metadaten = extrahiere_keyframe_histogramme(
+        pfad,
+        **optionen,
+        **lauf_optionen,
+        progress_callback=lambda p: progress_callback(p / total_videos * 0.5 + fertig / total_videos * 0.5) if progress_callback else None,
+        status_callback=status_callback,
+        mit_metadaten=True,
+        steuerung=steuerung,
+        messung=messung
+    )
+    alle_signaturen[pfad] = (histogramme, metadaten)
+    if cache and metadaten is not None:
+        cache.speichere(pfad, optionen, histogramme, metadaten)
+    if signatur_callback:
+        signatur_callback(pfad, histogramme, metadaten)
+    return fertig + 1
+
+
+def _extrahiere_im_prozesspool(zu_extrahieren, optionen, alle_signaturen, cache, anzahl_prozesse, fertig, total_videos, progress_callback, status_callback, steuerung,
+                               messung, lauf_optionen, abschnitt_sekunden=None, signatur_callback=None):
+    # Mit abschnitt_sekunden prüft der Worker selbst, ob ein Video aufgeteilt wird, und meldet dann die Frame-Bereiche;
+    # deren Aufträge kommen an den Anfang der Warteschlange. Die größten Dateien zuerst, damit ein langes Video nicht
+    # am Ende allein auf einem Kern läuft.
+    if abschnitt_sekunden:
+        zu_extrahieren = sorted(zu_extrahieren, key=_dateigroesse, reverse=True)
+    ausstehend = deque((pfad, None) for pfad in zu_extrahieren)
+    abschnitte = {}
+
+    def video_fertig(pfad, histogramme, metadaten):
+        nonlocal fertig
+        fertig += 1
+        alle_signaturen[pfad] = (histogramme, metadaten)
+        if cache and metadaten is not None:
+            cache.speichere(pfad, optionen, histogramme, metadaten)
+        if status_callback:
+            status_callback(f"Video analysiert {fertig}/{total_videos}: {os.path.basename(pfad)} - Keyframes extrahiert: {len(histogramme)}")
+        if progress_callback:
+            progress_callback(fertig / total_videos * 0.5)
+        if signatur_callback:
+            signatur_callback(pfad, histogramme, metadaten)
+
+    # Nur wenige Aufträge gleichzeitig einreichen, damit Pause und Abbruch zwischen zwei Videos greifen
+    laufend = {}
+    executor = ProcessPoolExecutor(max_workers=anzahl_prozesse, initializer=_initialisiere_prozess, initargs=(lauf_optionen['decoder_threads'],))
+    try:
+        while True:
+            while ausstehend and len(laufend) < anzahl_prozesse * 2 and not (steuerung and steuerung.pausiert):
+                auftrag = ausstehend.popleft()
+                pfad, bereich = auftrag
+                if bereich is None and abschnitt_sekunden:
+                    laufend[executor.submit(_plane_oder_extrahiere, pfad, optionen, messung is not None, lauf_optionen, abschnitt_sekunden)] = auftrag
+                elif bereich is None:
+                    laufend[executor.submit(_extrahiere_im_prozess, pfad, optionen, messung is not None, lauf_optionen)] = auftrag
+                else:
+                    laufend[executor.submit(_extrahiere_abschnitt, pfad, *bereich, optionen, messung is not None, lauf_optionen)] = auftrag
+            if steuerung:
+                steuerung.pruefe()
+            if not laufend:
+                break
+            erledigt, _ = wait(laufend, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in erledigt:
+                pfad, bereich = laufend.pop(future)
+                if bereich is None:
+                    try:
+                        ergebnis = future.result()
+                        if abschnitt_sekunden:
+                            art, ergebnis = ergebnis
+                            if art == 'abschnitte':
+                                abschnitte[pfad] = {'offen': len(ergebnis), 'ergebnisse': [], 'fehler': False}
+                                ausstehend.extendleft(reversed([(pfad, bereich) for bereich in ergebnis]))
+                                if status_callback:
+                                    status_callback(f"Teile {os.path.basename(pfad)} in {len(ergebnis)} Abschnitte auf")
+                                continue
+                        histogramme, metadaten, messdaten = ergebnis
+                    except Exception as e:
+                        print(f"Fehler beim Analysieren von {pfad}: {e}")
+                        histogramme, metadaten, messdaten = [], None, None
+                    if messung:
+                        messung.uebernehme_video(pfad, messdaten)
+                    video_fertig(pfad, histogramme, metadaten)
+                    continue
+
+                zustand = abschnitte[pfad]
+                zustand['offen'] -= 1
+                try:
+                    zustand['ergebnisse'].append(future.result())
+                except Exception as e:
+                    print(f"Fehler beim Analysieren von {pfad} (Frames {bereich[0]}-{bereich[1]}): {e}")
+                    zustand['fehler'] = True
+                if zustand['offen']:
+                    continue
+                zeiten = messung.video(pfad) if messung else None
+                histogramme, metadaten = [], None
+                if not zustand['fehler']:
+                    if zeiten is not None:
+                        for ergebnis in zustand['ergebnisse']:
+                            zeiten.addiere(StufenZeiten.aus_dict(ergebnis['messdaten']))
+                        t = time.perf_counter()
+                    try:
+                        histogramme, metadaten = _fuege_abschnitte_zusammen(pfad, zustand['ergebnisse'], optionen, zeiten, lauf_optionen)
+                    except Exception as e:
+                        print(f"Fehler beim Zusammenfügen der Abschnitte von {pfad}: {e}")
+                    if zeiten is not None:
+                        zeiten.erfasse('zusammenfuehren', t)
+                del abschnitte[pfad]
+                video_fertig(pfad, histogramme, metadaten)
+    finally:
+        # Bei Abbruch nicht auf die noch laufenden Videos warten
+        executor.shutdown(wait=not (steuerung and steuerung.abgebrochen), cancel_futures=True)
+    return fertig
+
+
+def waehle_video_paare(video_pfade, alle_matrizen, vorfilter_top_k=None, vorfilter_radius=None, status_callback=None):
+    """
+    Bestimmt die zu vergleichenden Videopaare. Ohne Vorfilter sind das alle Kombinationen;
+    mit Vorfilter nur die Kandidaten aus dem KandidatenIndex über die globalen Deskriptoren.
+    """
+    if not vorfilter_top_k and vorfilter_radius is None:
+        return list(combinations(video_pfade, 2))
+
+    deskriptoren = []
+    for position, pfad in enumerate(video_pfade):
+        if pfad in alle_matrizen:
+            deskriptor = globaler_deskriptor(alle_matrizen[pfad])
+            if deskriptor is not None:
+                deskriptoren.append((position, deskriptor))
+    index = KandidatenIndex(deskriptoren)
+    video_paare = [(video_pfade[a], video_pfade[b]) for a, b in index.kandidaten_paare(vorfilter_top_k, vorfilter_radius)]
+
+    if status_callback:
+        alle_paare_anzahl = len(video_pfade) * (len(video_pfade) - 1) // 2
+        status_callback(f"Vorfilter: {alle_paare_anzahl - len(video_paare)} von {alle_paare_anzahl} Paaren verworfen, {len(video_paare)} Kandidaten")
+    return video_paare
+
+
+def _ergaenze_identische(vergleichs_ergebnisse, identische_gruppen, position):
+    """
+    Überträgt die Ergebnisse der Vertreter (erstes Video jeder Gruppe) auf ihre identischen Kopien;
+    position ordnet jedem Pfad seinen Index in der Videoliste zu (bestimmt die Reihenfolge im Paar).
+    """
+    gruppe_von = {gruppe[0]: gruppe for gruppe in identische_gruppen}
+    for (pfad1, pfad2), ergebnis in list(vergleichs_ergebnisse.items()):
+        if pfad1 not in gruppe_von and pfad2 not in gruppe_von:
+            continue
+        for kopie1 in gruppe_von.get(pfad1, [pfad1]):
+            for kopie2 in gruppe_von.get(pfad2, [pfad2]):
+                if kopie1 == kopie2 or (kopie1, kopie2) == (pfad1, pfad2):
+                    continue
+                if position[kopie1] < position[kopie2]:
+                    vergleichs_ergebnisse[(kopie1, kopie2)] = ergebnis
+                else:
+                    # Paar in umgekehrter Reihenfolge: Positionen des besten Keyframe-Paares tauschen
+                    vergleichs_ergebnisse[(kopie2, kopie1)] = [ergebnis[0], tuple(reversed(ergebnis[1]))] if ergebnis else []
+
+
+def vergleiche_videos(video_pfade, progress_callback=None, status_callback=None, extraktions_optionen=None, cache=None, anzahl_prozesse=1,
+                      vorfilter_top_k=None, vorfilter_radius=None, mit_metadaten=False, steuerung=None, checkpoint_verzeichnis=None, messung=None,
+                      identische_zusammenfassen=True, pipeline=False, opencv_threads=None, gruppen_schwelle=None, signatur_speicher=None,
+                      abschnitt_sekunden=None, abbruch_schwelle=None):
+    """
+    Vergleicht die ausgewählten Videos anhand ihrer Keyframe-Signaturen (Farbhistogramme oder, mit der
+    Extraktionsoption signatur_typ='dhash', 64-Bit-Hashes; die Distanzen liegen in beiden Fällen zwischen 0 und 1).
+    Ist ein SignaturCache angegeben, werden unveränderte Videos nicht erneut dekodiert.
+    Mit anzahl_prozesse > 1 läuft die Keyframe-Extraktion parallel in mehreren Prozessen.
+    Mit vorfilter_top_k und/oder vorfilter_radius werden nur die per Vorfilter ermittelten Kandidatenpaare verglichen.
+
+    Jedes Ergebnis ist eine Liste [mittlere Distanz, (Keyframe in Video 1, Keyframe in Video 2)], wobei das Tupel
+    die Positionen des am besten übereinstimmenden Keyframe-Paares enthält. Mit mit_metadaten=True wird zusätzlich
+    {pfad: metadaten} mit Frame-Indizes und Zeitstempeln der Keyframes zurückgegeben.
+
+    Mit einer ScanSteuerung kann der Scan pausiert oder abgebrochen werden (ScanAbgebrochen wird weitergereicht).
+    Mit checkpoint_verzeichnis werden fertige Paarergebnisse laufend gesichert; ein erneuter Start desselben
+    Scans setzt dort fort. Zusammen mit dem SignaturCache muss dann auch nichts erneut dekodiert werden.
+
+    Mit einer Messung (instrumentierung.Messung) werden Stufenzeiten pro Video und Paar sowie die Dauer
+    der Phasen erfasst; ohne Messung entfällt jede Zeitmessung.
+
+    Mit identische_zusammenfassen werden byte-identische Dateien vorab über Größe und Inhalts-Hash erkannt:
+    Sie erhalten untereinander sofort die Distanz 0, werden nur einmal dekodiert und verglichen, und die
+    Ergebnisse des ersten Videos jeder Gruppe gelten auch für seine Kopien.
+
+    pipeline, opencv_threads und abschnitt_sekunden steuern die Parallelität der Extraktion (siehe extrahiere_alle_signaturen).
+
+    Mit gruppen_schwelle werden Paare mit Distanz <= gruppen_schwelle per Union-Find zu Duplikatgruppen
+    zusammengefasst. Sobald ein Video zu einer Gruppe gehört, wird es nicht mehr mit jedem Mitglied verglichen,
+    sondern nur noch mit dem Vertreter der Gruppe; das Ergebnis enthält dann nur die tatsächlich verglichenen
+    Paare (Gruppen bildet duplikat_gruppen.bilde_gruppen daraus mit derselben Schwelle).
+
+    Mit einem SignaturSpeicher werden die vergleichsfertigen Signatur-Matrizen spaltenweise auf der Festplatte
+    abgelegt und per memmap ohne Kopie gelesen: Bekannte Videos werden weder analysiert noch vorab geladen,
+    und im Speicher liegen während der Vergleiche nur die Seiten der gerade verglichenen Videos.
+
+    Mit abbruch_schwelle wird jeder Paarvergleich abgebrochen, sobald eine untere Schranke (grobe Histogramme
+    bzw. Bitanzahlen und Teilsummen, siehe distanz_engine.vergleiche_matrizen) beweist, dass die mittlere Distanz
+    darüber liegt. Solche Paare fehlen im Ergebnis; alle Paare bis zur Schwelle haben exakte Werte.
+    Ohne abbruch_schwelle werden alle Paare vollständig berechnet.
+    """
+    optionen = normalisiere_extraktions_optionen(extraktions_optionen)
+    checkpoint = ScanCheckpoint(video_pfade, optionen, checkpoint_verzeichnis) if checkpoint_verzeichnis else None
+    if messung:
+        t = time.perf_counter()
+    identische_gruppen = finde_identische_dateien(video_pfade, status_callback, steuerung, cache) if identische_zusammenfassen else []
+    kopien = {kopie for gruppe in identische_gruppen for kopie in gruppe[1:]}
+    eindeutige_pfade = [pfad for pfad in video_pfade if pfad not in kopien]
+    if messung:
+        t = messung.phasen.erfasse('identische', t)
+
+    gespeicherte = {}
+    if signatur_speicher:
+        for pfad in eindeutige_pfade:
+            eintrag = signatur_speicher.hole(pfad, optionen)
+            if eintrag is not None:
+                gespeicherte[pfad] = eintrag
+        if status_callback and gespeicherte:
+            status_callback(f"Signatur-Speicher: {len(gespeicherte)} von {len(eindeutige_pfade)} Videos ohne erneute Analyse verfügbar")
+    alle_signaturen = extrahiere_alle_signaturen([pfad for pfad in eindeutige_pfade if pfad not in gespeicherte], optionen, cache, anzahl_prozesse,
+                                                 progress_callback, status_callback, steuerung, messung, pipeline, opencv_threads,
+                                                 abschnitt_sekunden)
+    if messung:
+        t = messung.phasen.erfasse('extraktion', t)
+
+    alle_matrizen = {pfad: signatur_matrix(signatur[0], optionen['signatur_typ']) for pfad, signatur in alle_signaturen.items()}
+    keyframe_metadaten = {pfad: signatur[1] for pfad, signatur in alle_signaturen.items()}
+    del alle_signaturen
+    if signatur_speicher:
+        for pfad, matrix in alle_matrizen.items():
+            if keyframe_metadaten[pfad] is not None:
+                signatur_speicher.speichere(pfad, optionen, matrix, keyframe_metadaten[pfad])
+        signatur_speicher.flush()
+        # Frisch extrahierte Matrizen durch memmap-Sichten ersetzen, damit nur die gerade verglichenen Videos im Speicher liegen
+        for pfad in list(alle_matrizen):
+            eintrag = signatur_speicher.hole(pfad, optionen)
+            if eintrag is not None:
+                alle_matrizen[pfad] = eintrag[0]
+        for pfad, (matrix, metadaten) in gespeicherte.items():
+            alle_matrizen[pfad] = matrix
+            keyframe_metadaten[pfad] = metadaten
+    for gruppe in identische_gruppen:
+        if gruppe[0] in keyframe_metadaten:
+            keyframe_metadaten.update((kopie, keyframe_metadaten[gruppe[0]]) for kopie in gruppe[1:])
+
+    vergleichs_ergebnisse = {}
+    for gruppe in identische_gruppen:
+        hat_keyframes = len(alle_matrizen.get(gruppe[0], [])) > 0
+        for paar in combinations(gruppe, 2):
+            vergleichs_ergebnisse[paar] = [0.0, (0, 0)] if hat_keyframes else []
+    video_paare = waehle_video_paare(eindeutige_pfade, alle_matrizen, vorfilter_top_k, vorfilter_radius, status_callback)
+    total_vergleiche = len(video_paare)
+    if messung:
+        t = messung.phasen.erfasse('vorbereitung', t)
+
+    gesicherte_ergebnisse = checkpoint.laden() if checkpoint else {}
+    if gesicherte_ergebnisse and status_callback:
+        status_callback(f"Checkpoint gefunden: {len(gesicherte_ergebnisse)} Paare bereits verglichen")
+
+    # Mit gruppen_schwelle wird gegen den Vertreter (Wurzel im Union-Find) der Gruppe eines Videos verglichen
+    gruppen = UnionFind(eindeutige_pfade) if gruppen_schwelle is not None else None
+    position = {pfad: i for i, pfad in enumerate(eindeutige_pfade)}
+    eingespart = 0
+    # Grobe Signaturen für die untere Schranke, pro Video einmal berechnet
+    grobe_matrizen = {}
+    # Paare über abbruch_schwelle: nur für diesen Lauf gemerkt, damit Gruppenmitglieder sie nicht erneut vergleichen
+    abgebrochene_paare = set()
+
+    try:
+        for i, (video_pfad1, video_pfad2) in enumerate(video_paare):
+            if steuerung:
+                steuerung.pruefe()
+            if gruppen:
+                video_pfad1, video_pfad2 = sorted((gruppen.finde(video_pfad1), gruppen.finde(video_pfad2)), key=position.get)
+                if video_pfad1 == video_pfad2 or (video_pfad1, video_pfad2) in vergleichs_ergebnisse or (video_pfad1, video_pfad2) in abgebrochene_paare:
+                    eingespart += 1
+                    if progress_callback and total_vergleiche > 0:
+                        progress_callback(0.5 + (i + 1) / total_vergleiche * 0.5)
+                    continue
+            if (video_pfad1, video_pfad2) in gesicherte_ergebnisse:
+                vergleichs_ergebnisse[(video_pfad1, video_pfad2)] = gesicherte_ergebnisse[(video_pfad1, video_pfad2)]
+            elif video_pfad1 in alle_matrizen and video_pfad2 in alle_matrizen:
+                if status_callback:
+                    status_callback(f"Vergleiche '{os.path.basename(video_pfad1)}' mit '{os.path.basename(video_pfad2)}' ({i+1}/{total_vergleiche})")
+                if messung:
+                    t_paar = time.perf_counter()
+                if abbruch_schwelle is not None:
+                    for pfad in (video_pfad1, video_pfad2):
+                        if pfad not in grobe_matrizen:
+                            grobe_matrizen[pfad] = grobe_matrix(alle_matrizen[pfad])
+                    ergebnis = vergleiche_matrizen(alle_matrizen[video_pfad1], alle_matrizen[video_pfad2], mit_bestem_paar=True, abbruch_schwelle=abbruch_schwelle,
+                                                   grob1=grobe_matrizen[video_pfad1], grob2=grobe_matrizen[video_pfad2])
+                else:
+                    ergebnis = vergleiche_matrizen(alle_matrizen[video_pfad1], alle_matrizen[video_pfad2], mit_bestem_paar=True)
+                if messung:
+                    zeiten = messung.paar(video_pfad1, video_pfad2)
+                    zeiten.erfasse('vergleich', t_paar)
+                    zeiten.zaehle('keyframe_vergleiche', len(alle_matrizen[video_pfad1]) * len(alle_matrizen[video_pfad2]))
+                if ergebnis is not None and ergebnis[1] is None:
+                    # Liegt sicher über abbruch_schwelle; nicht sichern, damit ein Lauf mit höherer Schwelle neu vergleicht
+                    abgebrochene_paare.add((video_pfad1, video_pfad2))
+                else:
+                    vergleichs_ergebnisse[(video_pfad1, video_pfad2)] = list(ergebnis) if ergebnis is not None else []
+                    if checkpoint:
+                        checkpoint.sichere((video_pfad1, video_pfad2), vergleichs_ergebnisse[(video_pfad1, video_pfad2)])
+            ergebnis = vergleichs_ergebnisse.get((video_pfad1, video_pfad2))
+            if gruppen and ergebnis and ergebnis[0] <= gruppen_schwelle:
+                gruppen.vereinige(video_pfad1, video_pfad2)
+
+            if progress_callback and total_vergleiche > 0:
+                progress_callback(0.5 + (i + 1) / total_vergleiche * 0.5)
+    finally:
+        if checkpoint:
+            checkpoint.flush()
+        if messung:
+            messung.phasen.erfasse('vergleich', t)
+
+    if checkpoint:
+        checkpoint.abschliessen()
+    if gruppen and status_callback:
+        status_callback(f"Duplikatgruppen: {eingespart} von {total_vergleiche} Paarvergleichen durch Vergleich mit dem Gruppenvertreter eingespart")
+    if abbruch_schwelle is not None and status_callback:
+        status_callback(f"Abbruchschwelle: {len(abgebrochene_paare)} von {total_vergleiche} Paaren liegen über {abbruch_schwelle} und wurden verworfen")
+    if identische_gruppen:
+        _ergaenze_identische(vergleichs_ergebnisse, identische_gruppen, {pfad: i for i, pfad in enumerate(video_pfade)})
+
+    if mit_metadaten:
+        return vergleichs_ergebnisse, {pfad: metadaten for pfad, metadaten in keyframe_metadaten.items() if metadaten is not None}
+    return vergleichs_ergebnisse
+
+
+def vergleiche_videos_fortlaufend(video_pfade, schwelle, treffer_callback=None, progress_callback=None, status_callback=None, extraktions_optionen=None,
+                                  cache=None, anzahl_prozesse=1, mit_metadaten=False, steuerung=None, messung=None, identische_zusammenfassen=True,
+                                  pipeline=False, opencv_threads=None, abschnitt_sekunden=None, exakt=False, abbruch_schwelle=None):
+    """
+    Fortlaufende Variante von vergleiche_videos: Sobald die Signaturen eines Videos vorliegen, wird es mit allen
+    bereits fertigen Videos verglichen, während der Prozesspool die nächsten Videos dekodiert. Jedes Paar mit
+    Distanz <= schwelle wird sofort über treffer_callback(paar, ergebnis, metadaten) gemeldet, wobei metadaten
+    die Keyframe-Metadaten beider Videos enthält ({pfad: metadaten}); so lassen sich die ersten Duplikate prüfen,
+    während der Scan noch läuft. Der Callback wird im aufrufenden Thread aufgerufen.
+
+    Ohne exakt werden Paare über abbruch_schwelle (Standard: schwelle) wie bei vergleiche_videos vorzeitig verworfen
+    und fehlen im Ergebnis; eine höhere abbruch_schwelle hält die Ergebnisse für ein späteres Umfiltern vollständig.
+    Vorfilter, Duplikatgruppen, Checkpoint und Signatur-Speicher brauchen alle Signaturen vorab und stehen hier
+    nicht zur Verfügung. Am Ende wird dasselbe wie von vergleiche_videos geliefert.
+    """
+    optionen = normalisiere_extraktions_optionen(extraktions_optionen)
+    abbruch_schwelle = None if exakt else max(schwelle, abbruch_schwelle or schwelle)
+    if messung:
+        t = time.perf_counter()
+    identische_gruppen = finde_identische_dateien(video_pfade, status_callback, steuerung, cache) if identische_zusammenfassen else []
+    kopien = {kopie for gruppe in identische_gruppen for kopie in gruppe[1:]}
+    gruppe_von = {gruppe[0]: gruppe for gruppe in identische_gruppen}
+    eindeutige_pfade = [pfad for pfad in video_pfade if pfad not in kopien]
+    if messung:
+        t = messung.phasen.erfasse('identische', t)
+
+    position = {pfad: i for i, pfad in enumerate(video_pfade)}
+    fertige_matrizen = {}
+    grobe_matrizen = {}
+    keyframe_metadaten = {}
+    vergleichs_ergebnisse = {}
+    treffer = 0
+    verworfen = 0
+
+    def melde(neue_ergebnisse):
+        nonlocal treffer
+        vergleichs_ergebnisse.update(neue_ergebnisse)
+        for neues_paar, neues_ergebnis in neue_ergebnisse.items():
+            if neues_ergebnis and neues_ergebnis[0] <= schwelle:
+                treffer += 1
+                if treffer_callback:
+                    treffer_callback(neues_paar, neues_ergebnis, {pfad: keyframe_metadaten.get(pfad) for pfad in neues_paar})
+
+    def vergleiche_neues_video(pfad, histogramme, metadaten):
+        nonlocal verworfen
+        matrix = signatur_matrix(histogramme, optionen['signatur_typ'])
+        for kopie in gruppe_von.get(pfad, [pfad]):
+            keyframe_metadaten[kopie] = metadaten
+        melde({paar: [0.0, (0, 0)] if len(matrix) else [] for paar in combinations(gruppe_von.get(pfad, []), 2)})
+        if abbruch_schwelle is not None:
+            grobe_matrizen[pfad] = grobe_matrix(matrix)
+        for anderer_pfad in fertige_matrizen:
+            if steuerung:
+                steuerung.pruefe()
+            pfad1, pfad2 = sorted((anderer_pfad, pfad), key=position.get)
+            matrix1, matrix2 = (fertige_matrizen[pfad1], matrix) if pfad2 == pfad else (matrix, fertige_matrizen[pfad2])
+            if messung:
+                t_paar = time.perf_counter()
+            ergebnis = vergleiche_matrizen(matrix1, matrix2, mit_bestem_paar=True, abbruch_schwelle=abbruch_schwelle,
+                                           grob1=grobe_matrizen.get(pfad1), grob2=grobe_matrizen.get(pfad2))
+            if messung:
+                zeiten = messung.paar(pfad1, pfad2)
+                zeiten.erfasse('vergleich', t_paar)
+                zeiten.zaehle('keyframe_vergleiche', len(matrix1) * len(matrix2))
+            if ergebnis is not None and ergebnis[1] is None:
+                verworfen += 1
+            else:
+                neue_ergebnisse = {(pfad1, pfad2): list(ergebnis) if ergebnis is not None else []}
+                if pfad1 in gruppe_von or pfad2 in gruppe_von:
+                    # Das Ergebnis gilt auch für identische Kopien beider Videos
+                    _ergaenze_identische(neue_ergebnisse, [gruppe_von[p] for p in (pfad1, pfad2) if p in gruppe_von], position)
+                melde(neue_ergebnisse)
+        if status_callback and fertige_matrizen:
+            status_callback(f"Verglichen: '{os.path.basename(pfad)}' mit {len(fertige_matrizen)} fertigen Videos, bisher {treffer} ähnliche Paare")
+        fertige_matrizen[pfad] = matrix
+
+    extrahiere_alle_signaturen(eindeutige_pfade, optionen, cache, anzahl_prozesse,
+                               (lambda p: progress_callback(min(1.0, p * 2))) if progress_callback else None,
+                               status_callback, steuerung, messung, pipeline, opencv_threads, abschnitt_sekunden, vergleiche_neues_video)
+    if messung:
+        messung.phasen.erfasse('extraktion_und_vergleich', t)
+    if abbruch_schwelle is not None and status_callback:
+        status_callback(f"Abbruchschwelle: {verworfen} Paare liegen über {abbruch_schwelle} und wurden verworfen")
+
+    if mit_metadaten:
+        return vergleichs_ergebnisse, {pfad: metadaten for pfad, metadaten in keyframe_metadaten.items() if metadaten is not None}
+    return vergleichs_ergebnisse
+
+
+def vergleiche_inkrementell(video_pfade, index, progress_callback=None, status_callback=None, extraktions_optionen=None, anzahl_prozesse=1,
+                            mit_metadaten=False, steuerung=None, messung=None, pipeline=False, opencv_threads=None, speicher_schwelle=0.5,
+                            abschnitt_sekunden=None, abbruch_schwelle=None):
+    """
+    Inkrementeller Scan einer Bibliothek über einen BibliothekIndex: Signaturen werden nur für neue oder
+    geänderte Videos extrahiert, und verglichen werden nur neue Videos mit dem Bestand sowie neue Videos
+    untereinander. Ein täglicher Lauf kostet so O(neu x Bibliothek) statt O(Bibliothek²).
+
+    Die Signaturen des Bestands werden nicht vorab geladen, sondern einzeln aus dem Index gelesen und gegen
+    jeweils bis zu NEUE_VIDEOS_PRO_DURCHLAUF neue Videos verglichen; der Speicherbedarf wächst damit mit der Zahl
+    der neuen Videos, nicht mit der Bibliothek. Ein Block gilt erst als verglichen, wenn er komplett fertig ist.
+
+    Geliefert werden nur die in diesem Lauf berechneten Paare, also Paare mit mindestens einem neuen Video;
+    frühere Treffer liefert index.ergebnisse. Im Index abgelegt werden davon nur Paare mit Distanz <= speicher_schwelle,
+    damit er bei großen Bibliotheken nicht quadratisch wächst. Videos aus dem Index, deren Datei fehlt, werden vorab
+    entfernt. Mit abbruch_schwelle fehlen Paare, die sicher darüber liegen, wie bei vergleiche_videos im Ergebnis;
+    damit der Index vollständig bleibt, wird dabei mindestens bis speicher_schwelle exakt verglichen.
+    """
+    optionen = normalisiere_extraktions_optionen(extraktions_optionen)
+    if abbruch_schwelle is not None:
+        abbruch_schwelle = max(abbruch_schwelle, speicher_schwelle)
+    if messung:
+        t = time.perf_counter()
+    entfernt = index.entferne_fehlende()
+    bestand = index.verglichene(video_pfade, optionen)
+    neue_pfade = [pfad for pfad in dict.fromkeys(video_pfade) if pfad not in bestand]
+    bestand_pfade = [pfad for pfad in dict.fromkeys(video_pfade) if pfad in bestand]
+    if status_callback:
+        status_callback(f"Bibliotheksindex: {len(bestand_pfade)} Videos im Bestand, {len(neue_pfade)} neu oder geändert"
+                        + (f", {entfernt} gelöschte Videos entfernt" if entfernt else ""))
+    if messung:
+        t = messung.phasen.erfasse('index', t)
+
+    neue_signaturen = extrahiere_alle_signaturen(neue_pfade, optionen, index, anzahl_prozesse, progress_callback, status_callback, steuerung,
+                                                 messung, pipeline, opencv_threads, abschnitt_sekunden)
+    neue_matrizen = {pfad: signatur_matrix(signatur[0], optionen['signatur_typ']) for pfad, signatur in neue_signaturen.items()}
+    grobe_matrizen = {pfad: grobe_matrix(matrix) for pfad, matrix in neue_matrizen.items()} if abbruch_schwelle is not None else {}
+    keyframe_metadaten = {pfad: signatur[1] for pfad, signatur in neue_signaturen.items() if signatur[1] is not None}
+    del neue_signaturen
+    if messung:
+        t = messung.phasen.erfasse('extraktion', t)
+
+    def vergleiche(pfad, matrix, grob, neuer_pfad):
+        if steuerung:
+            steuerung.pruefe()
+        if messung:
+            t_paar = time.perf_counter()
+        ergebnis = vergleiche_matrizen(matrix, neue_matrizen[neuer_pfad], mit_bestem_paar=True, abbruch_schwelle=abbruch_schwelle,
+                                       grob1=grob, grob2=grobe_matrizen.get(neuer_pfad))
+        if messung:
+            zeiten = messung.paar(pfad, neuer_pfad)
+            zeiten.erfasse('vergleich', t_paar)
+            zeiten.zaehle('keyframe_vergleiche', len(matrix) * len(neue_matrizen[neuer_pfad]))
+        if ergebnis is None or ergebnis[1] is not None:
+            return list(ergebnis) if ergebnis is not None else []
+        return None
+
+    vergleichs_ergebnisse = {}
+    neue_liste = [pfad for pfad in neue_pfade if pfad in neue_matrizen]
+    total_vergleiche = len(neue_liste) * len(bestand_pfade) + len(neue_liste) * (len(neue_liste) - 1) // 2
+    erledigt = 0
+    try:
+        for block_start in range(0, len(neue_liste), NEUE_VIDEOS_PRO_DURCHLAUF):
+            block = neue_liste[block_start:block_start + NEUE_VIDEOS_PRO_DURCHLAUF]
+            block_ergebnisse = {}
+            # Bestand und neue Videos früherer Blöcke nacheinander gegen alle Videos des Blocks
+            for pfad in bestand_pfade + neue_liste[:block_start]:
+                metadaten = None
+                if pfad in neue_matrizen:
+                    matrix, grob = neue_matrizen[pfad], grobe_matrizen.get(pfad)
+                else:
+                    eintrag = index.hole(pfad, optionen)
+                    if eintrag is None:
+                        erledigt += len(block)
+                        continue
+                    matrix = signatur_matrix(eintrag[0], optionen['signatur_typ'])
+                    grob = grobe_matrix(matrix) if abbruch_schwelle is not None else None
+                    metadaten = eintrag[1]
+                for neuer_pfad in block:
+                    ergebnis = vergleiche(pfad, matrix, grob, neuer_pfad)
+                    if ergebnis is not None:
+                        block_ergebnisse[(pfad, neuer_pfad)] = ergebnis
+                        # Metadaten des Bestands nur für Videos behalten, die im Ergebnis vorkommen
+                        if metadaten is not None:
+                            keyframe_metadaten[pfad] = metadaten
+                erledigt += len(block)
+                if progress_callback and total_vergleiche > 0:
+                    progress_callback(0.5 + erledigt / total_vergleiche * 0.5)
+            # Die neuen Videos des Blocks untereinander
+            for i, neuer_pfad in enumerate(block):
+                for frueherer_pfad in block[:i]:
+                    ergebnis = vergleiche(frueherer_pfad, neue_matrizen[frueherer_pfad], grobe_matrizen.get(frueherer_pfad), neuer_pfad)
+                    if ergebnis is not None:
+                        block_ergebnisse[(frueherer_pfad, neuer_pfad)] = ergebnis
+                erledigt += i
+                if progress_callback and total_vergleiche > 0:
+                    progress_callback(0.5 + erledigt / total_vergleiche * 0.5)
+            if status_callback:
+                status_callback(f"Verglichen: {len(block)} neue Videos mit {len(bestand_pfade) + block_start} Videos und untereinander")
+            vergleichs_ergebnisse.update(block_ergebnisse)
+            index.speichere_ergebnisse({paar: ergebnis for paar, ergebnis in block_ergebnisse.items() if ergebnis and ergebnis[0] <= speicher_schwelle},
+                                       optionen)
+            for neuer_pfad in block:
+                index.markiere_verglichen(neuer_pfad, optionen)
+    finally:
+        index.flush()
+        if messung:
+            messung.phasen.erfasse('vergleich', t)
+
+    if mit_metadaten:
+        return vergleichs_ergebnisse, keyframe_metadaten
+    return vergleichs_ergebnisse
@@ -0,0 +1,86 @@
+# virtuelle_liste.py
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import Scrollbar
+
+
+class VirtuelleListe(tk.Frame):
+    """
+    Scrollbare Liste, die nur die sichtbaren Zeilen zeichnet.
+
+    Das Canvas hält genau so viele Textelemente, wie Zeilen in das Fenster passen; beim Scrollen und beim Setzen
+    neuer Einträge werden nur deren Texte ersetzt. Laden und Scrollen bleiben so auch bei 100.000 Einträgen schnell.
+    anzeige wandelt einen Eintrag in den angezeigten Text um und wird nur für sichtbare Zeilen aufgerufen.
+    """
+
+    def __init__(self, master, anzeige=str, hoehe=5, **kwargs):
+        super().__init__(master, **kwargs)
+        self.anzeige = anzeige
+        self.eintraege = []
+        self.erste_zeile = 0
+        self.schrift = tkfont.nametofont("TkFixedFont")
+        self.zeilen_hoehe = self.schrift.metrics("linespace") + 1
+        self.canvas = tk.Canvas(self, height=hoehe * self.zeilen_hoehe, background="white", highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = Scrollbar(self, command=self.scrolle)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.zeilen_elemente = []
+
+        self.canvas.bind("<Configure>", lambda event: self.zeichne())
+        self.canvas.bind("<MouseWheel>", self.mausrad)
+        self.canvas.bind("<Button-4>", lambda event: self.scrolle("scroll", -3, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.scrolle("scroll", 3, "units"))
+
+    def __len__(self):
+        return len(self.eintraege)
+
+    def setze_eintraege(self, eintraege):
+        """Ersetzt alle Einträge; die Ansicht springt an den Anfang."""
+        self.eintraege = list(eintraege)
+        self.erste_zeile = 0
+        self.zeichne()
+
+    def sichtbare_zeilen(self):
+        """Anzahl der vollständig sichtbaren Zeilen (mindestens 1)."""
+        hoehe = self.canvas.winfo_height()
+        if hoehe <= 1:
+            # Noch nicht angeordnet: die angeforderte Höhe verwenden
+            hoehe = int(self.canvas.cget("height"))
+        return max(1, hoehe // self.zeilen_hoehe)
+
+    def scrolle(self, aktion, *args):
+        """Befehl der Scrollbar: ("moveto", anteil) oder ("scroll", anzahl, "units"/"pages")."""
+        if aktion == "moveto":
+            erste_zeile = int(round(float(args[0]) * len(self.eintraege)))
+        elif aktion == "scroll":
+            schritt = self.sichtbare_zeilen() if args[1] == "pages" else 1
+            erste_zeile = self.erste_zeile + int(args[0]) * schritt
+        else:
+            return
+        self.erste_zeile = max(0, min(erste_zeile, len(self.eintraege) - self.sichtbare_zeilen()))
+        self.zeichne()
+
+    def mausrad(self, event):
+        # Windows liefert Vielfache von 120, macOS kleine Werte
+        schritte = -event.delta // 120 if abs(event.delta) >= 120 else -event.delta
+        if schritte:
+            self.scrolle("scroll", schritte * 3, "units")
+
+    def zeichne(self):
+        sichtbar = self.sichtbare_zeilen()
+        # Eine angeschnittene Zeile am unteren Rand mitzeichnen
+        benoetigt = sichtbar + 1
+        while len(self.zeilen_elemente) < benoetigt:
+            y = len(self.zeilen_elemente) * self.zeilen_hoehe
+            self.zeilen_elemente.append(self.canvas.create_text(2, y, anchor="nw", font=self.schrift, text=""))
+        anzahl = len(self.eintraege)
+        self.erste_zeile = max(0, min(self.erste_zeile, anzahl - sichtbar))
+        for zeile, element in enumerate(self.zeilen_elemente):
+            index = self.erste_zeile + zeile
+            self.canvas.itemconfigure(element, text=self.anzeige(self.eintraege[index]) if zeile < benoetigt and index < anzahl else "")
+        if anzahl:
+            self.scrollbar.set(self.erste_zeile / anzahl, min(1.0, (self.erste_zeile + sichtbar) / anzahl))
+        else:
+            self.scrollbar.set(0.0, 1.0)